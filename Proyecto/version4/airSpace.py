@@ -1,109 +1,596 @@
 from navPoint import NavPoint
 from navAirport import NavAirport
 from navSegment import NavSegment
+from navGraph import NavGraph, haversine_km
+from nameIndex import NamePrefixIndex
+from airSpaceSnapshot import compile_snapshot, load_snapshot
+from airSpaceValidation import validate_airspace
+from parseCache import ParseCache, hash_sources
+from landmarks import LandmarkIndex
+from contractionHierarchy import ContractionHierarchy
+from distanceMatrix import AirportPairTable, distance_matrix
+from batchSolver import DEFAULT_CHUNK_SIZE, solve_batch
+from routeCache import RouteCache
+from kShortestPaths import yen_k_shortest, penalty_alternatives
+from components import ComponentIndex
+from incrementalPlanner import IncrementalPlanner
+from costModels import DistanceModel
+from restrictedAreas import RestrictedAreas, RestrictedZone
 from heapq import heappush, heappop
+from collections import namedtuple, OrderedDict
+import os
+import numpy as np
+
+# Same key with different data in two of the airspaces given to AirSpace.merge
+MergeConflict = namedtuple("MergeConflict", "kind key first other")
+
+# Two coordinates closer than this (degrees) are considered the same point
+COORDINATE_TOLERANCE = 1e-6
+
+# Bytes that bytes.split() treats as separators
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b' \t\n\r\x0b\x0c')] = True
+
+
+def read_columns(path, num_columns):
+    """Read a whitespace separated file into an (n, num_columns) bytes array.
+
+    The whole file is split in one pass, and the fields of each line are
+    counted with NumPy over the raw bytes (blank lines are skipped). Raises
+    ValueError on the first line that does not have exactly num_columns
+    fields, so the caller can fall back to the line-by-line parser.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    raw = np.frombuffer(data, dtype=np.uint8)
+    space = _WHITESPACE[raw]
+    # Un campo empieza en cada byte que no es espacio y va detrás de uno que sí lo es
+    starts = ~space
+    starts[1:] &= space[:-1]
+    # Campos vistos hasta el final de cada línea; la diferencia son los de cada una
+    seen = np.cumsum(starts, dtype=np.int64)
+    ends = np.append(seen[raw == ord('\n')], seen[-1] if len(seen) else 0)
+    counts = np.diff(ends, prepend=0)
+    wrong = np.flatnonzero((counts != 0) & (counts != num_columns))
+    if len(wrong):
+        raise ValueError(f"{path}:{wrong[0] + 1}: se esperaban {num_columns} columnas")
+    return np.array(data.split(), dtype=bytes).reshape(-1, num_columns)
+
+
+def parse_nav_file(nav_file):
+    """Vectorized parser for *_nav.txt: returns (ids, names, lats, lons) arrays"""
+    columns = read_columns(nav_file, 4)
+    return (columns[:, 0].astype(np.int64), np.char.decode(columns[:, 1], 'ascii'),
+            columns[:, 2].astype(np.float64), columns[:, 3].astype(np.float64))
+
+
+def parse_seg_file(seg_file):
+    """Vectorized parser for *_seg.txt: returns (origins, destinations, distances) arrays"""
+    columns = read_columns(seg_file, 3)
+    return (columns[:, 0].astype(np.int64), columns[:, 1].astype(np.int64),
+            columns[:, 2].astype(np.float64))
+
+
+def iter_navpoints(nav_file):
+    """Yield a NavPoint for every valid line of a *_nav.txt file, one at a time"""
+    with open(nav_file, 'r') as f:
+        for line in f:
+            parts = line.strip().split()
+            if len(parts) >= 4:
+                yield NavPoint(int(parts[0]), parts[1], float(parts[2]), float(parts[3]))
+
+
+def iter_segments(seg_file):
+    """Yield a NavSegment (origin ID, destination ID, distance) for every line of a *_seg.txt file"""
+    with open(seg_file, 'r') as f:
+        for line in f:
+            parts = line.strip().split()
+            if len(parts) >= 3:
+                yield NavSegment(int(parts[0]), int(parts[1]), float(parts[2]))
+
+
+def iter_airports(aer_file):
+    """Yield (ICAO code, SID names, STAR names) for every airport of a *_aer.txt file.
+
+    The names are not resolved to NavPoints here; AirSpace does that when the
+    airports are added to it.
+    """
+    current = None
+    with open(aer_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            # Detect airport lines (ICAO codes are 4 uppercase letters)
+            if len(line) == 4 and line.isupper():
+                if current is not None:
+                    yield current
+                current = (line, [], [])
+                continue
+
+            if current is None:
+                continue  # Skip lines before first airport
+
+            # Process SIDs and STARs
+            if '.' in line:  # SID or STAR indicator
+                point_name = line.split('.')[0]
+                if line.endswith('.D'):  # Departure (SID)
+                    current[1].append(point_name)
+                elif line.endswith('.A'):  # Arrival (STAR)
+                    current[2].append(point_name)
+
+    if current is not None:
+        yield current
+
+
+def filter_bbox(points, min_lat, max_lat, min_lon, max_lon):
+    """Keep only the points inside a lat/lon bounding box"""
+    for point in points:
+        if min_lat <= point.latitude <= max_lat and min_lon <= point.longitude <= max_lon:
+            yield point
+
+
+def filter_ids(points, ids):
+    """Keep only the points whose ID is in ids"""
+    for point in points:
+        if point.code in ids:
+            yield point
+
+
+def filter_segments(segments, ids):
+    """Keep only the segments whose two endpoints are in ids"""
+    for segment in segments:
+        if segment.origin in ids and segment.destination in ids:
+            yield segment
+
 
 class AirSpace:
-    def __init__(self):
+    # Shared on-disk cache of compiled airspaces, keyed by file contents.
+    # Enabled by setting AIRSPACE_CACHE_DIR (or assigning a ParseCache here).
+    parse_cache = ParseCache.from_environment()
+
+    def __init__(self, use_graph_core=True):
         self.NavPoints = []  # List of NavPoint objects
         self.NavSegments = []  # List of NavSegment objects
         self.NavAirports = []  # List of NavAirport objects
         self._nav_points_dict = {}  # Internal lookup by name and ID
+        self._name_index = None  # Sorted names for prefix lookups, built on demand
+        self.merge_conflicts = []  # Filled by AirSpace.merge
+        self.unresolved_procedures = []  # (airport, point name, "SID"/"STAR") not found
+        # (origin, destination, distance, "unknown"/"duplicate") lines of the seg file not loaded
+        self.skipped_segments = []
+        self.validation_report = None
+        # ALT mode (see enable_landmarks); the precomputation is tied to one graph version
+        self.landmark_count = 0
+        self.landmark_dir = None
+        self._landmarks = None
+        # Contraction Hierarchies mode (see enable_contraction)
+        self.use_contraction = False
+        self.contraction_dir = None
+        self._contraction = None
+        # Search from both ends at once (forward graph + reverse adjacency of the core)
+        self.use_bidirectional = False
+        # Cost of each segment for find_shortest_path (see costModels)
+        self.cost_model = DistanceModel()
+        # Results of find_shortest_path; None disables the cache
+        self.route_cache = RouteCache()
+        self._cached_models = set()  # Keys of the cost models (other than distance) in the cache
+        # Shortest path trees of the last origins used (see shortest_path_tree)
+        self.max_path_trees = 8
+        self._path_trees = OrderedDict()
+        self._airport_table = None  # See precompute_airport_pairs
+        # Connectivity index, kept up to date by the add_* methods (see _get_components)
+        self._components = None
+        self._components_version = None
+        # Restricted zones avoided by find_shortest_path (see add_restricted_area);
+        # the blocked segments are recomputed for each graph version
+        self._zones = {}
+        self._restrictions = None
+        # Active route kept for incremental replanning (see replan_route)
+        self._planner = None
+        self._planner_version = None
+        self._snapshot_dir = None  # Where the compiled data of this airspace lives, if any
+        # Array-backed copy of the graph used by the searches
+        self.use_graph_core = use_graph_core
+        self._version = 0  # Bumped on every change to points or segments
+        self._graph = None
+        self._graph_version = -1
+
+    def load_airspace_data(self, nav_file, seg_file, aer_file, snapshot_dir=None, verbose=True,
+                           use_cache=True):
+        """Load all airspace data from the three files.
+
+        If snapshot_dir is given, a compiled binary snapshot stored there is
+        used instead of parsing the text files, and it is rebuilt whenever
+        one of the three files changes. Otherwise the shared parse_cache is
+        consulted (if configured and use_cache is true), so only the first
+        process that sees a given set of files has to parse them. The
+        validation report is kept in self.validation_report and only printed
+        when verbose is true.
+        """
+        sources = (nav_file, seg_file, aer_file)
+        cache = self.parse_cache if use_cache and snapshot_dir is None else None
+        cache_key = None
+        snapshot = None
+        if snapshot_dir is not None:
+            snapshot = load_snapshot(snapshot_dir, sources)
+            self._snapshot_dir = snapshot_dir
+        elif cache is not None:
+            cache_key = hash_sources(sources)
+            snapshot = cache.load(sources, cache_key)
+            self._snapshot_dir = os.path.join(cache.cache_dir, cache_key)
+        if snapshot is not None:
+            self._load_from_graph(*snapshot)
+            self._validate_airspace(verbose)
+            return
 
-    def load_airspace_data(self, nav_file, seg_file, aer_file):
-        """Load all airspace data from the three files"""
         self._load_nav_points(nav_file)
+        self._build_name_index()
         self._load_segments(seg_file)
         self._load_airports(aer_file)
-        self._validate_airspace()
+        self._touch()
+        self._validate_airspace(verbose)
+
+        if snapshot_dir is not None:
+            compile_snapshot(self, snapshot_dir, sources)
+        elif cache is not None:
+            cache.store(self, sources, cache_key)
+
+    def _load_from_graph(self, graph, airports, skipped_segments=()):
+        """Rebuild the airspace from a compiled NavGraph and its airport table.
+
+        The NavPoints are lightweight views: their neighbor lists are only
+        built from the CSR arrays when somebody asks for them.
+        """
+        ids = graph.ids.tolist()
+        names = graph.names.tolist()
+        lats = graph.lat.tolist()
+        lons = graph.lon.tolist()
+
+        points = [NavPoint.view(graph, i, ids[i], names[i], lats[i], lons[i]) for i in range(len(ids))]
+        graph.points = points
+        for point in points:
+            self.NavPoints.append(point)
+            self._nav_points_dict[point.code] = point
+            self._nav_points_dict[point.name] = point
+
+        origins = np.repeat(graph.ids, np.diff(graph.offsets)).tolist()
+        dests = graph.ids[graph.targets].tolist()
+        for origin, dest, distance in zip(origins, dests, graph.weights.tolist()):
+            self.NavSegments.append(NavSegment(origin, dest, distance))
+
+        for entry in airports:
+            airport = NavAirport(entry["name"])
+            for i in entry["sids"]:
+                airport.addSid(points[i])
+            for i in entry["stars"]:
+                airport.addSTARs(points[i])
+            self.NavAirports.append(airport)
+            self.unresolved_procedures.extend(
+                (airport.name, name, kind) for name, kind in entry.get("unresolved", []))
+        self.skipped_segments.extend(tuple(entry) for entry in skipped_segments)
+
+        # The compiled graph is already the search core for this airspace
+        self._touch()
+        self._graph = graph
+        self._graph_version = self._version
+
+    def _touch(self):
+        """Mark the graph as modified so the search core gets rebuilt"""
+        self._version += 1
+        # Los datos precalculados ya no son válidos
+        self._landmarks = None
+        self._contraction = None
+        self._path_trees.clear()
+        self._airport_table = None
+
+    def _precomputed_dir(self, name):
+        """Default directory for precomputed search data, next to the snapshot or cache entry"""
+        return os.path.join(self._snapshot_dir, name) if self._snapshot_dir is not None else None
+
+    def enable_landmarks(self, count=16, directory=None):
+        """Turn on ALT mode: A* guided by count landmarks (triangle inequality bounds).
+
+        The precomputation is stored in directory (by default next to the
+        snapshot or cache entry the airspace was loaded from) and reused by
+        later loads of the same graph. Any edit of the graph invalidates it,
+        and it is recomputed on the next search.
+        """
+        self.landmark_count = count
+        self.landmark_dir = directory or self._precomputed_dir(f"landmarks-{count}")
+        self._landmarks = None
+        return self._get_landmarks()
+
+    def disable_landmarks(self):
+        self.landmark_count = 0
+        self._landmarks = None
+
+    def _get_landmarks(self):
+        """LandmarkIndex for the current graph (loaded or rebuilt if needed), or None"""
+        if not self.landmark_count:
+            return None
+        graph = self.get_graph()
+        if self._landmarks is None or self._landmarks.graph is not graph:
+            landmarks = LandmarkIndex.load(self.landmark_dir, graph) if self.landmark_dir else None
+            if landmarks is None:
+                landmarks = LandmarkIndex.build(graph, self.landmark_count)
+                if self.landmark_dir:
+                    landmarks.save(self.landmark_dir)
+            self._landmarks = landmarks
+        return self._landmarks
+
+    def enable_contraction(self, directory=None):
+        """Turn on Contraction Hierarchies: preprocess once, then answer each route
+        with a small bidirectional search. Stored and invalidated like the landmarks."""
+        self.use_contraction = True
+        self.contraction_dir = directory or self._precomputed_dir("contraction")
+        self._contraction = None
+        return self._get_contraction()
+
+    def disable_contraction(self):
+        self.use_contraction = False
+        self._contraction = None
+
+    def _get_contraction(self):
+        """ContractionHierarchy for the current graph (loaded or rebuilt if needed), or None"""
+        if not self.use_contraction:
+            return None
+        graph = self.get_graph()
+        if self._contraction is None or self._contraction.graph is not graph:
+            contraction = ContractionHierarchy.load(self.contraction_dir, graph) if self.contraction_dir else None
+            if contraction is None:
+                contraction = ContractionHierarchy.build(graph)
+                if self.contraction_dir:
+                    contraction.save(self.contraction_dir)
+            self._contraction = contraction
+        return self._contraction
+
+    def _build_name_index(self):
+        """Build the prefix index over every name key of _nav_points_dict"""
+        self._name_index = NamePrefixIndex(
+            (key, point) for key, point in self._nav_points_dict.items() if isinstance(key, str)
+        )
+        return self._name_index
+
+    def _get_name_index(self):
+        if self._name_index is None:
+            self._build_name_index()
+        return self._name_index
+
+    def find_navpoints_by_prefix(self, prefix, limit=None):
+        """NavPoints whose name starts with prefix, in alphabetical order (autocomplete)"""
+        return [point for _, point in self._get_name_index().search(prefix, limit)]
+
+    def get_graph(self):
+        """Return the array-backed NavGraph, rebuilding it if it is stale"""
+        if self._graph is None or self._graph_version != self._version:
+            self._graph = NavGraph.from_airspace(self)
+            self._graph_version = self._version
+        return self._graph
+
+    @classmethod
+    def load_regions(cls, file_triples, key="id"):
+        """Load several (nav_file, seg_file, aer_file) triples into one merged AirSpace"""
+        airspaces = []
+        for nav_file, seg_file, aer_file in file_triples:
+            airspace = cls()
+            airspace.load_airspace_data(nav_file, seg_file, aer_file)
+            airspaces.append(airspace)
+        return cls.merge(*airspaces, key=key)
+
+    @classmethod
+    def merge(cls, *airspaces, key="id"):
+        """Merge several airspaces into a new one, in time linear in their total size.
+
+        Points are joined by ID (key="id") or by name (key="name"; needed when
+        the files number their points independently, like Eur and Spain).
+        Segments are joined by (origin, destination) and airports by ICAO
+        code, with the SID/STAR lists of repeated airports combined. When the
+        same key comes with different data the first airspace wins, and the
+        difference is recorded in merged.merge_conflicts.
+        """
+        if key not in ("id", "name"):
+            raise ValueError("key debe ser 'id' o 'name'")
+        merged = cls()
+        conflicts = []
+
+        next_id = 1 + max((p.code for a in airspaces for p in a.NavPoints if isinstance(p.code, int)), default=0)
+        joined = {}  # join key -> (first source NavPoint, merged NavPoint)
+        id_maps = []  # per airspace: source ID -> merged ID
+        for airspace in airspaces:
+            id_map = {}
+            for point in airspace.NavPoints:
+                join_key = point.code if key == "id" else point.name
+                entry = joined.get(join_key)
+                if entry is None:
+                    code = point.code
+                    if code in merged._nav_points_dict:
+                        # Joining by name: the ID is already taken by another point
+                        code = next_id
+                        next_id += 1
+                    copy = NavPoint(code, point.name, point.latitude, point.longitude)
+                    merged.NavPoints.append(copy)
+                    merged._nav_points_dict[copy.code] = copy
+                    merged._nav_points_dict[copy.name] = copy
+                    joined[join_key] = (point, copy)
+                    id_map[point.code] = code
+                    continue
+
+                first, copy = entry
+                id_map[point.code] = copy.code
+                if (abs(first.latitude - point.latitude) > COORDINATE_TOLERANCE or
+                        abs(first.longitude - point.longitude) > COORDINATE_TOLERANCE):
+                    conflicts.append(MergeConflict("coordinates", join_key,
+                                                   (first.latitude, first.longitude),
+                                                   (point.latitude, point.longitude)))
+                if key == "id" and first.name != point.name:
+                    conflicts.append(MergeConflict("name", join_key, first.name, point.name))
+            id_maps.append(id_map)
+
+        segments = {}  # (origin ID, destination ID) -> distance
+        for airspace, id_map in zip(airspaces, id_maps):
+            for segment in airspace.NavSegments:
+                if segment.origin not in id_map or segment.destination not in id_map:
+                    continue
+                pair = (id_map[segment.origin], id_map[segment.destination])
+                distance = segments.get(pair)
+                if distance is None:
+                    segments[pair] = segment.distance
+                elif distance != segment.distance:
+                    conflicts.append(MergeConflict("distance", pair, distance, segment.distance))
+        merged._build_name_index()
+        merged.add_segments_bulk((origin, dest, distance) for (origin, dest), distance in segments.items())
+
+        airports = {}  # ICAO -> (SID IDs, STAR IDs), keeping the order of appearance
+        for airspace, id_map in zip(airspaces, id_maps):
+            for airport in airspace.NavAirports:
+                sids, stars = airports.setdefault(airport.name, ({}, {}))
+                sids.update((id_map[p.code], None) for p in airport.SIDs if p.code in id_map)
+                stars.update((id_map[p.code], None) for p in airport.STARs if p.code in id_map)
+        for name, (sids, stars) in airports.items():
+            airport = NavAirport(name)
+            for point in merged._resolve_names(sids):
+                airport.addSid(point)
+            for point in merged._resolve_names(stars):
+                airport.addSTARs(point)
+            merged.NavAirports.append(airport)
+
+        merged.merge_conflicts = conflicts
+        merged._touch()
+        return merged
 
     def _load_nav_points(self, nav_file):
-        """Load navigation points from file"""
-        with open(nav_file, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) >= 4:
-                    point_id = int(parts[0])
-                    name = parts[1]
-                    lat = float(parts[2])
-                    lon = float(parts[3])
-                    nav_point = NavPoint(point_id, name, lat, lon)
-                    self.NavPoints.append(nav_point)
-                    self._nav_points_dict[point_id] = nav_point
-                    self._nav_points_dict[name] = nav_point  # Also index by name
+        """Load navigation points from file (vectorized, with a slow fallback)"""
+        try:
+            ids, names, lats, lons = parse_nav_file(nav_file)
+        except ValueError:
+            # Fichero con líneas irregulares: usar el parser línea a línea
+            self._load_nav_points_slow(nav_file)
+            return
+
+        for point_id, name, lat, lon in zip(ids.tolist(), names.tolist(), lats.tolist(), lons.tolist()):
+            nav_point = NavPoint(point_id, name, lat, lon)
+            self.NavPoints.append(nav_point)
+            self._nav_points_dict[point_id] = nav_point
+            self._nav_points_dict[name] = nav_point  # Also index by name
+
+    def _load_nav_points_slow(self, nav_file):
+        """Load navigation points from file, one line at a time"""
+        for nav_point in iter_navpoints(nav_file):
+            self.NavPoints.append(nav_point)
+            self._nav_points_dict[nav_point.code] = nav_point
+            self._nav_points_dict[nav_point.name] = nav_point  # Also index by name
 
     def _load_segments(self, seg_file):
-        with open(seg_file, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) >= 3:
-                    origin_id = int(parts[0])
-                    dest_id = int(parts[1])
-                    distance = float(parts[2])
-
-                    if origin_id in self._nav_points_dict and dest_id in self._nav_points_dict:
-                        segment = NavSegment(origin_id, dest_id, distance)
-                        self.NavSegments.append(segment)
-
-                        origin_point = self._nav_points_dict[origin_id]
-                        dest_point = self._nav_points_dict[dest_id]
-                        # Cambiar esta línea:
-                        origin_point.add_neighbor((dest_point, distance))
-                        # Asegurarse que add_neighbor recibe una tupla (NavPoint, distancia)
+        """Load segments from file (vectorized, with a slow fallback)"""
+        try:
+            origins, dests, distances = parse_seg_file(seg_file)
+        except ValueError:
+            # Fichero con líneas irregulares: usar el parser línea a línea
+            self._load_segments_slow(seg_file)
+            return
+
+        self._add_file_segments(origins, dests, distances)
+
+    def _load_segments_slow(self, seg_file):
+        segments = list(iter_segments(seg_file))
+        self._add_file_segments(np.array([s.origin for s in segments], dtype=np.int64),
+                                np.array([s.destination for s in segments], dtype=np.int64),
+                                np.array([s.distance for s in segments], dtype=np.float64))
+
+    def _add_file_segments(self, origins, dests, distances):
+        """Add the segments read from a seg file in one go.
+
+        The lines that are not loaded go to self.skipped_segments for the
+        validation report: those with an unknown endpoint, and those whose
+        (origin, destination) appears again later in the file (the last one
+        wins, as in add_segments_bulk).
+        """
+        point_ids = np.fromiter((p.code for p in self.NavPoints if isinstance(p.code, int)), dtype=np.int64)
+        known = np.isin(origins, point_ids) & np.isin(dests, point_ids)
+        lines = np.arange(len(origins))
+        _, group = np.unique(np.stack((origins, dests), axis=1), axis=0, return_inverse=True)
+        group = group.reshape(-1)
+        last = np.full(len(origins), -1)
+        np.maximum.at(last, group, lines)
+        repeated = known & (lines != last[group])
+
+        for mask, reason in ((~known, "unknown"), (repeated, "duplicate")):
+            self.skipped_segments.extend(
+                (o, d, w, reason) for o, d, w in zip(origins[mask].tolist(), dests[mask].tolist(),
+                                                     distances[mask].tolist()))
+        kept = known & ~repeated
+        self.add_segments_bulk(zip(origins[kept].tolist(), dests[kept].tolist(), distances[kept].tolist()))
 
     def _load_airports(self, aer_file):
         """Load airport data with SIDs and STARs"""
-        current_airport = None
+        self._add_airports(iter_airports(aer_file))
 
-        with open(aer_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
+    def _add_airports(self, airports):
+        """Add (ICAO code, SID names, STAR names) entries, resolving the names to NavPoints"""
+        for name, sid_names, star_names in airports:
+            airport = NavAirport(name)
+            for point_name in sid_names:
+                point = self._resolve_name(point_name)
+                if point:
+                    airport.addSid(point)
+                else:
+                    self.unresolved_procedures.append((name, point_name, "SID"))
+            for point_name in star_names:
+                point = self._resolve_name(point_name)
+                if point:
+                    airport.addSTARs(point)
+                else:
+                    self.unresolved_procedures.append((name, point_name, "STAR"))
+            self.NavAirports.append(airport)
 
-                # Detect airport lines (ICAO codes are 4 uppercase letters)
-                if len(line) == 4 and line.isupper():
-                    current_airport = NavAirport(line)
-                    self.NavAirports.append(current_airport)
-                    continue
+    def _resolve_name(self, point_name):
+        # Find the nav point by name or ID
+        nav_point = self._nav_points_dict.get(point_name)
+        if nav_point is None and isinstance(point_name, str):
+            # Try to find by partial name match (some names might have suffixes),
+            # taking the first match in alphabetical order
+            nav_point = self._get_name_index().first(point_name)
+        return nav_point
 
-                if current_airport is None:
-                    continue  # Skip lines before first airport
-
-                # Process SIDs and STARs
-                if '.' in line:  # SID or STAR indicator
-                    point_name = line.split('.')[0]
-
-                    # Find the nav point by name or ID
-                    nav_point = self._nav_points_dict.get(point_name)
-                    if nav_point is None:
-                        # Try to find by partial name match (some names might have suffixes)
-                        for name, point in self._nav_points_dict.items():
-                            if isinstance(name, str) and name.startswith(point_name):
-                                nav_point = point
-                                break
-
-                    if nav_point:
-                        if line.endswith('.D'):  # Departure (SID)
-                            current_airport.addSid(nav_point)
-                        elif line.endswith('.A'):  # Arrival (STAR)
-                            current_airport.addSTARs(nav_point)
-
-    def _validate_airspace(self):
-        """Validate the loaded airspace data"""
-        # Check all segments reference existing points
-        for segment in self.NavSegments:
-            if segment.origin not in self._nav_points_dict:
-                print(f"Warning: Segment references unknown origin ID {segment.origin}")
-            if segment.destination not in self._nav_points_dict:
-                print(f"Warning: Segment references unknown destination ID {segment.destination}")
-
-        # Check all airports have at least one SID
-        for airport in self.NavAirports:
-            if not airport.SIDs:
-                print(f"Warning: Airport {airport.name} has no SIDs")
-            if not airport.STARs:
-                print(f"Warning: Airport {airport.name} has no STARs")
+    def _resolve_names(self, names):
+        for point_name in names:
+            nav_point = self._resolve_name(point_name)
+            if nav_point:
+                yield nav_point
+
+    def build_from(self, points, segments=(), airports=()):
+        """Build the airspace from iterables of NavPoints, NavSegments and airports.
+
+        Meant to be fed by the iter_* generators, optionally filtered, e.g.:
+
+            points = filter_bbox(iter_navpoints(nav_file), 40.0, 43.0, 0.0, 4.0)
+            airspace = AirSpace().build_from(points, iter_segments(seg_file), iter_airports(aer_file))
+
+        Segments with an endpoint that is not in the airspace are dropped
+        while streaming, so only the kept part of the files is held in memory.
+        """
+        for point in points:
+            self.NavPoints.append(point)
+            self._nav_points_dict[point.code] = point
+            self._nav_points_dict[point.name] = point
+        self._build_name_index()
+        self.add_segments_bulk((s.origin, s.destination, s.distance) for s in segments)
+        self._add_airports(airports)
+        self._touch()
+        return self
+
+    def validate(self):
+        """Run every consistency check in O(N + E) and return a ValidationReport"""
+        return validate_airspace(self)
+
+    def _validate_airspace(self, verbose=True):
+        """Validate the loaded airspace data, keeping the report in self.validation_report"""
+        self.validation_report = self.validate()
+        if verbose:
+            self.validation_report.print_report()
+        return self.validation_report
 
     def get_airport_by_name(self, name):
         """Get airport by its ICAO code"""
@@ -119,12 +606,212 @@ class AirSpace:
     def get_neighbors(self, navpoint_id):
         """Obtiene los vecinos de un punto de navegación"""
         navpoint = self.get_navpoint_by_name_or_id(navpoint_id)
-        if navpoint:
+        if not navpoint:
+            return []
+        if not self.use_graph_core:
             return navpoint.neighbors
-        return []
 
-    def find_shortest_path(self, origin_name, destination_name):
-        """Implementación mejorada del algoritmo A*"""
+        graph = self.get_graph()
+        targets, weights = graph.neighbors_of(graph.index[navpoint.code])
+        return [(graph.points[t], w) for t, w in zip(targets.tolist(), weights.tolist())]
+
+    def get_incoming(self, navpoint_id):
+        """Puntos con un segmento hacia navpoint_id ("quién apunta a X"), en O(grado de entrada)"""
+        navpoint = self.get_navpoint_by_name_or_id(navpoint_id)
+        if not navpoint:
+            return []
+        if not self.use_graph_core:
+            return [(p, d) for p in self.NavPoints for n, d in p.neighbors if n is navpoint]
+
+        reverse = self.get_graph().reversed()
+        origins, weights = reverse.neighbors_of(reverse.index[navpoint.code])
+        return [(reverse.points[o], w) for o, w in zip(origins.tolist(), weights.tolist())]
+
+    def reachable_from(self, identifier):
+        """Devuelve el conjunto de NavPoints alcanzables desde un punto (BFS)"""
+        start = self.get_navpoint_by_name_or_id(identifier)
+        if not start:
+            return set()
+        if not self.use_graph_core:
+            visited = {start}
+            queue = [start]
+            while queue:
+                current = queue.pop()
+                for neighbor, _ in current.get_neighbors():
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        queue.append(neighbor)
+            return visited
+
+        return set(self._get_components().reachable(start.code))
+
+    def _endpoint_group(self, item, procedures):
+        """Índices del grafo de un origen/destino: un NavPoint, un NavAirport (sus
+        SIDs o STARs, según procedures) o su nombre/ID"""
+        if not isinstance(item, (NavPoint, NavAirport)):
+            found = self.get_navpoint_by_name_or_id(item) or self.get_airport_by_name(item)
+            if found is None:
+                raise ValueError(f"Punto o aeropuerto desconocido: {item!r}")
+            item = found
+        points = getattr(item, procedures) if isinstance(item, NavAirport) else [item]
+        index = self.get_graph().index
+        return [index[p.code] for p in points if p.code in index]
+
+    def distance_matrix(self, sources, targets=None, workers=None, predecessors=False):
+        """Matriz de distancias mínimas (km) entre sources y targets (por defecto, los mismos).
+
+        Cada elemento puede ser un NavPoint, un NavAirport o un nombre/ID. Un
+        aeropuerto sale por cualquiera de sus SIDs y llega por cualquiera de
+        sus STARs. Se hace una búsqueda multi-destino por origen, repartidas
+        entre workers procesos, sin pasar por las zonas restringidas. Devuelve (matriz NumPy con inf donde no hay
+        camino, predecesores o None); predecesores.path(i, j) da los NavPoints
+        del camino del origen i al destino j.
+        """
+        if targets is None:
+            targets = sources
+        graph = self.get_graph()
+        source_groups = [self._endpoint_group(item, "SIDs") for item in sources]
+        target_groups = [self._endpoint_group(item, "STARs") for item in targets]
+        if any(not group for group in target_groups):
+            raise ValueError("Hay destinos sin ningún punto de llegada (aeropuerto sin STARs)")
+        return distance_matrix(graph, source_groups, target_groups, workers, predecessors,
+                               self._distance_weights())
+
+    def route_weights(self, model=None):
+        """(weights per segment of the graph, heuristic scale) that find_shortest_path
+        searches with: the cost model (default self.cost_model) with the segments of the
+        restricted zones set to inf"""
+        weights, scale = self.get_graph().cost_weights(model if model is not None else self.cost_model)
+        restrictions = self._get_restrictions()
+        if restrictions is not None:
+            weights = restrictions.weights(weights)
+        return weights, scale
+
+    def _distance_weights(self):
+        """Distances (km) per segment of the graph with the restricted zones set to inf,
+        or None if there are no zones (then the graph's own weights are used)"""
+        restrictions = self._get_restrictions()
+        return restrictions.weights(self.get_graph().lists()[2]) if restrictions is not None else None
+
+    def find_nearest(self, lat, lon, count=1):
+        """The count NavPoints closest to (lat, lon) as (NavPoint, km), closest first"""
+        graph = self.get_graph()
+        if graph.num_nodes == 0:
+            return []
+        distances = haversine_km(lat, lon, graph.lat, graph.lon)
+        count = min(count, graph.num_nodes)
+        nearest = np.argpartition(distances, count - 1)[:count]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [(graph.points[i], float(distances[i])) for i in nearest.tolist()]
+
+    def solve_batch(self, pairs, workers=None, model=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Solve many (origin, destination) pairs in worker processes.
+
+        Yields (origin, destination, cost, path_ids) as each chunk finishes
+        (not in input order), with the origin and destination as given and
+        path_ids the IDs of the points of the route; ([] and None if there
+        is none). The graph arrays are published once in shared memory, so
+        no NavPoint is pickled. Uses the cost model and restricted zones of
+        find_shortest_path; pairs that are not connected are answered
+        without searching.
+        """
+        graph = self.get_graph()
+        components = self._get_components()
+        weights, scale = self.route_weights(model)
+
+        queries = []
+        originals = []
+        for origin, destination in pairs:
+            start = origin if isinstance(origin, NavPoint) else self.get_navpoint_by_name_or_id(origin)
+            goal = destination if isinstance(destination, NavPoint) else self.get_navpoint_by_name_or_id(destination)
+            if not start or not goal or not components.connected(start.code, goal.code):
+                yield origin, destination, None, []
+                continue
+            queries.append((len(originals), graph.index[start.code], graph.index[goal.code]))
+            originals.append((origin, destination))
+
+        for k, cost, path_ids in solve_batch(graph, queries, weights, scale, workers, chunk_size):
+            origin, destination = originals[k]
+            yield origin, destination, cost, path_ids
+
+    def route_airports(self, dep_icao, arr_icao):
+        """Ruta más corta entre dos aeropuertos: de cualquiera de las SIDs de salida a
+        cualquiera de las STARs de llegada, con una sola búsqueda multi-origen.
+
+        Devuelve (NavPoints, coste) o ([], None). Si hay una tabla de
+        precompute_airport_pairs al día se responde desde ella.
+        """
+        departure = self.get_airport_by_name(dep_icao)
+        arrival = self.get_airport_by_name(arr_icao)
+        if not departure or not arrival:
+            print("Error: Aeropuerto de salida o llegada no encontrado")
+            return [], None
+
+        graph = self.get_graph()
+        table = self._airport_table
+        if table is not None and (dep_icao, arr_icao) in table:
+            return table.route(dep_icao, arr_icao)
+
+        sources = [graph.index[p.code] for p in departure.SIDs if p.code in graph.index]
+        goals = [graph.index[p.code] for p in arrival.STARs if p.code in graph.index]
+        if not sources or not goals:
+            print(f"Error: {dep_icao} no tiene SIDs o {arr_icao} no tiene STARs")
+            return [], None
+        components = self._get_components()
+        if not any(components.connected(sid.code, star.code)
+                   for sid in departure.SIDs for star in arrival.STARs):
+            print("Error: Origen y destino no están conectados")
+            return [], None
+
+        indices, cost = graph.multi_astar(sources, goals, graph.heuristic_to_any(goals),
+                                          weights=self._distance_weights())
+        if not indices:
+            print("Error: Origen y destino no están conectados")
+            return [], None
+        return [graph.points[i] for i in indices], cost
+
+    def precompute_airport_pairs(self, workers=None):
+        """Calcula la tabla de rutas entre todos los pares de aeropuertos (AirportPairTable).
+
+        route_airports la usa mientras el grafo no cambie; cualquier edición
+        o zona restringida nueva la descarta.
+        """
+        graph = self.get_graph()
+        departures = [a for a in self.NavAirports if any(p.code in graph.index for p in a.SIDs)]
+        arrivals = [a for a in self.NavAirports if any(p.code in graph.index for p in a.STARs)]
+        matrix, predecessors = self.distance_matrix(departures, arrivals, workers, predecessors=True)
+        self._airport_table = AirportPairTable(graph, [a.name for a in departures],
+                                               [a.name for a in arrivals], matrix, predecessors)
+        return self._airport_table
+
+    def shortest_path_tree(self, origin):
+        """ShortestPathTree desde un punto (nombre, ID o NavPoint), o None si no existe.
+
+        Se guardan los árboles de los últimos orígenes usados: mientras el
+        grafo y las zonas restringidas no cambien, cada destino desde el mismo
+        origen es solo recorrer el array de predecesores (tree.route(destino)).
+        """
+        point = origin if isinstance(origin, NavPoint) else self.get_navpoint_by_name_or_id(origin)
+        if point is None:
+            return None
+        graph = self.get_graph()
+        if point.code not in graph.index:
+            return None
+        tree = self._path_trees.get(point.code)
+        if tree is None:
+            tree = graph.shortest_path_tree(graph.index[point.code], self._distance_weights())
+            self._path_trees[point.code] = tree
+            while len(self._path_trees) > self.max_path_trees:
+                self._path_trees.popitem(last=False)
+        self._path_trees.move_to_end(point.code)
+        return tree
+
+    def find_shortest_path(self, origin_name, destination_name, model=None):
+        """Implementación mejorada del algoritmo A*.
+
+        model es un CostModel de costModels (por defecto self.cost_model, la
+        distancia); el coste devuelto está en sus unidades.
+        """
         start = self.get_navpoint_by_name_or_id(origin_name)
         goal = self.get_navpoint_by_name_or_id(destination_name)
 
@@ -132,10 +819,200 @@ class AirSpace:
             print("Error: Nodo origen o destino no encontrado")
             return [], None
 
+        if model is None:
+            model = self.cost_model
+        cache = self._get_route_cache()
+        if cache is not None:
+            cached = cache.get(start, goal, model.key)
+            if cached is not None:
+                return cached
+            path, cost = self._search_shortest_path(start, goal, model)
+            cache.put(start, goal, model.key, path, cost)
+            if model.key != DistanceModel.name:
+                self._cached_models.add(model.key)
+            return path, cost
+        return self._search_shortest_path(start, goal, model)
+
+    def _update_route_cache(self, evict):
+        """Called right after an edit's _touch(): evict(cache) drops only the routes
+        the edit can change, so the rest of the cache stays valid for the new version"""
+        cache = self.route_cache
+        if cache is None or cache.version != self._version - 1:
+            return  # Ya estaba desfasada: se vaciará en la próxima consulta
+        evict(cache)
+        cache.version = self._version
+
+    def _update_components(self, update):
+        """Called right after an edit's _touch(): apply update(index) so the component
+        index stays valid, or pass None to let it be rebuilt on the next query"""
+        if self._components is None or self._components_version != self._version - 1:
+            return
+        if update is None:
+            self._components = None
+            return
+        update(self._components)
+        self._components_version = self._version
+
+    def _update_planner(self, update):
+        """Called right after an edit's _touch(): pass the edit to the active route's
+        IncrementalPlanner with update(planner) so it is repaired, not searched again,
+        or pass None to let it be rebuilt on the next replan_route"""
+        if self._planner is None or self._planner_version != self._version - 1:
+            return
+        if update is None:
+            self._planner = None
+            return
+        update(self._planner)
+        self._planner_version = self._version
+
+    def replan_route(self, origin, destination):
+        """Shortest route (NavPoints, cost) that stays up to date as the graph is edited.
+
+        The search state of the last pair asked for is kept (LPA*): the first
+        call costs a normal search, and after closing, adding or changing
+        segments the next call only repairs the part of the search they affect.
+        Restricted zones are avoided; while there are any, adding segments
+        starts a new search (they might cross a zone).
+        """
+        start = origin if isinstance(origin, NavPoint) else self.get_navpoint_by_name_or_id(origin)
+        goal = destination if isinstance(destination, NavPoint) else self.get_navpoint_by_name_or_id(destination)
+        if not start or not goal or self._nav_points_dict.get(start.code) is not start \
+                or self._nav_points_dict.get(goal.code) is not goal:
+            print("Error: Nodo origen o destino no encontrado")
+            return [], None
+
+        planner = self._planner
+        if (planner is None or self._planner_version != self._version
+                or planner.points[planner.start] is not start or planner.points[planner.goal] is not goal):
+            graph = self.get_graph()
+            planner = IncrementalPlanner(graph, graph.index[start.code], graph.index[goal.code],
+                                         self._distance_weights())
+            self._planner = planner
+            self._planner_version = self._version
+
+        path, cost = planner.route()
+        if cost is None:
+            print("Error: Origen y destino no están conectados")
+        else:
+            print(f"Ruta replanificada con costo {cost:.2f} km ({planner.last_expanded} nodos expandidos)")
+        return path, cost
+
+    @property
+    def restricted_areas(self):
+        """Names of the restricted zones currently avoided"""
+        return list(self._zones)
+
+    def add_restricted_area(self, name, vertices):
+        """Avoid a zone given as a polygon of (lat, lon) vertices in find_shortest_path.
+
+        Only the segments near the zone (bbox prefilter on a grid index) are
+        tested, and only the cached routes that used a newly blocked segment
+        are dropped. Returns the number of segments blocked by the zone.
+        """
+        zone = RestrictedZone(name, vertices)
+        if name in self._zones:
+            self.remove_restricted_area(name)
+        restrictions = self._get_restrictions()  # Con las zonas que ya había
+        self._zones[name] = zone
+        if restrictions is None:
+            restrictions = self._get_restrictions()
+            newly = restrictions.blocked[name]
+        else:
+            newly = restrictions.add(zone)
+        self._forget_routing_state()
+        cache = self._get_route_cache()
+        if cache is not None and len(newly):
+            cache.evict_edges(self._edge_pairs(newly))
+        return len(restrictions.blocked[name])
+
+    def remove_restricted_area(self, name):
+        """Stop avoiding a zone; the routes it may have lengthened are dropped from the cache"""
+        if name not in self._zones:
+            raise ValueError(f"Zona restringida '{name}' no encontrada")
+        freed = self._get_restrictions().remove(name)
+        del self._zones[name]
+        if not self._zones:
+            self._restrictions = None
+        self._forget_routing_state()
+        cache = self._get_route_cache()
+        if cache is not None and len(freed):
+            # Volver a poder usar un segmento es como añadirlo
+            graph = self.get_graph()
+            segments = [(graph.points[o], graph.points[t], w) for (o, t), w in
+                        zip(self._edge_indices(freed), graph.weights[freed].tolist())]
+            cache.evict_models(self._cached_models)
+            cache.evict_improvable(segments, graph.heuristic_scale)
+
+    def _forget_routing_state(self):
+        """Drop the precomputed routes that ignore a change of restricted zones"""
+        self._path_trees.clear()
+        self._airport_table = None
+        self._planner = None
+
+    def _edge_indices(self, edges):
+        """(índice origen, índice destino) de segmentos dados por su posición en el grafo"""
+        graph = self.get_graph()
+        origins = np.repeat(np.arange(graph.num_nodes), np.diff(graph.offsets))[edges]
+        return list(zip(origins.tolist(), graph.targets[edges].tolist()))
+
+    def _edge_pairs(self, edges):
+        """(código origen, código destino) de segmentos dados por su posición en el grafo"""
+        points = self.get_graph().points
+        return [(points[o].code, points[t].code) for o, t in self._edge_indices(edges)]
+
+    def _get_restrictions(self):
+        """RestrictedAreas of the current graph with every zone, or None if there are none"""
+        if not self._zones:
+            return None
+        graph = self.get_graph()
+        if self._restrictions is None or self._restrictions.graph is not graph:
+            self._restrictions = RestrictedAreas(graph)
+            for zone in self._zones.values():
+                self._restrictions.add(zone)
+        return self._restrictions
+
+    def _get_components(self):
+        """ComponentIndex (weak/strong components) of the current graph"""
+        if self._components is None or self._components_version != self._version:
+            self._components = ComponentIndex.build(self.get_graph())
+            self._components_version = self._version
+        return self._components
+
+    def is_reachable(self, origin, destination):
+        """True if there is a route from origin to destination (names or IDs), in O(1)"""
+        start = self.get_navpoint_by_name_or_id(origin)
+        goal = self.get_navpoint_by_name_or_id(destination)
+        return bool(start and goal) and self._get_components().connected(start.code, goal.code)
+
+    def main_component(self):
+        """NavPoints of the largest weakly connected component"""
+        components = self._get_components().weak_components()
+        return components[0] if components else []
+
+    def _get_route_cache(self):
+        """The route cache, emptied first if the graph changed behind its back"""
+        cache = self.route_cache
+        if cache is not None and cache.version != self._version:
+            cache.clear()
+            cache.version = self._version
+        return cache
+
+    def _search_shortest_path(self, start, goal, model):
+        """Búsqueda sin caché: A* (o el motor activo) entre dos NavPoints"""
+        # Si no hay camino se sabe sin buscar, con el índice de componentes
+        if not self._get_components().connected(start.code, goal.code):
+            print("Error: Origen y destino no están conectados")
+            return [], None
+
         # Depuración
         print(f"\nIniciando búsqueda de ruta desde {start.name} a {goal.name}")
         print(f"Vecinos de origen: {[(n.name, d) for n, d in start.get_neighbors()]}")
 
+        if model.key != DistanceModel.name:
+            return self._find_shortest_path_model(start, goal, model)
+        if self.use_graph_core or self._zones:
+            return self._find_shortest_path_core(start, goal)
+
         frontier = []
         heappush(frontier, (0, start))
         came_from = {start: None}
@@ -158,19 +1035,9 @@ class AirSpace:
                     came_from[next_node] = current
 
         if not path_found:
-            # Verificar si los nodos están en componentes conexas diferentes
-            reachable_from_start = set()
-            stack = [start]
-            while stack:
-                node = stack.pop()
-                if node not in reachable_from_start:
-                    reachable_from_start.add(node)
-                    for neighbor, _ in node.get_neighbors():
-                        stack.append(neighbor)
-
-            if goal not in reachable_from_start:
-                print("Error: Origen y destino no están conectados")
-                return [], None
+            # La conectividad ya se comprobó antes de buscar con el índice de componentes
+            print("Error: Origen y destino no están conectados")
+            return [], None
 
         path = self._reconstruct_path(came_from, start, goal)
         if not path:
@@ -181,9 +1048,103 @@ class AirSpace:
         return path, cost_so_far[goal]
 
 
+    def _find_shortest_path_core(self, start, goal):
+        """A* (o Contraction Hierarchies si está activo) sobre los arrays CSR del NavGraph"""
+        graph = self.get_graph()
+        start_index = graph.index[start.code]
+        goal_index = graph.index[goal.code]
+
+        restrictions = self._get_restrictions()
+        contraction = self._get_contraction() if restrictions is None else None
+        if restrictions is not None:
+            # Con zonas restringidas: A* con los segmentos bloqueados a inf (ALT sigue valiendo)
+            indices, cost = graph.astar(start_index, goal_index, self._heuristic_to(goal_index),
+                                        weights=self._distance_weights())
+        elif contraction is not None:
+            indices, cost = contraction.query(start_index, goal_index)
+        elif self.use_bidirectional:
+            indices, cost = graph.bidirectional(start_index, goal_index,
+                                                graph.bidirectional_potential(start_index, goal_index))
+        else:
+            indices, cost = graph.astar(start_index, goal_index, self._heuristic_to(goal_index))
+
+        if not indices:
+            # A* ha recorrido todo lo alcanzable desde el origen sin llegar al destino
+            print("Error: Origen y destino no están conectados")
+            return [], None
+
+        print(f"Ruta encontrada con costo {cost:.2f} km")
+        return [graph.points[i] for i in indices], cost
+
+    def _find_shortest_path_model(self, start, goal, model):
+        """A* con los pesos de otro modelo de coste, calculados una vez por grafo y modelo"""
+        graph = self.get_graph()
+        weights, scale = graph.cost_weights(model)
+        restrictions = self._get_restrictions()
+        if restrictions is not None:
+            weights = restrictions.weights(weights)
+        goal_index = graph.index[goal.code]
+        indices, cost = graph.astar(graph.index[start.code], goal_index,
+                                    graph.heuristic_to(goal_index, scale), weights=weights)
+        if not indices:
+            # Conectados, pero solo por segmentos que el modelo no deja usar
+            print("Error: Origen y destino no están conectados")
+            return [], None
+
+        print(f"Ruta encontrada con costo {cost:.2f} {model.units}")
+        return [graph.points[i] for i in indices], cost
+
+    def _heuristic_to(self, goal_index):
+        """Cota inferior en km hasta goal para todos los nodos: ALT si está activo, si no la ortodrómica"""
+        landmarks = self._get_landmarks()
+        return landmarks.heuristic_to(goal_index) if landmarks else self.get_graph().heuristic_to(goal_index)
+
+    def k_shortest_paths(self, origin_name, destination_name, k=3, method="yen", **options):
+        """Hasta k rutas alternativas como lista de (NavPoints, coste), de menor a mayor coste.
+
+        method="yen" da exactamente los k caminos simples más cortos.
+        method="penalty" es más rápido para k grande y da rutas más
+        distintas entre sí, pero no necesariamente las más cortas (ver
+        kShortestPaths.penalty_alternatives para sus opciones). El resultado
+        se guarda en la caché de rutas. Las rutas no pasan por las zonas
+        restringidas.
+        """
+        if method not in ("yen", "penalty"):
+            raise ValueError(f"Unknown k-shortest method: {method}")
+        start = self.get_navpoint_by_name_or_id(origin_name)
+        goal = self.get_navpoint_by_name_or_id(destination_name)
+        if not start or not goal:
+            print("Error: Nodo origen o destino no encontrado")
+            return []
+
+        model = (method, k) + tuple(sorted(options.items()))
+        cache = self._get_route_cache()
+        if cache is not None:
+            routes = cache.get_routes(start, goal, model)
+            if routes is not None:
+                return routes
+
+        graph = self.get_graph()
+        start_index = graph.index[start.code]
+        goal_index = graph.index[goal.code]
+        heuristic = self._heuristic_to(goal_index)
+        weights = self._distance_weights()
+        if method == "yen":
+            found = yen_k_shortest(graph, start_index, goal_index, k, heuristic, weights=weights, **options)
+        else:
+            found = penalty_alternatives(graph, start_index, goal_index, k, heuristic, weights=weights, **options)
+        routes = [([graph.points[i] for i in path], cost) for path, cost in found]
+
+        if cache is not None:
+            # Con menos de k rutas cualquier segmento nuevo podría añadir otra
+            bound = routes[-1][1] if len(routes) == k and method == "yen" else float("inf")
+            cache.put_routes(start, goal, model, routes, bound)
+        return routes
+
     def _heuristic(self, a, b):
-        """Distancia euclidiana entre dos puntos"""
-        return ((a.latitude - b.latitude) ** 2 + (a.longitude - b.longitude) ** 2) ** 0.5
+        """Cota inferior (km) de la distancia entre dos puntos: ortodrómica escalada"""
+        return float(haversine_km(a.latitude, a.longitude, b.latitude, b.longitude)) * \
+            self.get_graph().heuristic_scale
 
     def plot_airspace(self):
         """Genera un gráfico del espacio aéreo"""
@@ -241,23 +1202,94 @@ class AirSpace:
         # También indexar por el código de texto si es diferente del nombre
         if code != name:
             self._nav_points_dict[code] = p
+        if self._name_index is not None:
+            self._name_index.add(name, p)
+            if code != name and isinstance(code, str):
+                self._name_index.add(code, p)
+        self._touch()
+        self._update_route_cache(lambda cache: None)  # Un punto aislado no cambia ninguna ruta
+        self._update_components(lambda components: components.add_point(p))
+        self._update_planner(lambda planner: planner.add_point(p))
 
-    def add_segment(self, origin_code, dest_code, distance):
-        origin = self.get_navpoint_by_name_or_id(origin_code)
-        dest = self.get_navpoint_by_name_or_id(dest_code)
-        if origin and dest:
-            origin.add_neighbor((dest, distance))  # Asegurar que es tupla
-            dest.add_neighbor((origin, distance))  # Conexión bidireccional
-            # Usar los IDs numéricos para el segmento
-            self.NavSegments.append(NavSegment(origin.code, dest.code, distance))
+    def add_segment(self, origin_code, dest_code, distance, bidirectional=True):
+        segments = [(origin_code, dest_code, distance)]
+        if bidirectional:
+            segments.append((dest_code, origin_code, distance))  # Conexión bidireccional
+        self.add_segments_bulk(segments)
+
+    def add_segments_bulk(self, segments):
+        """Add many directed segments given as (origin, destination, distance).
+
+        Origins and destinations can be IDs or names. Each origin's neighbor
+        list is rebuilt only once, and a new segment between an existing pair
+        replaces the old one (the last one in the iterable wins). Segments
+        with unknown endpoints are skipped. Returns the number of segments
+        added or updated.
+        """
+        # origin NavPoint -> {destination NavPoint: distance}
+        pending = {}
+        for origin_code, dest_code, distance in segments:
+            origin = self._nav_points_dict.get(origin_code)
+            dest = self._nav_points_dict.get(dest_code)
+            if origin is None or dest is None:
+                continue
+            pending.setdefault(origin, {})[dest] = distance
+
+        replaced = set()
+        for origin, new_neighbors in pending.items():
+            kept = []
+            for neighbor, distance in origin.neighbors:
+                if neighbor in new_neighbors:
+                    replaced.add((origin.code, neighbor.code))
+                else:
+                    kept.append((neighbor, distance))
+            kept.extend(new_neighbors.items())
+            origin.neighbors = kept
+
+        # Usar los IDs numéricos para los segmentos
+        if replaced:
+            self.NavSegments = [s for s in self.NavSegments if (s.origin, s.destination) not in replaced]
+        count = 0
+        for origin, new_neighbors in pending.items():
+            for dest, distance in new_neighbors.items():
+                self.NavSegments.append(NavSegment(origin.code, dest.code, distance))
+                count += 1
+
+        if count:
+            self._touch()
+
+            def evict(cache):
+                # Las rutas que usaban un segmento reemplazado y las que uno nuevo puede acortar
+                cache.evict_edges([(o.code, d.code) for o, new in pending.items() for d in new])
+                # La cota de evict_improvable está en km: las de otros modelos se borran
+                cache.evict_models(self._cached_models)
+                if len(cache):
+                    added = [(o, d, w) for o, new in pending.items() for d, w in new.items()]
+                    cache.evict_improvable(added, self.get_graph().heuristic_scale)
+            self._update_route_cache(evict)
+
+            def connect(components):
+                for origin, new_neighbors in pending.items():
+                    for dest in new_neighbors:
+                        components.add_edge(origin.code, dest.code)
+            self._update_components(connect)
+
+            def repair(planner):
+                for origin, new_neighbors in pending.items():
+                    for dest, distance in new_neighbors.items():
+                        planner.update_edge(origin.code, dest.code, distance)
+            # Con zonas restringidas un segmento nuevo puede cruzar alguna: se busca de nuevo
+            self._update_planner(repair if not self._zones else None)
+        return count
 
     def remove_navpoint(self, code):
         point = self.get_navpoint_by_name_or_id(code)
         if not point:
             raise ValueError("Nodo no encontrado")
 
-        # Eliminar conexiones desde otros nodos
-        for other in self.NavPoints:
+        # Eliminar conexiones desde otros nodos: solo los que apuntan a él (índice inverso)
+        others = {p for p, _ in self.get_incoming(point.code)} if self.use_graph_core else self.NavPoints
+        for other in others:
             other.neighbors = [(n, d) for n, d in other.neighbors if n != point]
 
         # Eliminar segmentos relacionados (usar el ID real del punto)
@@ -269,9 +1301,15 @@ class AirSpace:
             del self._nav_points_dict[point.code]
         if point.name in self._nav_points_dict:
             del self._nav_points_dict[point.name]
+        if self._name_index is not None:
+            self._name_index.remove(point.name)
 
         # Eliminar de la lista
         self.NavPoints.remove(point)
+        self._touch()
+        self._update_route_cache(lambda cache: cache.evict_point(point.code))
+        self._update_components(None)
+        self._update_planner(lambda planner: planner.remove_point(point.code))
 
 
     def remove_segment(self, origin_code, dest_code):
@@ -287,6 +1325,15 @@ class AirSpace:
                 (s.origin == origin_code and s.destination == dest_code) or
                 (s.origin == dest_code and s.destination == origin_code)
         )]
+        self._touch()
+        self._update_route_cache(
+            lambda cache: cache.evict_edges([(origin.code, dest.code), (dest.code, origin.code)]))
+        self._update_components(None)  # Quitar un segmento puede separar componentes
+
+        def close(planner):
+            planner.update_edge(origin.code, dest.code)
+            planner.update_edge(dest.code, origin.code)
+        self._update_planner(close)
 
     def debug_nav_points(self):
         """Método para debuggear el estado de los nodos"""
@@ -0,0 +1,107 @@
+import os
+import threading
+from collections import OrderedDict
+
+from airSpace import AirSpace
+
+# Bytes aproximados que ocupa en memoria cada punto y cada segmento cargado
+BYTES_PER_POINT = 600
+BYTES_PER_SEGMENT = 250
+
+
+def estimate_size(airspace):
+    """Estimación aproximada de la memoria que ocupa un AirSpace cargado"""
+    return len(airspace.NavPoints) * BYTES_PER_POINT + len(airspace.NavSegments) * BYTES_PER_SEGMENT
+
+
+class AirSpaceCache:
+    """Caché LRU de AirSpace ya cargados, uno por región.
+
+    La clave incluye el tamaño y la fecha de modificación de los tres ficheros
+    de la región, así que si alguno cambia la región se vuelve a cargar. Las
+    regiones menos usadas se descartan cuando se supera max_bytes.
+    """
+
+    def __init__(self, data_dir="data", max_bytes=256 * 1024 * 1024, snapshot_dir=None):
+        self.data_dir = data_dir
+        self.max_bytes = max_bytes
+        self.snapshot_dir = snapshot_dir
+        self._entries = OrderedDict()  # región -> (clave, AirSpace, bytes)
+        self._loading = {}  # región -> Event de la carga en curso
+        self._lock = threading.Lock()
+
+    def files(self, region):
+        base_path = os.path.join(self.data_dir, f"{region}_")
+        return f"{base_path}nav.txt", f"{base_path}seg.txt", f"{base_path}aer.txt"
+
+    def _key(self, region):
+        key = []
+        for path in self.files(region):
+            info = os.stat(path)
+            key.append((info.st_size, info.st_mtime_ns))
+        return tuple(key)
+
+    @property
+    def used_bytes(self):
+        with self._lock:
+            return sum(size for _, _, size in self._entries.values())
+
+    def __contains__(self, region):
+        with self._lock:
+            return region in self._entries
+
+    def get(self, region):
+        """Devuelve el AirSpace de la región, cargándolo solo si hace falta"""
+        while True:
+            key = self._key(region)
+            with self._lock:
+                entry = self._entries.get(region)
+                if entry is not None and entry[0] == key:
+                    self._entries.move_to_end(region)
+                    return entry[1]
+                event = self._loading.get(region)
+                if event is None:
+                    event = threading.Event()
+                    self._loading[region] = event
+                    break
+            # Otro hilo ya está cargando esta región: esperar a que termine
+            event.wait()
+
+        try:
+            airspace = AirSpace()
+            snapshot_dir = os.path.join(self.snapshot_dir, region) if self.snapshot_dir else None
+            airspace.load_airspace_data(*self.files(region), snapshot_dir=snapshot_dir)
+            with self._lock:
+                self._entries[region] = (key, airspace, estimate_size(airspace))
+                self._entries.move_to_end(region)
+                self._evict()
+            return airspace
+        finally:
+            with self._lock:
+                del self._loading[region]
+            event.set()
+
+    def _evict(self):
+        """Descarta las regiones menos usadas hasta volver al presupuesto de memoria"""
+        total = sum(size for _, _, size in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            total -= size
+
+    def discard(self, region):
+        """Olvida una región (por ejemplo, porque se ha editado el AirSpace cargado)"""
+        with self._lock:
+            self._entries.pop(region, None)
+
+    def preload(self, regions):
+        """Carga las regiones en un hilo en segundo plano y devuelve el hilo"""
+        def worker():
+            for region in regions:
+                try:
+                    self.get(region)
+                except Exception as e:
+                    print(f"No se pudo precargar {region}: {e}")
+
+        thread = threading.Thread(target=worker, name="airspace-preload", daemon=True)
+        thread.start()
+        return thread
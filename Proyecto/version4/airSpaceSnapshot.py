@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+
+from navGraph import NavGraph
+
+# Subir este número cada vez que cambie el formato de la instantánea
+SNAPSHOT_VERSION = 3
+
+
+def source_stamp(paths):
+    """Huella de los ficheros de texto: ruta, tamaño y fecha de modificación"""
+    stamp = []
+    for path in paths:
+        info = os.stat(path)
+        stamp.append({
+            "path": os.path.abspath(path),
+            "size": info.st_size,
+            "mtime_ns": info.st_mtime_ns,
+        })
+    return stamp
+
+
+def compile_snapshot(airspace, snapshot_dir, sources, stamp=None):
+    """Escribe una instantánea binaria del espacio aéreo en snapshot_dir.
+
+    Se escribe primero en un directorio temporal y después se renombra, para
+    que nunca se lea una instantánea a medio escribir.
+    """
+    graph = NavGraph.from_airspace(airspace)
+    position = {point: i for i, point in enumerate(airspace.NavPoints)}
+    unresolved = {}
+    for icao, name, kind in airspace.unresolved_procedures:
+        unresolved.setdefault(icao, []).append([name, kind])
+    airports = [
+        {
+            "name": airport.name,
+            "sids": [position[p] for p in airport.SIDs if p in position],
+            "stars": [position[p] for p in airport.STARs if p in position],
+            "unresolved": unresolved.get(airport.name, []),
+        }
+        for airport in airspace.NavAirports
+    ]
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "sources": stamp if stamp is not None else source_stamp(sources),
+        "num_nodes": graph.num_nodes,
+        "num_edges": graph.num_edges,
+    }
+
+    parent = os.path.dirname(os.path.abspath(snapshot_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = f"{snapshot_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    graph.save(tmp_dir)
+    with open(os.path.join(tmp_dir, "airports.json"), "w", encoding="utf-8") as f:
+        json.dump(airports, f)
+    # Líneas del fichero de segmentos que no se cargaron, para el informe de validación
+    with open(os.path.join(tmp_dir, "skipped_segments.json"), "w", encoding="utf-8") as f:
+        json.dump([list(entry) for entry in airspace.skipped_segments], f)
+    # La cabecera se escribe la última: sin ella la instantánea no es válida
+    with open(os.path.join(tmp_dir, "header.json"), "w", encoding="utf-8") as f:
+        json.dump(header, f)
+
+    old_dir = f"{snapshot_dir}.old-{os.getpid()}"
+    if os.path.exists(snapshot_dir):
+        os.replace(snapshot_dir, old_dir)
+    os.replace(tmp_dir, snapshot_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return graph
+
+
+def load_snapshot(snapshot_dir, sources=None, stamp=None):
+    """Carga una instantánea si existe y sigue al día con los ficheros fuente.
+
+    Devuelve (NavGraph, airports, segmentos descartados) o None si hay que
+    volver a compilarla.
+    """
+    header_path = os.path.join(snapshot_dir, "header.json")
+    try:
+        with open(header_path, encoding="utf-8") as f:
+            header = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if header.get("version") != SNAPSHOT_VERSION:
+        return None
+    if sources is not None or stamp is not None:
+        if header.get("sources") != (stamp if stamp is not None else source_stamp(sources)):
+            return None
+
+    try:
+        graph = NavGraph.load(snapshot_dir)
+        with open(os.path.join(snapshot_dir, "airports.json"), encoding="utf-8") as f:
+            airports = json.load(f)
+        with open(os.path.join(snapshot_dir, "skipped_segments.json"), encoding="utf-8") as f:
+            skipped_segments = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return graph, airports, skipped_segments
@@ -0,0 +1,91 @@
+from collections import Counter
+
+import numpy as np
+
+
+class ValidationReport:
+    """Resultado de validar un AirSpace: una lista de problemas por cada comprobación"""
+
+    # (atributo, descripción, es un error y no solo un aviso)
+    CHECKS = (
+        ("duplicate_ids", "IDs de punto repetidos", True),
+        ("duplicate_names", "Nombres de punto repetidos", True),
+        ("unknown_endpoints", "Segmentos con extremos desconocidos", True),
+        ("self_loops", "Segmentos de un punto a sí mismo", True),
+        ("non_positive_distances", "Segmentos con distancia cero o negativa", True),
+        ("duplicate_segments", "Segmentos repetidos", True),
+        ("asymmetric_segments", "Segmentos sin el segmento de vuelta", False),
+        ("isolated_points", "Puntos sin ningún segmento", False),
+        ("unresolved_procedures", "SIDs/STARs que no corresponden a ningún punto", False),
+        ("airports_without_sids", "Aeropuertos sin SIDs", False),
+        ("airports_without_stars", "Aeropuertos sin STARs", False),
+    )
+
+    def __init__(self):
+        for attribute, _, _ in self.CHECKS:
+            setattr(self, attribute, [])
+
+    def counts(self):
+        return {attribute: len(getattr(self, attribute)) for attribute, _, _ in self.CHECKS}
+
+    @property
+    def has_errors(self):
+        return any(getattr(self, attribute) for attribute, _, is_error in self.CHECKS if is_error)
+
+    def print_report(self, max_items=5):
+        """Imprime un resumen de los problemas encontrados"""
+        for airport in self.airports_without_sids:
+            print(f"Warning: Airport {airport} has no SIDs")
+        for airport in self.airports_without_stars:
+            print(f"Warning: Airport {airport} has no STARs")
+
+        for attribute, description, _ in self.CHECKS:
+            items = getattr(self, attribute)
+            if not items or attribute in ("airports_without_sids", "airports_without_stars"):
+                continue
+            shown = ", ".join(str(item) for item in items[:max_items])
+            more = f" (y {len(items) - max_items} más)" if len(items) > max_items else ""
+            print(f"Warning: {description}: {len(items)} -> {shown}{more}")
+
+
+def validate_airspace(airspace):
+    """Valida un AirSpace en tiempo O(N + E) y devuelve un ValidationReport"""
+    report = ValidationReport()
+    points = airspace.NavPoints
+    segments = airspace.NavSegments
+
+    # Puntos: IDs y nombres repetidos
+    codes = Counter(p.code for p in points)
+    report.duplicate_ids = [code for code, count in codes.items() if count > 1]
+    names = Counter(p.name for p in points)
+    report.duplicate_names = [name for name, count in names.items() if count > 1]
+
+    # Segmentos: comprobaciones vectorizadas sobre los tres campos
+    origins = [s.origin for s in segments]
+    dests = [s.destination for s in segments]
+    distances = np.fromiter((s.distance for s in segments), dtype=np.float64, count=len(segments))
+    known = set(codes)
+    # Las líneas del fichero que el cargador ya descartó también cuentan
+    skipped = airspace.skipped_segments
+    report.unknown_endpoints = [(o, d) for o, d, _, reason in skipped if reason == "unknown"]
+    report.unknown_endpoints += [(o, d) for o, d in zip(origins, dests) if o not in known or d not in known]
+    report.self_loops = [(o, d) for o, d in zip(origins, dests) if o == d]
+    report.non_positive_distances = [(origins[i], dests[i]) for i in np.flatnonzero(distances <= 0).tolist()]
+
+    pairs = Counter(zip(origins, dests))
+    duplicates = dict.fromkeys((o, d) for o, d, _, reason in skipped if reason == "duplicate")
+    duplicates.update((pair, None) for pair, count in pairs.items() if count > 1)
+    report.duplicate_segments = list(duplicates)
+    report.asymmetric_segments = [(o, d) for (o, d) in pairs if o != d and (d, o) not in pairs]
+
+    # Puntos aislados: sin segmentos de salida ni de entrada
+    graph = airspace.get_graph()
+    in_degree = np.bincount(graph.targets, minlength=graph.num_nodes)
+    isolated = np.flatnonzero((np.diff(graph.offsets) == 0) & (in_degree == 0))
+    report.isolated_points = graph.ids[isolated].tolist()
+
+    # Aeropuertos
+    report.unresolved_procedures = list(airspace.unresolved_procedures)
+    report.airports_without_sids = [a.name for a in airspace.NavAirports if not a.SIDs]
+    report.airports_without_stars = [a.name for a in airspace.NavAirports if not a.STARs]
+    return report
@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from navGraph import NavGraph
+
+# Pares por tarea: suficientes para que el envío de cada tarea no pese
+DEFAULT_CHUNK_SIZE = 256
+
+_worker_state = None
+
+
+class SharedArrays:
+    """Varios arrays de NumPy copiados una sola vez a un bloque de memoria compartida.
+
+    descriptor es lo único que se envía a los procesos: nombre del bloque y
+    (nombre, dtype, forma, desplazamiento) de cada array. Con attach() cada
+    proceso obtiene vistas de los mismos datos sin copiarlos ni serializarlos.
+    """
+
+    def __init__(self, arrays):
+        layout = []
+        size = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            size = -(-size // 16) * 16  # Alineado a 16 bytes
+            layout.append((name, array.dtype.str, array.shape, size))
+            size += array.nbytes
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.descriptor = (self.memory.name, tuple(layout))
+        for (name, _, _, _), view in zip(layout, self._views(self.memory, layout)):
+            view[...] = arrays[name]
+
+    @staticmethod
+    def _views(memory, layout):
+        return [np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf, offset=offset)
+                for _, dtype, shape, offset in layout]
+
+    @classmethod
+    def attach(cls, descriptor):
+        """(bloque, {nombre: vista}) a partir del descriptor; el bloque debe seguir vivo mientras se usen las vistas"""
+        name, layout = descriptor
+        memory = shared_memory.SharedMemory(name=name)
+        return memory, {entry[0]: view for entry, view in zip(layout, cls._views(memory, layout))}
+
+    def close(self):
+        """Libera el bloque (los procesos ya no deben usarlo)"""
+        self.memory.close()
+        self.memory.unlink()
+
+
+def solve_pairs(graph, pairs, scale):
+    """A* para una lista de (k, índice origen, índice destino): lista de (k, coste, IDs del camino).
+
+    Los pares se resuelven agrupados por destino: los del mismo destino
+    comparten la heurística, que es lo caro de preparar en cada consulta, y
+    solo se guarda la del destino actual (una lista de N floats).
+    """
+    results = []
+    ids = graph.ids
+    current, heuristic = None, None
+    for k, start, goal in sorted(pairs, key=lambda pair: pair[2]):
+        if goal != current:
+            current, heuristic = goal, graph.heuristic_to(goal, scale)
+        path, cost = graph.astar(start, goal, heuristic)
+        results.append((k, cost, ids[path].tolist() if path else []))
+    return results
+
+
+def _init_worker(descriptor, scale):
+    global _worker_state
+    memory, arrays = SharedArrays.attach(descriptor)
+    _worker_state = (memory, NavGraph(*[arrays[name] for name in NavGraph.ARRAYS]), scale)
+
+
+def _worker_solve(pairs):
+    _, graph, scale = _worker_state
+    return solve_pairs(graph, pairs, scale)
+
+
+def solve_batch(graph, pairs, weights=None, scale=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Resuelve muchos pares (k, origen, destino) de índices; genera (k, coste, IDs del camino).
+
+    weights sustituye a los pesos del grafo (p. ej. los de un modelo de
+    coste, con inf en los segmentos bloqueados) y scale es su factor de
+    heurística. Los arrays se publican una vez en memoria compartida y los
+    pares se reparten en trozos de chunk_size entre workers procesos; los
+    resultados salen en cuanto termina cada trozo, no en el orden de pairs.
+    """
+    if weights is None:
+        weights = graph.weights
+    if scale is None:
+        scale = graph.heuristic_scale
+    # Ordenados por destino, los pares que comparten heurística caen en el mismo trozo
+    pairs = sorted(pairs, key=lambda pair: pair[2])
+    workers = min(workers or os.cpu_count() or 1, -(-len(pairs) // chunk_size))
+    arrays = {name: getattr(graph, name) for name in NavGraph.ARRAYS}
+    arrays["weights"] = np.asarray(weights, dtype=np.float64)
+
+    if workers <= 1:
+        local = graph if weights is graph.weights else NavGraph(*[arrays[name] for name in NavGraph.ARRAYS])
+        for start in range(0, len(pairs), chunk_size):
+            yield from solve_pairs(local, pairs[start:start + chunk_size], scale)
+        return
+
+    shared = SharedArrays(arrays)
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(shared.descriptor, scale))
+    try:
+        futures = [executor.submit(_worker_solve, pairs[start:start + chunk_size])
+                   for start in range(0, len(pairs), chunk_size)]
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        # Si se deja de leer a medias, los trozos pendientes no llegan a ejecutarse
+        executor.shutdown(cancel_futures=True)
+        shared.close()
@@ -0,0 +1,135 @@
+"""Comparación de los motores de rutas sobre Cat, Spain y Eur.
+
+Uso: python benchmark_routes.py [número de consultas]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from airSpace import AirSpace
+from batchSolver import solve_batch
+from contractionHierarchy import ContractionHierarchy
+from kShortestPaths import path_edges, penalty_alternatives, yen_k_shortest
+from landmarks import LandmarkIndex
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+REGIONS = ("Cat", "Spain", "Eur")
+
+
+def load_graph(region):
+    airspace = AirSpace()
+    airspace.load_airspace_data(*[os.path.join(DATA_DIR, f"{region}_{kind}.txt")
+                                  for kind in ("nav", "seg", "aer")], verbose=False)
+    return airspace.get_graph()
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def run_queries(pairs, search):
+    """Ejecuta search(start, goal, stats) sobre todos los pares: (ms por consulta, nodos expandidos)"""
+    expanded = 0
+    start = time.perf_counter()
+    for origin, goal in pairs:
+        stats = {}
+        search(origin, goal, stats)
+        expanded += stats["expanded"]
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / len(pairs), expanded / len(pairs)
+
+
+def benchmark_region(region, num_queries):
+    graph = load_graph(region)
+    rng = np.random.default_rng(0)
+    pairs = [tuple(p) for p in rng.integers(0, graph.num_nodes, size=(num_queries, 2)).tolist()]
+
+    landmarks, landmarks_time = timed(lambda: LandmarkIndex.build(graph))
+    contraction, contraction_time = timed(lambda: ContractionHierarchy.build(graph))
+    contraction.query(0, 0)  # Prepara las listas de Python fuera de la medida
+
+    engines = (
+        ("Dijkstra", 0.0,
+         lambda s, g, stats: graph.astar(s, g, stats=stats)),
+        ("Dijkstra bidireccional", 0.0,
+         lambda s, g, stats: graph.bidirectional(s, g, stats=stats)),
+        ("A* (ortodrómica)", 0.0,
+         lambda s, g, stats: graph.astar(s, g, graph.heuristic_to(g), stats=stats)),
+        ("A* bidireccional", 0.0,
+         lambda s, g, stats: graph.bidirectional(s, g, graph.bidirectional_potential(s, g), stats=stats)),
+        ("A* (ALT)", landmarks_time,
+         lambda s, g, stats: graph.astar(s, g, landmarks.heuristic_to(g), stats=stats)),
+        ("Contraction Hierarchies", contraction_time,
+         lambda s, g, stats: contraction.query(s, g, stats=stats)),
+    )
+    print(f"\n{region}: {graph.num_nodes} nodos, {graph.num_edges} segmentos, "
+          f"{contraction.num_shortcuts} atajos, {num_queries} consultas")
+    print(f"  {'motor':<26}{'preproceso (s)':>16}{'ms/consulta':>14}{'expandidos':>12}")
+    for name, preprocessing, search in engines:
+        ms, expanded = run_queries(pairs, search)
+        print(f"  {name:<26}{preprocessing:>16.3f}{ms:>14.3f}{expanded:>12.1f}")
+
+
+def overlap(graph, routes):
+    """Fracción media de la longitud de cada alternativa compartida con la más corta"""
+    if len(routes) < 2:
+        return 0.0
+    _, _, weights = graph.lists()
+    best = set(path_edges(graph, routes[0][0]))
+    shares = [sum(weights[e] for e in best & set(path_edges(graph, path))) / cost
+              for path, cost in routes[1:]]
+    return sum(shares) / len(shares)
+
+
+def benchmark_alternatives(region, num_queries):
+    graph = load_graph(region)
+    rng = np.random.default_rng(1)
+    pairs = []
+    while len(pairs) < num_queries:
+        start, goal = rng.integers(0, graph.num_nodes, size=2).tolist()
+        if start != goal and graph.astar(start, goal)[1] is not None:
+            pairs.append((start, goal))
+
+    print(f"\n{region}: rutas alternativas, {num_queries} pares conectados")
+    print(f"  {'método':<16}{'k':>4}{'ms/consulta':>14}{'rutas':>8}{'solape':>9}")
+    for k in (3, 10):
+        for name, search in (("Yen", yen_k_shortest), ("Penalización", penalty_alternatives)):
+            found = 0
+            shared = 0.0
+            start_time = time.perf_counter()
+            results = [search(graph, s, g, k, graph.heuristic_to(g)) for s, g in pairs]
+            ms = (time.perf_counter() - start_time) * 1000 / len(pairs)
+            for routes in results:
+                found += len(routes)
+                shared += overlap(graph, routes)
+            print(f"  {name:<16}{k:>4}{ms:>14.2f}{found / len(pairs):>8.1f}{shared / len(pairs):>9.2f}")
+
+
+def benchmark_batch(region, num_queries):
+    graph = load_graph(region)
+    rng = np.random.default_rng(2)
+    pairs = [(k, int(s), int(g)) for k, (s, g) in enumerate(rng.integers(0, graph.num_nodes,
+                                                                         size=(num_queries, 2)))]
+    print(f"\n{region}: solve_batch, {num_queries} pares (memoria compartida)")
+    print(f"  {'procesos':<10}{'consultas/s':>14}{'aceleración':>13}")
+    base = None
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        _, elapsed = timed(lambda: sum(1 for _ in solve_batch(graph, pairs, workers=workers)))
+        rate = num_queries / elapsed
+        base = base or rate
+        print(f"  {workers:<10}{rate:>14.0f}{rate / base:>13.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    num_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    for region in REGIONS:
+        benchmark_region(region, num_queries)
+    for region in ("Spain", "Eur"):
+        benchmark_alternatives(region, max(num_queries // 20, 1))
+    benchmark_batch("Eur", num_queries * 10)
@@ -0,0 +1,195 @@
+def _find(parent, u):
+    """Raíz de u en el union-find, acortando el camino (halving)"""
+    while parent[u] != u:
+        parent[u] = parent[parent[u]]
+        u = parent[u]
+    return u
+
+
+def _union(parent, u, v):
+    ru, rv = _find(parent, u), _find(parent, v)
+    if ru != rv:
+        parent[max(ru, rv)] = min(ru, rv)
+
+
+class ComponentIndex:
+    """Componentes conexas del grafo dirigido de segmentos.
+
+    - weak: componentes débiles (sin tener en cuenta el sentido), con union-find.
+    - strong: componentes fuertemente conexas (Tarjan iterativo), numeradas
+      en orden topológico inverso del grafo condensado (un DAG).
+    - dag[c]: componentes fuertes a las que llega directamente la c.
+
+    "¿Se puede ir de a a b?" se responde en O(1) si están en componentes
+    débiles distintas (no) o en la misma fuerte (sí). Si no, se recorre el
+    DAG desde la componente de a, sin entrar en las de número menor que la
+    de b, que no pueden llegar a ella. No se guarda el cierre transitivo:
+    ocuparía O(C²) con C componentes. Añadir puntos y segmentos se actualiza
+    sin recalcular (add_point, add_edge); al quitar algo hay que reconstruir
+    el índice.
+    """
+
+    def __init__(self, points, parent, strong, dag):
+        self.points = points  # NavPoint de cada nodo
+        self.position = {point.code: i for i, point in enumerate(points)}
+        self._parent = parent  # union-find de las componentes débiles
+        self.strong = strong  # componente fuerte de cada nodo
+        self.dag = dag
+        # False cuando un segmento añadido va de una componente a otra de número
+        # mayor: la numeración deja de ser topológica y no se puede podar con ella
+        self._ordered = True
+        self._members = None
+
+    @classmethod
+    def build(cls, graph):
+        n = graph.num_nodes
+        offsets, targets, _ = graph.lists()
+
+        parent = list(range(n))
+        for u in range(n):
+            for k in range(offsets[u], offsets[u + 1]):
+                _union(parent, u, targets[k])
+
+        strong = cls._tarjan(n, offsets, targets)
+
+        successors = [set() for _ in range(max(strong, default=-1) + 1)]
+        for u in range(n):
+            c = strong[u]
+            for k in range(offsets[u], offsets[u + 1]):
+                other = strong[targets[k]]
+                if other != c:
+                    successors[c].add(other)
+        dag = [list(s) for s in successors]
+
+        points = list(graph.points) if graph.points is not None else []
+        return cls(points, parent, strong, dag)
+
+    @staticmethod
+    def _tarjan(n, offsets, targets):
+        """Componente fuerte de cada nodo, numeradas en orden topológico inverso"""
+        order = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        strong = [-1] * n
+        stack = []
+        counter = 0
+        components = 0
+        for root in range(n):
+            if order[root] != -1:
+                continue
+            work = [(root, offsets[root])]
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                u, k = work[-1]
+                if k < offsets[u + 1]:
+                    work[-1] = (u, k + 1)
+                    v = targets[k]
+                    if order[v] == -1:
+                        order[v] = low[v] = counter
+                        counter += 1
+                        stack.append(v)
+                        on_stack[v] = True
+                        work.append((v, offsets[v]))
+                    elif on_stack[v]:
+                        low[u] = min(low[u], order[v])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[u])
+                if low[u] == order[u]:
+                    while True:
+                        v = stack.pop()
+                        on_stack[v] = False
+                        strong[v] = components
+                        if v == u:
+                            break
+                    components += 1
+        return strong
+
+    def __contains__(self, code):
+        return code in self.position
+
+    def weak(self, code):
+        """Representante de la componente débil del punto"""
+        return _find(self._parent, self.position[code])
+
+    def connected(self, origin, destination):
+        """True si hay camino dirigido entre los dos códigos de punto"""
+        a, b = self.position.get(origin), self.position.get(destination)
+        if a is None or b is None:
+            return False
+        if _find(self._parent, a) != _find(self._parent, b):
+            return False  # Ni siquiera sin tener en cuenta el sentido
+        ca, cb = self.strong[a], self.strong[b]
+        if ca == cb:
+            return True
+        return cb in self._reachable_components(ca, cb)
+
+    def _reachable_components(self, start, target=None):
+        """Componentes fuertes alcanzables desde start; para en cuanto aparece target.
+
+        Con la numeración topológica no se entra en componentes de número
+        menor que target, porque solo llegan a componentes aún menores.
+        """
+        bound = target if target is not None and self._ordered else -1
+        if start < bound:
+            return set()
+        seen = {start}
+        stack = [start]
+        dag = self.dag
+        while stack:
+            for other in dag[stack.pop()]:
+                if other not in seen and other >= bound:
+                    if other == target:
+                        return {other}
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+
+    def reachable(self, code):
+        """NavPoints alcanzables desde el punto (incluido él mismo)"""
+        components = self._reachable_components(self.strong[self.position[code]])
+        if self._members is None:
+            self._members = {}
+            for u, c in enumerate(self.strong):
+                self._members.setdefault(c, []).append(u)
+        return [self.points[u] for c in components for u in self._members[c]]
+
+    def weak_components(self):
+        """Listas de NavPoints de cada componente débil, de mayor a menor"""
+        groups = {}
+        for u in range(len(self.points)):
+            groups.setdefault(_find(self._parent, u), []).append(self.points[u])
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def add_point(self, point):
+        """Punto nuevo, sin segmentos: una componente (débil y fuerte) para él solo"""
+        u = len(self.points)
+        self.points.append(point)
+        self.position[point.code] = u
+        self._parent.append(u)
+        self.strong.append(len(self.dag))
+        self.dag.append([])
+        if self._members is not None:
+            self._members[self.strong[u]] = [u]
+
+    def add_edge(self, origin, destination):
+        """Segmento nuevo origin -> destination (códigos).
+
+        Se añade al DAG como una arista más entre componentes. Si cierra un
+        ciclo, las componentes afectadas siguen con números distintos (y el
+        "DAG" deja de serlo), pero el recorrido de connected() sigue siendo
+        correcto.
+        """
+        a, b = self.position[origin], self.position[destination]
+        _union(self._parent, a, b)
+        ca, cb = self.strong[a], self.strong[b]
+        if ca == cb or cb in self.dag[ca]:
+            return
+        self.dag[ca].append(cb)
+        if ca < cb:
+            self._ordered = False
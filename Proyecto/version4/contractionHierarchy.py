@@ -0,0 +1,269 @@
+import json
+import os
+import shutil
+from heapq import heappush, heappop
+
+import numpy as np
+
+
+def _to_csr(num_nodes, edges):
+    """edges[i] = {j: (peso, nodo intermedio o -1)} -> arrays offsets/targets/weights/middle"""
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in edges], out=offsets[1:])
+    targets = np.fromiter((j for e in edges for j in e), dtype=np.int64, count=offsets[-1])
+    weights = np.fromiter((w for e in edges for w, _ in e.values()), dtype=np.float64, count=offsets[-1])
+    middle = np.fromiter((m for e in edges for _, m in e.values()), dtype=np.int64, count=offsets[-1])
+    return offsets, targets, weights, middle
+
+
+class ContractionHierarchy:
+    """Contraction Hierarchies sobre un NavGraph.
+
+    Preproceso: los nodos se contraen de uno en uno, de menos a más
+    importante. Al quitar v, cada camino u -> v -> x que no tenga un
+    camino alternativo igual de corto (búsqueda de testigo) se sustituye por
+    un atajo u -> x que recuerda v como nodo intermedio.
+
+    Consulta: Dijkstra bidireccional que solo sube de rango, hacia delante
+    desde el origen y hacia atrás desde el destino. Los atajos del camino
+    encontrado se desempaquetan después en segmentos originales.
+    """
+
+    ARRAYS = ("rank", "up_offsets", "up_targets", "up_weights", "up_middle",
+              "down_offsets", "down_targets", "down_weights", "down_middle")
+
+    # Límite de nodos asentados en cada búsqueda de testigo. Si se alcanza se
+    # añade el atajo aunque quizá no hiciera falta: nunca afecta al resultado.
+    WITNESS_LIMIT = 200
+
+    def __init__(self, graph, rank, up_offsets, up_targets, up_weights, up_middle,
+                 down_offsets, down_targets, down_weights, down_middle):
+        self.graph = graph
+        self.rank = rank  # orden de contracción de cada nodo
+        # Grafo hacia arriba: u -> v con rank[v] > rank[u]
+        self.up_offsets = up_offsets
+        self.up_targets = up_targets
+        self.up_weights = up_weights
+        self.up_middle = up_middle
+        # Grafo hacia abajo guardado al revés: v -> u para cada u -> v con rank[u] > rank[v]
+        self.down_offsets = down_offsets
+        self.down_targets = down_targets
+        self.down_weights = down_weights
+        self.down_middle = down_middle
+        self._lists = None
+        self._shortcuts = None
+
+    @property
+    def num_shortcuts(self):
+        return int(np.count_nonzero(self.up_middle >= 0) + np.count_nonzero(self.down_middle >= 0))
+
+    @classmethod
+    def build(cls, graph):
+        """Ordena y contrae todos los nodos del grafo"""
+        n = graph.num_nodes
+        offsets, targets, weights = graph.lists()
+        # Grafo de los nodos aún sin contraer: out[u][v] = (peso, intermedio)
+        out = [dict() for _ in range(n)]
+        inc = [dict() for _ in range(n)]
+        for u in range(n):
+            for k in range(offsets[u], offsets[u + 1]):
+                v, w = targets[k], weights[k]
+                if v != u and w < out[u].get(v, (float("inf"),))[0]:
+                    out[u][v] = (w, -1)
+                    inc[v][u] = (w, -1)
+
+        contracted_neighbors = [0] * n
+
+        def witness_distances(source, excluded, max_cost):
+            """Distancias desde source sin pasar por excluded, hasta max_cost"""
+            dist = {source: 0.0}
+            frontier = [(0.0, source)]
+            settled = 0
+            while frontier and settled < cls.WITNESS_LIMIT:
+                cost, current = heappop(frontier)
+                if cost > dist[current]:
+                    continue
+                if cost > max_cost:
+                    break
+                settled += 1
+                for nxt, (w, _) in out[current].items():
+                    if nxt == excluded:
+                        continue
+                    new_cost = cost + w
+                    if new_cost < dist.get(nxt, float("inf")):
+                        dist[nxt] = new_cost
+                        heappush(frontier, (new_cost, nxt))
+            return dist
+
+        def shortcuts_for(v):
+            """Atajos necesarios al contraer v: lista de (u, x, peso)"""
+            shortcuts = []
+            if not inc[v] or not out[v]:
+                return shortcuts
+            max_out = max(w for w, _ in out[v].values())
+            for u, (w_in, _) in inc[v].items():
+                dist = witness_distances(u, v, w_in + max_out)
+                for x, (w_out, _) in out[v].items():
+                    if x == u:
+                        continue
+                    via = w_in + w_out
+                    if dist.get(x, float("inf")) > via:
+                        shortcuts.append((u, x, via))
+            return shortcuts
+
+        def priority(v):
+            # Diferencia de aristas + vecinos ya contraídos (reparte la contracción)
+            return len(shortcuts_for(v)) - len(inc[v]) - len(out[v]) + contracted_neighbors[v]
+
+        queue = [(priority(v), v) for v in range(n)]
+        queue.sort()
+        rank = np.zeros(n, dtype=np.int64)
+        up = [None] * n
+        down = [None] * n
+        order = 0
+        while queue:
+            _, v = heappop(queue)
+            # Actualización perezosa: si ya no es el mínimo, vuelve a la cola
+            current = priority(v)
+            if queue and current > queue[0][0]:
+                heappush(queue, (current, v))
+                continue
+
+            rank[v] = order
+            order += 1
+            up[v] = dict(out[v])
+            down[v] = dict(inc[v])
+            for u, x, via in shortcuts_for(v):
+                if via < out[u].get(x, (float("inf"),))[0]:
+                    out[u][x] = (via, v)
+                    inc[x][u] = (via, v)
+            for u in inc[v]:
+                del out[u][v]
+                contracted_neighbors[u] += 1
+            for x in out[v]:
+                del inc[x][v]
+                contracted_neighbors[x] += 1
+            out[v] = {}
+            inc[v] = {}
+
+        return cls(graph, rank, *_to_csr(n, up), *_to_csr(n, down))
+
+    def lists(self):
+        if self._lists is None:
+            self._lists = tuple(getattr(self, name).tolist() for name in self.ARRAYS[1:])
+        return self._lists
+
+    def _shortcut_middles(self):
+        """Diccionario (u, v) -> nodo intermedio de cada atajo"""
+        if self._shortcuts is None:
+            (up_offsets, up_targets, _, up_middle,
+             down_offsets, down_targets, _, down_middle) = self.lists()
+            shortcuts = {}
+            for u in range(self.graph.num_nodes):
+                for k in range(up_offsets[u], up_offsets[u + 1]):
+                    if up_middle[k] >= 0:
+                        shortcuts[(u, up_targets[k])] = up_middle[k]
+                for k in range(down_offsets[u], down_offsets[u + 1]):
+                    if down_middle[k] >= 0:
+                        shortcuts[(down_targets[k], u)] = down_middle[k]
+            self._shortcuts = shortcuts
+        return self._shortcuts
+
+    def query(self, start, goal, stats=None):
+        """Camino más corto entre dos índices: (lista de índices, coste) o ([], None)"""
+        (up_offsets, up_targets, up_weights, _,
+         down_offsets, down_targets, down_weights, _) = self.lists()
+        inf = float("inf")
+        dist = ({start: 0.0}, {goal: 0.0})
+        pred = ({start: -1}, {goal: -1})
+        frontiers = ([(0.0, start)], [(0.0, goal)])
+        graphs = ((up_offsets, up_targets, up_weights), (down_offsets, down_targets, down_weights))
+        best = 0.0 if start == goal else inf
+        meeting = start if start == goal else -1
+        expanded = 0
+        side = 0
+        while frontiers[0] or frontiers[1]:
+            # Se alterna de lado; un lado cuyo mínimo ya supera best está terminado
+            if not frontiers[side] or frontiers[side][0][0] >= best:
+                side = 1 - side
+                if not frontiers[side] or frontiers[side][0][0] >= best:
+                    break
+            cost, current = heappop(frontiers[side])
+            if cost > dist[side][current]:
+                continue  # Entrada obsoleta del heap
+            expanded += 1
+            other = dist[1 - side].get(current)
+            if other is not None and cost + other < best:
+                best = cost + other
+                meeting = current
+            offsets, targets, weights = graphs[side]
+            for k in range(offsets[current], offsets[current + 1]):
+                nxt = targets[k]
+                new_cost = cost + weights[k]
+                if new_cost < dist[side].get(nxt, inf):
+                    dist[side][nxt] = new_cost
+                    pred[side][nxt] = current
+                    heappush(frontiers[side], (new_cost, nxt))
+            side = 1 - side
+
+        if stats is not None:
+            stats["expanded"] = expanded
+        if meeting == -1:
+            return [], None
+
+        # Camino con atajos: origen -> meeting (hacia delante) y meeting -> destino (hacia atrás)
+        path = []
+        current = meeting
+        while current != -1:
+            path.append(current)
+            current = pred[0][current]
+        path.reverse()
+        current = pred[1][meeting]
+        while current != -1:
+            path.append(current)
+            current = pred[1][current]
+        return self.unpack(path), best
+
+    def unpack(self, path):
+        """Sustituye cada atajo del camino por los segmentos originales"""
+        shortcuts = self._shortcut_middles()
+        result = path[:1]
+        for u, v in zip(path, path[1:]):
+            stack = [(u, v)]
+            while stack:
+                a, b = stack.pop()
+                middle = shortcuts.get((a, b))
+                if middle is None:
+                    result.append(b)
+                else:
+                    stack.append((middle, b))
+                    stack.append((a, middle))
+        return result
+
+    def save(self, directory):
+        """Guarda la jerarquía junto a la huella del grafo para el que se calculó"""
+        tmp_dir = f"{directory}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in self.ARRAYS:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp_dir, "header.json"), "w", encoding="utf-8") as f:
+            json.dump({"graph": self.graph.fingerprint(), "shortcuts": self.num_shortcuts}, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)  # Otro proceso la ha guardado antes
+
+    @classmethod
+    def load(cls, directory, graph):
+        """Carga una jerarquía guardada, o None si no existe o es de otro grafo"""
+        try:
+            with open(os.path.join(directory, "header.json"), encoding="utf-8") as f:
+                header = json.load(f)
+            if header.get("graph") != graph.fingerprint():
+                return None
+            arrays = [np.load(os.path.join(directory, f"{name}.npy")) for name in cls.ARRAYS]
+        except (OSError, ValueError):
+            return None
+        return cls(graph, *arrays)
@@ -0,0 +1,142 @@
+import hashlib
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+KM_PER_NM = 1.852
+
+
+class CostModel(ABC):
+    """Coste de los segmentos de un NavGraph, calculado para todos a la vez.
+
+    weights(graph) devuelve un array con el coste de cada segmento (en el
+    orden de graph.targets); inf significa que el segmento no se puede usar.
+    key identifica el modelo con sus parámetros: NavGraph.cost_weights guarda
+    el resultado por clave, así que cambiar de modelo es una sola pasada
+    vectorizada por grafo y no una función de Python por segmento en el bucle
+    de búsqueda.
+    """
+
+    name = None
+    units = None
+
+    @property
+    def key(self):
+        return self.name
+
+    @abstractmethod
+    def weights(self, graph):
+        """Array con el coste de cada segmento de graph"""
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self.key!r}"
+
+
+class DistanceModel(CostModel):
+    """La distancia de *_seg.txt (km), el coste de siempre"""
+
+    name = "distance"
+    units = "km"
+
+    def weights(self, graph):
+        return graph.weights
+
+
+class WindGrid:
+    """Viento en una rejilla regular lat/lon: componentes u (hacia el este) y v
+    (hacia el norte) en nudos, con forma (len(lats), len(lons))"""
+
+    def __init__(self, lats, lons, u, v):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.u = np.asarray(u, dtype=np.float64)
+        self.v = np.asarray(v, dtype=np.float64)
+        digest = hashlib.sha1()
+        for array in (self.lats, self.lons, self.u, self.v):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        self.key = digest.hexdigest()[:16]
+
+    @classmethod
+    def synthetic(cls, min_lat, max_lat, min_lon, max_lon, speed=60.0, step=1.0, seed=0):
+        """Campo de viento suave de prueba: corriente del oeste con ondulaciones aleatorias"""
+        rng = np.random.default_rng(seed)
+        lats = np.arange(min_lat - step, max_lat + 2 * step, step)
+        lons = np.arange(min_lon - step, max_lon + 2 * step, step)
+        lat, lon = np.meshgrid(lats, lons, indexing="ij")
+        jet = rng.uniform(min_lat, max_lat)
+        phase = rng.uniform(0, 2 * np.pi, size=2)
+        u = speed * np.exp(-((lat - jet) / 5.0) ** 2) * (0.7 + 0.3 * np.sin(np.radians(lon) * 8 + phase[0]))
+        v = 0.3 * speed * np.cos(np.radians(lon) * 6 + phase[1]) * np.exp(-((lat - jet) / 8.0) ** 2)
+        return cls(lats, lons, u, v)
+
+    def at(self, lat, lon):
+        """(u, v) interpolados (bilineal) en arrays de posiciones; fuera de la rejilla, el borde"""
+        lat = np.clip(lat, self.lats[0], self.lats[-1])
+        lon = np.clip(lon, self.lons[0], self.lons[-1])
+        i = np.clip(np.searchsorted(self.lats, lat) - 1, 0, len(self.lats) - 2)
+        j = np.clip(np.searchsorted(self.lons, lon) - 1, 0, len(self.lons) - 2)
+        fy = (lat - self.lats[i]) / (self.lats[i + 1] - self.lats[i])
+        fx = (lon - self.lons[j]) / (self.lons[j + 1] - self.lons[j])
+
+        def interpolate(field):
+            return ((1 - fy) * ((1 - fx) * field[i, j] + fx * field[i, j + 1]) +
+                    fy * ((1 - fx) * field[i + 1, j] + fx * field[i + 1, j + 1]))
+        return interpolate(self.u), interpolate(self.v)
+
+
+def segment_ground_speed(graph, tas, wind):
+    """Velocidad respecto al suelo (nudos) de cada segmento volando a tas con el viento
+    del punto medio del segmento; <= 0 si el viento de cara no deja avanzar"""
+    origins = np.repeat(np.arange(graph.num_nodes), np.diff(graph.offsets))
+    lat1, lon1 = np.radians(graph.lat[origins]), np.radians(graph.lon[origins])
+    lat2, lon2 = np.radians(graph.lat[graph.targets]), np.radians(graph.lon[graph.targets])
+    # Rumbo inicial de cada segmento (desde el norte, en el sentido de las agujas del reloj)
+    course = np.arctan2(np.sin(lon2 - lon1) * np.cos(lat2),
+                        np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(lon2 - lon1))
+    u, v = wind.at((graph.lat[origins] + graph.lat[graph.targets]) / 2,
+                   (graph.lon[origins] + graph.lon[graph.targets]) / 2)
+    along = u * np.sin(course) + v * np.cos(course)  # Viento de cola (+) o de cara (-)
+    cross = u * np.cos(course) - v * np.sin(course)
+    return np.sqrt(np.maximum(tas ** 2 - cross ** 2, 0.0)) + along
+
+
+class TimeModel(CostModel):
+    """Tiempo de vuelo en minutos a una velocidad verdadera tas (nudos), con viento opcional"""
+
+    name = "time"
+    units = "min"
+
+    def __init__(self, tas=450.0, wind=None):
+        self.tas = float(tas)
+        self.wind = wind
+
+    @property
+    def key(self):
+        return (self.name, self.tas, self.wind.key if self.wind is not None else None)
+
+    def weights(self, graph):
+        if self.wind is None:
+            speed = np.full(graph.num_edges, self.tas)
+        else:
+            speed = segment_ground_speed(graph, self.tas, self.wind)
+        with np.errstate(divide="ignore"):
+            minutes = graph.weights / (speed * KM_PER_NM) * 60.0
+        return np.where(speed > 0, minutes, np.inf)
+
+
+class FuelModel(TimeModel):
+    """Combustible en kg: tiempo de vuelo por un consumo constante (kg/h)"""
+
+    name = "fuel"
+    units = "kg"
+
+    def __init__(self, tas=450.0, burn=2500.0, wind=None):
+        super().__init__(tas, wind)
+        self.burn = float(burn)
+
+    @property
+    def key(self):
+        return super().key + (self.burn,)
+
+    def weights(self, graph):
+        return super().weights(graph) * (self.burn / 60.0)
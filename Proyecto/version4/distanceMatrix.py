@@ -0,0 +1,137 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from navGraph import NavGraph
+
+# Con menos orígenes no compensa arrancar procesos
+PARALLEL_MIN_SOURCES = 64
+
+_worker_graph = None
+
+
+class MatrixPredecessors:
+    """Árboles de predecesores de distance_matrix(), para recuperar los caminos.
+
+    pred[i] es el array de predecesores de la búsqueda del origen i y
+    ends[i, j] el nodo del grupo destino j al que se llega con coste mínimo.
+    """
+
+    def __init__(self, pred, ends, points=None):
+        self.pred = pred
+        self.ends = ends
+        self.points = points  # NavPoint de cada índice (opcional)
+
+    def path(self, i, j):
+        """Camino del origen i al destino j (índices, o NavPoints si se conocen), o []"""
+        end = self.ends[i, j]
+        if end < 0:
+            return []
+        path = NavGraph.path_from_pred(self.pred[i], end)
+        return [self.points[k] for k in path] if self.points is not None else path
+
+
+class AirportPairTable:
+    """Tabla precalculada de rutas entre aeropuertos (SID de salida -> STAR de llegada).
+
+    Una búsqueda multi-origen por aeropuerto de salida; después cada par es
+    una consulta en la matriz y un recorrido de predecesores.
+    """
+
+    def __init__(self, graph, departures, arrivals, matrix, predecessors):
+        self.graph = graph
+        self.departures = {name: i for i, name in enumerate(departures)}
+        self.arrivals = {name: j for j, name in enumerate(arrivals)}
+        self.matrix = matrix
+        self.predecessors = predecessors
+
+    def __contains__(self, pair):
+        departure, arrival = pair
+        return departure in self.departures and arrival in self.arrivals
+
+    def cost(self, departure, arrival):
+        """Coste mínimo entre dos aeropuertos (ICAO), o None si no hay ruta"""
+        cost = float(self.matrix[self.departures[departure], self.arrivals[arrival]])
+        return cost if cost != float("inf") else None
+
+    def route(self, departure, arrival):
+        """(NavPoints desde la SID hasta la STAR, coste) o ([], None)"""
+        cost = self.cost(departure, arrival)
+        if cost is None:
+            return [], None
+        return self.predecessors.path(self.departures[departure], self.arrivals[arrival]), cost
+
+
+def _init_worker(arrays):
+    global _worker_graph
+    _worker_graph = NavGraph(*arrays)
+
+
+def _worker_rows(task):
+    return matrix_rows(_worker_graph, *task)
+
+
+def matrix_rows(graph, source_groups, target_groups, predecessors=False, weights=None):
+    """Filas de la matriz para varios orígenes: una búsqueda multi-destino por origen.
+
+    source_groups y target_groups son listas de listas de índices: un grupo
+    con varios nodos (p. ej. las SIDs o STARs de un aeropuerto) vale la
+    distancia mínima entre cualquiera de ellos. weights sustituye a los
+    pesos del grafo (inf en los segmentos que no se pueden usar).
+    """
+    flat_targets = np.fromiter((t for group in target_groups for t in group), dtype=np.int64)
+    starts = np.zeros(len(target_groups), dtype=np.int64)
+    np.cumsum([len(group) for group in target_groups[:-1]], out=starts[1:])
+    stop_at = set(flat_targets.tolist())
+
+    shape = (len(source_groups), len(target_groups))
+    rows = np.full(shape, np.inf)
+    preds = np.full((shape[0], graph.num_nodes), -1, dtype=np.int64) if predecessors else None
+    ends = np.full(shape, -1, dtype=np.int64) if predecessors else None
+    for r, group in enumerate(source_groups):
+        if not group:
+            continue
+        dist, pred = graph.dijkstra(group, stop_at=stop_at, weights=weights)
+        target_dist = dist[flat_targets]
+        rows[r] = np.minimum.reduceat(target_dist, starts)
+        if predecessors:
+            preds[r] = pred
+            # Nodo de cada grupo que da el mínimo (el primero si hay empate)
+            for j, start in enumerate(starts.tolist()):
+                if np.isfinite(rows[r, j]):
+                    size = len(target_groups[j])
+                    ends[r, j] = flat_targets[start + int(np.argmin(target_dist[start:start + size]))]
+    return rows, (preds, ends) if predecessors else None
+
+
+def distance_matrix(graph, source_groups, target_groups, workers=None, predecessors=False, weights=None):
+    """Matriz de distancias (len(sources) x len(targets)), con inf si no hay camino.
+
+    Los orígenes se reparten entre workers procesos (por defecto, uno por
+    CPU). weights sustituye a los pesos del grafo. Devuelve (matriz,
+    MatrixPredecessors) o (matriz, None) si no se piden los predecesores.
+    """
+    if not target_groups or any(not group for group in target_groups):
+        raise ValueError("Cada destino necesita al menos un punto")
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(source_groups))
+    if workers <= 1 or len(source_groups) < PARALLEL_MIN_SOURCES:
+        matrix, preds = matrix_rows(graph, source_groups, target_groups, predecessors, weights)
+        return matrix, MatrixPredecessors(*preds, graph.points) if predecessors else None
+
+    # Trozos contiguos de orígenes; cada proceso recibe una copia de los arrays del grafo
+    bounds = np.linspace(0, len(source_groups), workers + 1).astype(int)
+    chunks = [(source_groups[a:b], target_groups, predecessors) for a, b in zip(bounds, bounds[1:])]
+    arrays = {name: np.asarray(getattr(graph, name)) for name in NavGraph.ARRAYS}
+    if weights is not None:
+        arrays["weights"] = np.asarray(weights, dtype=np.float64)
+    arrays = tuple(arrays[name] for name in NavGraph.ARRAYS)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(arrays,)) as executor:
+        results = list(executor.map(_worker_rows, chunks))
+    matrix = np.vstack([rows for rows, _ in results])
+    if not predecessors:
+        return matrix, None
+    return matrix, MatrixPredecessors(np.vstack([p[0] for _, p in results]),
+                                      np.vstack([p[1] for _, p in results]), graph.points)
@@ -0,0 +1,155 @@
+from heapq import heappush, heappop
+
+from navGraph import haversine_km
+
+
+class IncrementalPlanner:
+    """Ruta entre dos puntos fijos que se repara al editar el grafo (LPA*).
+
+    Guarda para cada nodo g (coste con el que se expandió) y rhs (mejor
+    coste según sus predecesores). Un nodo con g != rhs está "inconsistente"
+    y va a la cola de prioridad. Al cerrar, añadir o cambiar un segmento solo
+    se recalcula rhs de su destino, y la búsqueda siguiente expande solo los
+    nodos cuyo coste ha cambiado de verdad, no todo el grafo otra vez.
+
+    Trabaja con su propia copia de la adyacencia (sucesores y predecesores),
+    que se edita con los mismos códigos de punto que usa el AirSpace.
+    """
+
+    def __init__(self, graph, start, goal, weights=None):
+        """start y goal son índices de graph (un NavGraph); weights sustituye a sus
+        pesos, y los segmentos con inf no se copian"""
+        inf = float("inf")
+        n = graph.num_nodes
+        offsets, targets, graph_weights = graph.lists()
+        if weights is None:
+            weights = graph_weights
+        self.points = list(graph.points)
+        self.position = {point.code: i for i, point in enumerate(self.points)}
+        self.succ = [dict() for _ in range(n)]
+        self.pred = [dict() for _ in range(n)]
+        for u in range(n):
+            for k in range(offsets[u], offsets[u + 1]):
+                v, w = targets[k], weights[k]
+                if w < self.succ[u].get(v, inf):
+                    self.succ[u][v] = w
+                    self.pred[v][u] = w
+
+        self.start = start
+        self.goal = goal
+        self.scale = graph.heuristic_scale
+        self.h = graph.heuristic_to(goal)
+        self.g = [inf] * n
+        self.rhs = [inf] * n
+        self.rhs[start] = 0.0
+        self._open = {}  # nodo inconsistente -> su clave actual
+        self._heap = []  # (clave, nodo); las entradas que no coinciden con _open están obsoletas
+        self._push(start)
+        self.expanded = 0  # Nodos expandidos en total
+        self.last_expanded = 0  # Nodos expandidos en la última búsqueda
+
+    def _key(self, u):
+        best = min(self.g[u], self.rhs[u])
+        return (best + self.h[u], best)
+
+    def _push(self, u):
+        key = self._key(u)
+        self._open[u] = key
+        heappush(self._heap, (key, u))
+
+    def _update_vertex(self, u):
+        if u != self.start:
+            self.rhs[u] = min((self.g[p] + w for p, w in self.pred[u].items()), default=float("inf"))
+        self._open.pop(u, None)
+        if self.g[u] != self.rhs[u]:
+            self._push(u)
+
+    def _compute(self):
+        g, rhs, goal = self.g, self.rhs, self.goal
+        heap, open_nodes = self._heap, self._open
+        expanded = 0
+        while heap:
+            key, u = heap[0]
+            if open_nodes.get(u) != key:
+                heappop(heap)  # Entrada obsoleta
+                continue
+            if key >= self._key(goal) and rhs[goal] == g[goal]:
+                break
+            heappop(heap)
+            del open_nodes[u]
+            expanded += 1
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]  # Se ha encontrado un camino mejor: se fija
+            else:
+                g[u] = float("inf")  # Su camino ha empeorado: se vuelve a calcular
+                self._update_vertex(u)
+            for v in self.succ[u]:
+                self._update_vertex(v)
+        self.last_expanded = expanded
+        self.expanded += expanded
+
+    def route(self):
+        """(lista de NavPoints, coste) de la ruta con el grafo actual, o ([], None)"""
+        self._compute()
+        cost = self.g[self.goal]
+        if cost == float("inf"):
+            return [], None
+        # Se recorre hacia atrás eligiendo el predecesor que da el coste de cada nodo
+        path = [self.goal]
+        current = self.goal
+        while current != self.start:
+            current = min(self.pred[current].items(), key=lambda item: self.g[item[0]] + item[1])[0]
+            path.append(current)
+            if len(path) > len(self.points):
+                return [], None
+        path.reverse()
+        return [self.points[i] for i in path], cost
+
+    def update_edge(self, origin, destination, weight=None):
+        """Segmento nuevo, cambiado o cerrado (weight None) entre dos códigos de punto"""
+        u, v = self.position[origin], self.position[destination]
+        if weight is None:
+            self.succ[u].pop(v, None)
+            self.pred[v].pop(u, None)
+        else:
+            self.succ[u][v] = weight
+            self.pred[v][u] = weight
+            straight = haversine_km(self.points[u].latitude, self.points[u].longitude,
+                                    self.points[v].latitude, self.points[v].longitude)
+            if straight > 0 and weight < self.scale * straight:
+                self._rescale(weight / straight)
+        self._update_vertex(v)
+
+    def _rescale(self, scale):
+        """Baja el factor de la heurística para que siga siendo consistente.
+
+        g y rhs no dependen de la heurística: basta con recalcular las claves
+        de los nodos de la cola.
+        """
+        factor = scale / self.scale if self.scale > 0 else 0.0
+        self.h = [h * factor for h in self.h]
+        self.scale = scale
+        self._heap = []
+        for u in list(self._open):
+            self._push(u)
+
+    def add_point(self, point):
+        """Punto nuevo, todavía sin segmentos"""
+        u = len(self.points)
+        self.points.append(point)
+        self.position[point.code] = u
+        self.succ.append({})
+        self.pred.append({})
+        goal = self.points[self.goal]
+        self.h.append(self.scale * haversine_km(point.latitude, point.longitude,
+                                                goal.latitude, goal.longitude))
+        self.g.append(float("inf"))
+        self.rhs.append(float("inf"))
+
+    def remove_point(self, code):
+        """Cierra todos los segmentos que salen o llegan al punto"""
+        u = self.position[code]
+        for v in list(self.succ[u]):
+            self.update_edge(code, self.points[v].code)
+        for p in list(self.pred[u]):
+            self.update_edge(self.points[p].code, code)
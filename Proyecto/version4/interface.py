@@ -3,21 +3,26 @@ from tkinter import ttk, filedialog, messagebox
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 from airSpace import AirSpace
+from airSpaceCache import AirSpaceCache
 from kml_generator import export_navpoints_to_kml, export_path_to_kml
 from PIL import Image, ImageTk
 import os
 import pygame
 from pygame import mixer
 import math
-from navSegment import NavSegment
 
 class AirspaceGUI:
     def __init__(self, master):
         self.master = master
         self.airspace = AirSpace()
         self.current_path = None
+        self.last_route_origin = None  # Origen de la última ruta (para reutilizar su árbol)
+        # Regiones ya cargadas (LRU); las demás se precargan en segundo plano
+        self.region_cache = AirSpaceCache("data", max_bytes=256 * 1024 * 1024, snapshot_dir="data/.snapshot")
+        self.current_region = None
         self.show_labels = tk.BooleanVar(value=False)
         self.hide_isolated = tk.BooleanVar(value=False)
+        self.hide_disconnected = tk.BooleanVar(value=False)
         self.fake_screen_frame = None
         self.is_hiding = False
         self.fake_label = None
@@ -70,12 +75,17 @@ class AirspaceGUI:
         self.dest_combo = ttk.Combobox(control_frame)
         self.dest_combo.pack()
 
+        # Autocompletado por prefijo mientras se escribe
+        self.origin_combo.bind("<KeyRelease>", lambda e: self.autocomplete_combo(self.origin_combo))
+        self.dest_combo.bind("<KeyRelease>", lambda e: self.autocomplete_combo(self.dest_combo))
+
         ttk.Button(control_frame, text="Mostrar Vecinos", command=self.show_neighbors).pack(pady=5)
         ttk.Button(control_frame, text="Ruta Más Corta", command=self.find_shortest_path).pack(pady=5)
         ttk.Button(control_frame, text="Exportar Puntos a KML", command=self.export_navpoints_kml).pack(pady=5)
         ttk.Button(control_frame, text="Exportar Ruta a KML", command=self.export_path_kml).pack(pady=5)
         ttk.Checkbutton(control_frame, text="Mostrar nombres", variable=self.show_labels, command=self.plot_airspace).pack(pady=5)
         ttk.Checkbutton(control_frame, text="Ocultar nodos sin vecinos", variable=self.hide_isolated, command=self.update_and_plot).pack(pady=5)
+        ttk.Checkbutton(control_frame, text="Ocultar componentes desconectadas", variable=self.hide_disconnected, command=self.update_and_plot).pack(pady=5)
         ttk.Button(control_frame, text="Limpiar Ruta", command=self.clear_path).pack(pady=5)
         ttk.Button(control_frame, text="💻 Irse del trabajo", command=self.toggle_fake_screen).pack(pady=5)
 
@@ -102,6 +112,8 @@ class AirspaceGUI:
         # Inicializar listas
         self.update_combos()
 
+        master.after(500, lambda: self.region_cache.preload(["Cat", "Spain", "Eur"]))
+
     def mostrar_imagen(self):
         image_path = os.path.join(os.path.dirname(__file__), "imagen grupazo.jpg")
         if os.path.exists(image_path):
@@ -174,17 +186,13 @@ class AirspaceGUI:
         self.stop_music()
         self.play_music()
     def load_airspace(self, region):
-        self.airspace = AirSpace()  # Reiniciar el objeto airspace
         self.current_path = None  # Limpiar la ruta actual
         self.origin_combo.set('')  # Limpiar combobox origen
         self.dest_combo.set('')
-        base_path = f"data/{region}_"
         try:
-            self.airspace.load_airspace_data(
-                f"{base_path}nav.txt",
-                f"{base_path}seg.txt",
-                f"{base_path}aer.txt"
-            )
+            # Sale de la caché si ya estaba cargada y los ficheros no han cambiado
+            self.airspace = self.region_cache.get(region)
+            self.current_region = region
             # Verificación de carga
             if not self.airspace.NavPoints:
                 raise ValueError("No se cargaron puntos de navegación")
@@ -192,7 +200,6 @@ class AirspaceGUI:
                 raise ValueError("No se cargaron segmentos")
 
             print(f"Cargados: {len(self.airspace.NavPoints)} puntos, {len(self.airspace.NavSegments)} segmentos")
-            self.airspace.print_connections()  # Depuración
 
             self.update_combos()
             self.plot_airspace()
@@ -236,19 +243,26 @@ class AirspaceGUI:
         self.origin_combo["values"] = nodes
         self.dest_combo["values"] = nodes
 
+    def visible_points(self):
+        """Puntos que se muestran según las casillas de ocultar"""
+        points = self.airspace.NavPoints
+        if self.hide_disconnected.get():
+            # Solo la componente conexa principal (índice de componentes del AirSpace)
+            points = self.airspace.main_component()
+        if self.hide_isolated.get():
+            points = [p for p in points if p.neighbors]
+        return points
+
     def plot_airspace(self):
         self.ax.clear()
 
-        nodes_to_plot = []
-        for point in self.airspace.NavPoints:
-            if self.hide_isolated.get() and not point.neighbors:
-                continue
-            nodes_to_plot.append(point)
+        nodes_to_plot = self.visible_points()
+        visible = set(nodes_to_plot)
 
         # Dibujar segmentos (rutas)
         for point in nodes_to_plot:
             for neighbor, distance in point.get_neighbors():
-                if neighbor in nodes_to_plot:
+                if neighbor in visible:
                     self.ax.plot(
                         [point.longitude, neighbor.longitude],
                         [point.latitude, neighbor.latitude],
@@ -447,8 +461,12 @@ class AirspaceGUI:
             print(f"Origen encontrado: {origin_node.name} (ID: {origin_node.code})")
             print(f"Destino encontrado: {dest_node.name} (ID: {dest_node.code})")
 
-            # Buscar ruta
-            path, cost = self.airspace.find_shortest_path(origin_code, dest_code)
+            # Buscar ruta; si solo ha cambiado el destino se reutiliza el árbol de caminos del origen
+            if origin_node is self.last_route_origin:
+                path, cost = self.airspace.shortest_path_tree(origin_node).route(dest_node)
+            else:
+                path, cost = self.airspace.find_shortest_path(origin_code, dest_code)
+            self.last_route_origin = origin_node
 
             # Depuración
             print(f"Resultado de búsqueda: path={path}, cost={cost}")
@@ -504,13 +522,9 @@ class AirspaceGUI:
             tk.messagebox.showerror("Error", f"No se pudo exportar: {str(e)}")
 
     def update_combos(self):
-        nodes = []
-        for p in self.airspace.NavPoints:
-            if self.hide_isolated.get() and not p.neighbors:
-                continue
-            display_text = f"{p.name} ({p.code})"
-            nodes.append(display_text)
+        nodes = [f"{p.name} ({p.code})" for p in self.visible_points()]
 
+        self.node_values = nodes
         self.origin_combo["values"] = nodes
         self.dest_combo["values"] = nodes
 
@@ -525,6 +539,21 @@ class AirspaceGUI:
                 self.segment_listbox.insert(tk.END, f"{seg.origin} -> {seg.destination}")
 
 
+    def autocomplete_combo(self, combo):
+        """Filtra las opciones del combo con los nodos cuyo nombre empieza por el texto escrito"""
+        text = combo.get().strip()
+        if not text:
+            combo["values"] = self.node_values
+            return
+
+        matches = self.airspace.find_navpoints_by_prefix(text, limit=50) or \
+            self.airspace.find_navpoints_by_prefix(text.upper(), limit=50)
+        main = set(self.airspace.main_component()) if self.hide_disconnected.get() else None
+        combo["values"] = [
+            f"{p.name} ({p.code})" for p in matches
+            if not (self.hide_isolated.get() and not p.neighbors) and (main is None or p in main)
+        ]
+
     def draw_current_path(self, path):
         lons = [p.longitude for p in path]
         lats = [p.latitude for p in path]
@@ -700,10 +729,16 @@ class AirspaceGUI:
 
     def new_graph(self):
         self.airspace = AirSpace()
+        self.current_region = None
         self.current_path = None
         self.update_and_plot()
         tk.messagebox.showinfo("Nuevo grafo", "Se ha creado un nuevo grafo vacío.")
 
+    def forget_edited_region(self):
+        """El AirSpace actual ya no coincide con los ficheros: sacarlo de la caché"""
+        if self.current_region is not None:
+            self.region_cache.discard(self.current_region)
+
     def add_node_dialog(self):
         dialog = tk.Toplevel(self.master)
         dialog.title("Añadir Nodo")
@@ -738,6 +773,7 @@ class AirspaceGUI:
                     return
 
                 self.airspace.add_navpoint(name, name, lat, lon)  # Usar el mismo nombre como código
+                self.forget_edited_region()
                 dialog.destroy()
                 self.update_and_plot()
                 tk.messagebox.showinfo("Éxito", f"Nodo '{name}' añadido correctamente.")
@@ -775,6 +811,7 @@ class AirspaceGUI:
             point = self.airspace.get_navpoint_by_name_or_id(code)
             if point:
                 self.airspace.remove_navpoint(point.code)  # Usar el ID real del punto
+                self.forget_edited_region()
                 self.update_and_plot()
                 tk.messagebox.showinfo("Éxito", f"Nodo eliminado correctamente.")
             else:
@@ -928,15 +965,16 @@ class AirspaceGUI:
                 print(f"DEBUG: Añadiendo segmento - Distancia: {distance:.2f} km")
 
                 # Añadir el segmento
+                segments = [(origin.code, dest.code, distance)]
                 if bidirectional_var.get():
                     # Conexión bidireccional
-                    self.airspace.add_segment(origin.code, dest.code, distance)
+                    segments.append((dest.code, origin.code, distance))
                     success_msg = f"Segmento bidireccional añadido:\n{origin.name} ↔ {dest.name}\nDistancia: {distance:.2f} km"
                 else:
                     # Conexión unidireccional (solo añadir neighbor en una dirección)
-                    origin.add_neighbor((dest, distance))
-                    self.airspace.NavSegments.append(NavSegment(origin.code, dest.code, distance))
                     success_msg = f"Segmento unidireccional añadido:\n{origin.name} → {dest.name}\nDistancia: {distance:.2f} km"
+                self.airspace.add_segments_bulk(segments)
+                self.forget_edited_region()
 
                 dialog.destroy()
                 self.update_and_plot()
@@ -956,32 +994,15 @@ class AirspaceGUI:
 
     def add_segment(self, origin_code, dest_code, distance):
         """Añade un segmento bidireccional entre dos nodos"""
-        origin = self.get_navpoint_by_name_or_id(origin_code)
-        dest = self.get_navpoint_by_name_or_id(dest_code)
+        origin = self.airspace.get_navpoint_by_name_or_id(origin_code)
+        dest = self.airspace.get_navpoint_by_name_or_id(dest_code)
 
         if not origin or not dest:
             raise ValueError(f"Nodo no encontrado: origen={origin_code}, destino={dest_code}")
 
-        print(f"DEBUG add_segment: {origin.name} -> {dest.name}, distancia: {distance}")
-
-        # Eliminar conexiones existentes si las hay
-        origin.neighbors = [(n, d) for n, d in origin.neighbors if n.code != dest.code]
-        dest.neighbors = [(n, d) for n, d in dest.neighbors if n.code != origin.code]
-
-        # Añadir nuevas conexiones bidireccionales
-        origin.add_neighbor((dest, distance))
-        dest.add_neighbor((origin, distance))
-
-        # Eliminar segmentos existentes entre estos nodos
-        self.NavSegments = [s for s in self.NavSegments
-                            if not ((s.origin == origin.code and s.destination == dest.code) or
-                                    (s.origin == dest.code and s.destination == origin.code))]
-
-        # Añadir nuevos segmentos (bidireccionales)
-        self.NavSegments.append(NavSegment(origin.code, dest.code, distance))
-        self.NavSegments.append(NavSegment(dest.code, origin.code, distance))
-
-        print(f"DEBUG: Segmento añadido. Vecinos de {origin.name}: {len(origin.neighbors)}")
+        # El AirSpace reemplaza la conexión anterior y mantiene sus cachés al día
+        self.airspace.add_segment(origin.code, dest.code, distance)
+        self.forget_edited_region()
 
     def remove_selected_segment(self):
         """Elimina el segmento seleccionado de la lista"""
@@ -1024,6 +1045,13 @@ class AirspaceGUI:
 
             # Llamar al método de eliminación
             self.airspace.remove_segment(origin_code, dest_code)
+            self.forget_edited_region()
+            if self.current_path:
+                # Replanificar la ruta activa: solo se repara la parte afectada por el cierre
+                path, cost = self.airspace.replan_route(self.current_path[0], self.current_path[-1])
+                self.current_path = path or None
+                if cost is not None:
+                    print(f"Ruta activa replanificada: {cost:.2f} km")
             self.update_and_plot()
             tk.messagebox.showinfo("Éxito", "Segmento eliminado correctamente.")
 
@@ -1121,17 +1149,8 @@ class AirspaceGUI:
             tk.messagebox.showerror("Error", "Nodo no encontrado")
             return
 
-        # Usar BFS para encontrar todos los nodos alcanzables
-        visited = set()
-        queue = [start_node]
-        visited.add(start_node)
-
-        while queue:
-            current_node = queue.pop(0)
-            for neighbor, _ in current_node.get_neighbors():
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append(neighbor)
+        # Alcanzables según el índice de componentes del AirSpace (sin recorrer el grafo)
+        visited = self.airspace.reachable_from(start_node.code)
 
         # Preparar la lista de nodos alcanzables
         reachable_nodes = sorted([node.name for node in visited])
@@ -0,0 +1,97 @@
+from heapq import heappush, heappop
+
+
+def path_edges(graph, path, weights=None):
+    """Posición (en weights) del segmento más corto entre cada par de nodos del camino"""
+    if weights is None:
+        _, _, weights = graph.lists()
+    return [min(graph.edge_positions(u, v), key=weights.__getitem__) for u, v in zip(path, path[1:])]
+
+
+def yen_k_shortest(graph, start, goal, k, heuristic=None, weights=None):
+    """Los k caminos simples más cortos de start a goal (algoritmo de Yen).
+
+    Con la mejora de Lawler: las desviaciones de un camino solo se buscan a
+    partir del nodo en el que él mismo se desvió de su padre, porque las
+    anteriores ya se exploraron. Cada desviación es un A* con la misma
+    heurística hacia goal y los pesos de los segmentos prohibidos a inf.
+    weights sustituye a los pesos del grafo (inf en los segmentos que no se
+    pueden usar). Devuelve una lista de (índices, coste) ordenada por coste.
+    """
+    offsets, _, graph_weights = graph.lists()
+    if weights is None:
+        weights = graph_weights
+    path, cost = graph.astar(start, goal, heuristic, weights=weights)
+    if not path:
+        return []
+    inf = float("inf")
+    accepted = [(path, cost, 0)]  # (camino, coste, índice de desviación)
+    candidates = []
+    seen = {tuple(path)}
+    while len(accepted) < k:
+        last, _, deviation = accepted[-1]
+        root_cost = sum(weights[e] for e in path_edges(graph, last[:deviation + 1], weights))
+        for i in range(deviation, len(last) - 1):
+            spur = last[i]
+            root = last[:i + 1]
+            blocked = list(weights)
+            # Segmentos que ya siguen los caminos aceptados con esta misma raíz
+            for other, _, _ in accepted:
+                if other[:i + 1] == root:
+                    for e in graph.edge_positions(spur, other[i + 1]):
+                        blocked[e] = inf
+            # Los nodos de la raíz no se pueden volver a recorrer (caminos simples)
+            for node in root[:-1]:
+                for e in range(offsets[node], offsets[node + 1]):
+                    blocked[e] = inf
+            spur_path, spur_cost = graph.astar(spur, goal, heuristic, weights=blocked)
+            if spur_path:
+                candidate = root[:-1] + spur_path
+                key = tuple(candidate)
+                if key not in seen:
+                    seen.add(key)
+                    heappush(candidates, (root_cost + spur_cost, len(candidate), candidate, i))
+            root_cost += min(weights[e] for e in graph.edge_positions(spur, last[i + 1]))
+        if not candidates:
+            break
+        cost, _, path, deviation = heappop(candidates)
+        accepted.append((path, cost, deviation))
+    return [(path, cost) for path, cost, _ in accepted]
+
+
+def penalty_alternatives(graph, start, goal, k, heuristic=None, penalty=0.5, max_overlap=0.8,
+                         max_iterations=None, weights=None):
+    """Hasta k rutas alternativas diversas por el método de penalización.
+
+    Tras cada búsqueda los segmentos de la ruta encontrada pasan a pesar
+    (1 + penalty) veces más, así que la siguiente búsqueda tiende a evitarlos.
+    Una ruta se acepta si comparte como mucho max_overlap de su longitud con
+    cada una de las ya aceptadas. Es mucho más barato que Yen para k grande,
+    pero no garantiza que sean las k más cortas. weights sustituye a los
+    pesos del grafo, como en yen_k_shortest. Devuelve (índices, coste real)
+    ordenados por coste.
+    """
+    if weights is None:
+        _, _, weights = graph.lists()
+    max_iterations = max_iterations or 4 * k
+    penalized = list(weights)
+    accepted = []
+    seen = set()
+    for _ in range(max_iterations):
+        path, _ = graph.astar(start, goal, heuristic, weights=penalized)
+        if not path:
+            break
+        edges = path_edges(graph, path, weights)
+        if tuple(path) not in seen:
+            seen.add(tuple(path))
+            length = sum(weights[e] for e in edges)
+            edge_set = set(edges)
+            if all(sum(weights[e] for e in edge_set & other) <= max_overlap * length
+                   for _, _, other in accepted):
+                accepted.append((path, length, edge_set))
+                if len(accepted) == k:
+                    break
+        for e in edges:
+            penalized[e] *= 1 + penalty
+    accepted.sort(key=lambda route: route[1])
+    return [(path, cost) for path, cost, _ in accepted]
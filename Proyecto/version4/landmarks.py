@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+class LandmarkIndex:
+    """Precálculo ALT (A*, Landmarks, desigualdad triangular) sobre un NavGraph.
+
+    Para cada landmark L se guardan las distancias d(L, v) y d(v, L) a todos
+    los nodos. Por la desigualdad triangular, para un destino t:
+
+        d(v, t) >= d(L, t) - d(L, v)    y    d(v, t) >= d(v, L) - d(t, L)
+
+    y el máximo de estas cotas sobre todos los landmarks es una heurística
+    consistente, normalmente mucho más ajustada que la ortodrómica.
+    """
+
+    def __init__(self, graph, landmarks, from_landmarks, to_landmarks):
+        self.graph = graph
+        self.landmarks = landmarks  # índices de los nodos elegidos
+        self.from_landmarks = from_landmarks  # (K, N): d(L, v)
+        self.to_landmarks = to_landmarks  # (K, N): d(v, L)
+
+    @classmethod
+    def build(cls, graph, count=16, method="planar"):
+        """Elige count landmarks y precalcula las distancias desde y hacia cada uno.
+
+        method="planar" reparte el plano en count sectores alrededor del centro
+        y toma el nodo más alejado de cada sector (da cotas más ajustadas en
+        estos datos); method="farthest" usa selección del punto más lejano en
+        distancia por el grafo. Si faltan landmarks se completa con esta última.
+        """
+        if method not in ("planar", "farthest"):
+            raise ValueError(f"Unknown landmark selection method: {method}")
+        reverse = graph.reversed()
+        landmarks = []
+        from_rows = []
+        to_rows = []
+
+        # Solo sirven como landmark los nodos con algún segmento
+        in_degree = np.bincount(graph.targets, minlength=graph.num_nodes)
+        connected = (np.diff(graph.offsets) > 0) | (in_degree > 0)
+        count = min(count, int(connected.sum()))
+        if not count:
+            return cls(graph, np.zeros(0, dtype=np.int64),
+                       np.zeros((0, graph.num_nodes)), np.zeros((0, graph.num_nodes)))
+
+        center = np.argmin(np.hypot(graph.lat - graph.lat.mean(), graph.lon - graph.lon.mean()))
+        straight = graph.great_circle_to(center)
+        if method == "planar":
+            angle = np.arctan2(graph.lat - graph.lat[center], graph.lon - graph.lon[center])
+            sector = ((angle + np.pi) / (2 * np.pi) * count).astype(np.int64) % count
+            for s in range(count):
+                mask = connected & (sector == s)
+                if mask.any():
+                    landmarks.append(int(np.flatnonzero(mask)[np.argmax(straight[mask])]))
+        else:
+            # Primer landmark: el nodo más alejado (en línea recta) del centro del grafo
+            landmarks.append(int(np.argmax(np.where(connected, straight, -1.0))))
+
+        closest = np.full(graph.num_nodes, np.inf)  # distancia al landmark más cercano
+        while len(from_rows) < len(landmarks):
+            landmark = landmarks[len(from_rows)]
+            connected[landmark] = False
+            from_row, _ = graph.dijkstra([landmark])
+            to_row, _ = reverse.dijkstra([landmark])
+            from_rows.append(from_row)
+            to_rows.append(to_row)
+            closest = np.fmin(closest, np.fmin(from_row, to_row))
+            if len(from_rows) < len(landmarks) or len(landmarks) == count:
+                continue
+
+            # Siguiente: el nodo (alcanzable en algún sentido) más lejano de los elegidos
+            reachable = np.isfinite(closest) & connected
+            if reachable.any():
+                landmarks.append(int(np.flatnonzero(reachable)[np.argmax(closest[reachable])]))
+            elif connected.any():
+                # Componente agotada: se salta al nodo más lejano de otra componente
+                landmarks.append(int(np.argmax(np.where(connected, graph.great_circle_to(landmarks[0]), -1.0))))
+
+        return cls(graph, np.array(landmarks, dtype=np.int64), np.array(from_rows), np.array(to_rows))
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def heuristic_array(self, goal):
+        """Cota inferior de d(v, goal) para todos los nodos v, como array"""
+        if not len(self.landmarks):
+            return np.zeros(self.graph.num_nodes)
+        with np.errstate(invalid="ignore"):
+            forward = self.from_landmarks[:, goal][:, None] - self.from_landmarks
+            backward = self.to_landmarks - self.to_landmarks[:, goal][:, None]
+        # inf - inf no aporta información (nan): se ignora con fmax
+        bound = np.fmax(np.fmax.reduce(forward, axis=0), np.fmax.reduce(backward, axis=0))
+        return np.maximum(np.nan_to_num(bound, nan=0.0, posinf=np.inf), 0.0)
+
+    def heuristic_to(self, goal):
+        """Heurística ALT combinada con la ortodrómica (el máximo de las dos), como lista"""
+        geometric = self.graph.great_circle_to(goal) * self.graph.heuristic_scale
+        return np.maximum(self.heuristic_array(goal), geometric).tolist()
+
+    def save(self, directory):
+        """Guarda el precálculo junto a la huella del grafo para el que se calculó"""
+        tmp_dir = f"{directory}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, "landmarks.npy"), self.landmarks)
+        np.save(os.path.join(tmp_dir, "from_landmarks.npy"), self.from_landmarks)
+        np.save(os.path.join(tmp_dir, "to_landmarks.npy"), self.to_landmarks)
+        with open(os.path.join(tmp_dir, "header.json"), "w", encoding="utf-8") as f:
+            json.dump({"graph": self.graph.fingerprint(), "count": len(self.landmarks)}, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)  # Otro proceso lo ha guardado antes
+
+    @classmethod
+    def load(cls, directory, graph):
+        """Carga un precálculo guardado, o None si no existe o es de otro grafo"""
+        try:
+            with open(os.path.join(directory, "header.json"), encoding="utf-8") as f:
+                header = json.load(f)
+            if header.get("graph") != graph.fingerprint():
+                return None
+            arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                      for name in ("landmarks", "from_landmarks", "to_landmarks")]
+        except (OSError, ValueError):
+            return None
+        return cls(graph, *arrays)
@@ -0,0 +1,41 @@
+from bisect import bisect_left, insort
+
+
+class NamePrefixIndex:
+    """Índice ordenado de nombres para búsquedas por prefijo en O(log n)"""
+
+    def __init__(self, items=()):
+        self._points = dict(items)  # nombre -> NavPoint
+        self._names = sorted(self._points)
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name, point):
+        if name not in self._points:
+            insort(self._names, name)
+        self._points[name] = point
+
+    def remove(self, name):
+        if self._points.pop(name, None) is not None:
+            i = bisect_left(self._names, name)
+            del self._names[i]
+
+    def first(self, prefix):
+        """Primer punto (por orden alfabético) cuyo nombre empieza por prefix"""
+        i = bisect_left(self._names, prefix)
+        if i < len(self._names) and self._names[i].startswith(prefix):
+            return self._points[self._names[i]]
+        return None
+
+    def search(self, prefix, limit=None):
+        """Lista de (nombre, NavPoint) que empiezan por prefix, en orden alfabético"""
+        result = []
+        i = bisect_left(self._names, prefix)
+        while i < len(self._names) and self._names[i].startswith(prefix):
+            if limit is not None and len(result) >= limit:
+                break
+            name = self._names[i]
+            result.append((name, self._points[name]))
+            i += 1
+        return result
@@ -0,0 +1,467 @@
+import hashlib
+from collections import deque
+from heapq import heappush, heappop
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia ortodrómica en km; acepta números o arrays de NumPy (en grados)"""
+    lat1, lon1, lat2, lon2 = np.radians(lat1), np.radians(lon1), np.radians(lat2), np.radians(lon2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class NavGraph:
+    """Grafo del espacio aéreo guardado en arrays contiguos (formato CSR).
+
+    Los vecinos del nodo i son targets[offsets[i]:offsets[i + 1]] con las
+    distancias weights[offsets[i]:offsets[i + 1]].
+    """
+
+    ARRAYS = ("ids", "names", "lat", "lon", "offsets", "targets", "weights")
+
+    def __init__(self, ids, names, lat, lon, offsets, targets, weights):
+        self.ids = ids
+        self.names = names
+        self.lat = lat
+        self.lon = lon
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        # Índice inverso: ID del punto -> posición en los arrays
+        self.index = {code: i for i, code in enumerate(ids.tolist())}
+        # NavPoint asociado a cada posición (lo asigna el AirSpace propietario)
+        self.points = None
+        self._lists = None
+        self._radians = None
+        self._heuristic_scale = None
+        self._reverse = None
+        self._fingerprint = None
+        self._costs = {}  # clave de modelo de coste -> (pesos como lista, factor de heurística)
+
+    @property
+    def num_nodes(self):
+        return len(self.ids)
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    @classmethod
+    def from_airspace(cls, airspace):
+        """Construye los arrays a partir de los NavPoint de un AirSpace"""
+        points = airspace.NavPoints
+        position = {point: i for i, point in enumerate(points)}
+
+        degrees = np.zeros(len(points), dtype=np.int64)
+        targets = []
+        weights = []
+        for i, point in enumerate(points):
+            for neighbor, distance in point.neighbors:
+                j = position.get(neighbor)
+                if j is None:
+                    continue  # Vecino que ya no forma parte del espacio aéreo
+                targets.append(j)
+                weights.append(distance)
+                degrees[i] += 1
+
+        offsets = np.zeros(len(points) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=offsets[1:])
+
+        graph = cls(
+            np.fromiter((p.code for p in points), dtype=np.int64, count=len(points)),
+            np.array([p.name for p in points], dtype=str),
+            np.fromiter((p.latitude for p in points), dtype=np.float64, count=len(points)),
+            np.fromiter((p.longitude for p in points), dtype=np.float64, count=len(points)),
+            offsets,
+            np.array(targets, dtype=np.int64),
+            np.array(weights, dtype=np.float64),
+        )
+        graph.points = list(points)
+        return graph
+
+    def neighbors_of(self, i):
+        """Devuelve (targets, weights) del nodo i sin copiar los arrays"""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.targets[start:end], self.weights[start:end]
+
+    def reversed(self):
+        """Grafo traspuesto (mismos nodos, segmentos al revés), calculado una sola vez"""
+        if self._reverse is None:
+            origins = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.offsets))
+            order = np.argsort(self.targets, kind="stable")
+            offsets = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.targets, minlength=self.num_nodes), out=offsets[1:])
+            reverse = NavGraph(self.ids, self.names, self.lat, self.lon,
+                               offsets, origins[order], self.weights[order])
+            reverse.index = self.index
+            reverse.points = self.points
+            reverse._radians = self._radians
+            reverse._reverse = self
+            self._reverse = reverse
+        return self._reverse
+
+    def fingerprint(self):
+        """Huella SHA-1 de la estructura del grafo, para invalidar datos precalculados"""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for array in (self.ids, self.offsets, self.targets, self.weights):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def lists(self):
+        """Copia de offsets/targets/weights como listas de Python.
+
+        Los bucles de búsqueda son código Python puro, y leer un elemento de
+        una lista es bastante más rápido que leerlo de un array de NumPy.
+        """
+        if self._lists is None:
+            self._lists = (self.offsets.tolist(), self.targets.tolist(), self.weights.tolist())
+        return self._lists
+
+    def radians(self):
+        """(lat, lon, cos(lat)) de todos los nodos en radianes, calculados una sola vez"""
+        if self._radians is None:
+            lat = np.radians(self.lat)
+            self._radians = (lat, np.radians(self.lon), np.cos(lat))
+        return self._radians
+
+    def great_circle_to(self, goal):
+        """Array con la distancia ortodrómica (km) de cada nodo al nodo goal"""
+        lat, lon, cos_lat = self.radians()
+        a = (np.sin((lat - lat[goal]) / 2) ** 2 +
+             cos_lat * cos_lat[goal] * np.sin((lon - lon[goal]) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    @property
+    def heuristic_scale(self):
+        """Factor <= 1 que convierte la distancia ortodrómica en una cota inferior.
+
+        Las distancias de *_seg.txt no salen exactamente de la misma fórmula
+        (algunas son un 0,2 % más cortas que la ortodrómica). Con el menor
+        cociente peso / ortodrómica de todos los segmentos, scale * ortodrómica
+        nunca supera el peso de un segmento, así que la heurística es
+        consistente y A* sigue devolviendo el camino óptimo.
+        """
+        if self._heuristic_scale is None:
+            self._heuristic_scale = min(self._min_ratio(self.weights), 1.0)
+        return self._heuristic_scale
+
+    def _min_ratio(self, weights):
+        """Menor cociente peso / ortodrómica de los segmentos (1.0 si no hay ninguno)"""
+        origins = np.repeat(np.arange(self.num_nodes), np.diff(self.offsets))
+        straight = haversine_km(self.lat[origins], self.lon[origins],
+                                self.lat[self.targets], self.lon[self.targets])
+        valid = straight > 0
+        ratios = weights[valid] / straight[valid]
+        ratios = ratios[np.isfinite(ratios)]  # Segmentos que el modelo no deja usar
+        return float(max(ratios.min(), 0.0)) if len(ratios) else 1.0
+
+    def cost_weights(self, model):
+        """(pesos como lista, factor de heurística) de un modelo de coste (ver costModels).
+
+        Se calculan una vez por grafo y por clave del modelo: cambiar de
+        modelo es una pasada vectorizada, y la búsqueda usa directamente la
+        lista. scale * ortodrómica es cota inferior del coste de cada
+        segmento, igual que heuristic_scale para la distancia.
+        """
+        cached = self._costs.get(model.key)
+        if cached is None:
+            weights = np.asarray(model.weights(self), dtype=np.float64)
+            cached = (weights.tolist(), self._min_ratio(weights))
+            self._costs[model.key] = cached
+        return cached
+
+    def heuristic_to(self, goal, scale=None):
+        """Heurística admisible de A* hacia goal para todos los nodos, como lista.
+
+        Por defecto en km; con el scale de cost_weights, en las unidades de ese modelo.
+        """
+        if scale is None:
+            scale = self.heuristic_scale
+        return (self.great_circle_to(goal) * scale).tolist()
+
+    def heuristic_to_any(self, goals):
+        """Heurística hacia el más cercano de varios destinos (mínimo de las de cada uno)"""
+        straight = np.min([self.great_circle_to(goal) for goal in goals], axis=0)
+        return (straight * self.heuristic_scale).tolist()
+
+    def multi_astar(self, sources, goals, heuristic=None, stats=None, weights=None):
+        """A* desde varios orígenes a la vez hasta el primero de varios destinos.
+
+        Equivale a buscar el mejor par (origen, destino) de todas las
+        combinaciones con una sola búsqueda. heuristic debe ser válida para
+        todos los destinos (ver heuristic_to_any). weights sustituye a los
+        pesos del grafo, como en astar. Devuelve (índices, coste) o ([], None).
+        """
+        offsets, targets, graph_weights = self.lists()
+        if weights is None:
+            weights = graph_weights
+        if heuristic is None:
+            heuristic = [0.0] * self.num_nodes
+        goals = set(goals)
+
+        dist = {}
+        came_from = {}
+        frontier = []
+        for source in sources:
+            dist[source] = 0.0
+            came_from[source] = -1
+            heappush(frontier, (heuristic[source], 0.0, source))
+        expanded = 0
+        while frontier:
+            _, cost, current = heappop(frontier)
+            if cost > dist[current]:
+                continue  # Entrada obsoleta del heap
+            if current in goals:
+                if stats is not None:
+                    stats["expanded"] = expanded
+                return self.reconstruct(came_from, current), cost
+            expanded += 1
+            for k in range(offsets[current], offsets[current + 1]):
+                nxt = targets[k]
+                new_cost = cost + weights[k]
+                if new_cost < dist.get(nxt, float("inf")):
+                    dist[nxt] = new_cost
+                    came_from[nxt] = current
+                    heappush(frontier, (new_cost + heuristic[nxt], new_cost, nxt))
+        if stats is not None:
+            stats["expanded"] = expanded
+        return [], None
+
+    def astar(self, start, goal, heuristic=None, stats=None, weights=None):
+        """A* entre dos índices. heuristic es una lista con h(i) para cada nodo.
+
+        Devuelve (lista de índices, coste) o ([], None) si no hay camino. Si se
+        pasa un dict en stats, se guarda en stats["expanded"] el número de
+        nodos expandidos. weights sustituye a los pesos del grafo (una lista
+        por segmento, inf para no usarlo); la heurística tiene que ser una
+        cota inferior con esos pesos (basta con que solo los suban, o con la
+        de heuristic_to con el scale de cost_weights).
+        """
+        offsets, targets, graph_weights = self.lists()
+        if weights is None:
+            weights = graph_weights
+        if heuristic is None:
+            heuristic = [0.0] * self.num_nodes
+
+        dist = {start: 0.0}
+        came_from = {start: -1}
+        frontier = [(heuristic[start], 0.0, start)]
+        expanded = 0
+        while frontier:
+            _, cost, current = heappop(frontier)
+            if current == goal:
+                if stats is not None:
+                    stats["expanded"] = expanded
+                return self.reconstruct(came_from, goal), cost
+            if cost > dist[current]:
+                continue  # Entrada obsoleta del heap
+            expanded += 1
+            for k in range(offsets[current], offsets[current + 1]):
+                nxt = targets[k]
+                new_cost = cost + weights[k]
+                if new_cost < dist.get(nxt, float("inf")):
+                    dist[nxt] = new_cost
+                    came_from[nxt] = current
+                    heappush(frontier, (new_cost + heuristic[nxt], new_cost, nxt))
+        if stats is not None:
+            stats["expanded"] = expanded
+        return [], None
+
+    def bidirectional_potential(self, start, goal):
+        """Potencial para A* bidireccional: (h_goal(v) - h_start(v)) / 2, como lista.
+
+        Con el mismo potencial (cambiado de signo en la búsqueda hacia atrás)
+        los costes reducidos de los dos lados coinciden, así que el criterio
+        de parada de Dijkstra bidireccional sigue siendo válido.
+        """
+        scale = self.heuristic_scale / 2
+        return ((self.great_circle_to(goal) - self.great_circle_to(start)) * scale).tolist()
+
+    def bidirectional(self, start, goal, potential=None, stats=None):
+        """Dijkstra bidireccional (o A* si se pasa un potencial, ver bidirectional_potential).
+
+        Busca a la vez hacia delante desde start y hacia atrás desde goal por
+        el grafo traspuesto, y para cuando la suma de los mínimos de las dos
+        colas ya no puede mejorar el mejor camino encontrado. Mismo resultado
+        que astar().
+        """
+        offsets, targets, weights = self.lists()
+        r_offsets, r_targets, r_weights = self.reversed().lists()
+        sides = ((offsets, targets, weights), (r_offsets, r_targets, r_weights))
+        sign = (1.0, -1.0)
+        if potential is None:
+            potential = [0.0] * self.num_nodes
+
+        inf = float("inf")
+        dist = ({start: 0.0}, {goal: 0.0})
+        came_from = ({start: -1}, {goal: -1})
+        frontiers = ([(potential[start], 0.0, start)], [(-potential[goal], 0.0, goal)])
+        best = 0.0 if start == goal else inf
+        meeting = start if start == goal else -1
+        expanded = 0
+        while frontiers[0] and frontiers[1]:
+            if frontiers[0][0][0] + frontiers[1][0][0] >= best:
+                break
+            # Se avanza por el lado con la cola más pequeña
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            _, cost, current = heappop(frontiers[side])
+            if cost > dist[side][current]:
+                continue  # Entrada obsoleta del heap
+            expanded += 1
+            s_offsets, s_targets, s_weights = sides[side]
+            other = dist[1 - side]
+            for k in range(s_offsets[current], s_offsets[current + 1]):
+                nxt = s_targets[k]
+                new_cost = cost + s_weights[k]
+                if new_cost < dist[side].get(nxt, inf):
+                    dist[side][nxt] = new_cost
+                    came_from[side][nxt] = current
+                    heappush(frontiers[side], (new_cost + sign[side] * potential[nxt], new_cost, nxt))
+                    if nxt in other and new_cost + other[nxt] < best:
+                        best = new_cost + other[nxt]
+                        meeting = nxt
+
+        if stats is not None:
+            stats["expanded"] = expanded
+        if meeting == -1:
+            return [], None
+        path = self.reconstruct(came_from[0], meeting)
+        current = came_from[1][meeting]
+        while current != -1:
+            path.append(current)
+            current = came_from[1][current]
+        return path, best
+
+    def edge_positions(self, origin, target):
+        """Posiciones en targets/weights de los segmentos origin -> target"""
+        offsets, targets, _ = self.lists()
+        return [k for k in range(offsets[origin], offsets[origin + 1]) if targets[k] == target]
+
+    def dijkstra(self, sources, stop_at=None, weights=None):
+        """Dijkstra desde uno o varios índices de origen.
+
+        Devuelve (dist, pred) como arrays: dist es inf en los nodos no
+        alcanzables y pred es -1 en los orígenes y en los no alcanzables.
+        Con stop_at (índices de destino) la búsqueda para en cuanto todos
+        están asentados; entonces solo sus valores (y sus caminos) son finales.
+        weights sustituye a los pesos del grafo, como en astar.
+        """
+        offsets, targets, graph_weights = self.lists()
+        if weights is None:
+            weights = graph_weights
+        inf = float("inf")
+        dist = [inf] * self.num_nodes
+        pred = [-1] * self.num_nodes
+        frontier = []
+        for source in sources:
+            dist[source] = 0.0
+            frontier.append((0.0, source))
+        frontier.sort()
+        pending = set(stop_at) if stop_at is not None else None
+        while frontier:
+            cost, current = heappop(frontier)
+            if cost > dist[current]:
+                continue  # Entrada obsoleta del heap
+            if pending is not None:
+                pending.discard(current)
+                if not pending:
+                    break
+            for k in range(offsets[current], offsets[current + 1]):
+                nxt = targets[k]
+                new_cost = cost + weights[k]
+                if new_cost < dist[nxt]:
+                    dist[nxt] = new_cost
+                    pred[nxt] = current
+                    heappush(frontier, (new_cost, nxt))
+        return np.array(dist, dtype=np.float64), np.array(pred, dtype=np.int64)
+
+    def shortest_path_tree(self, origin, weights=None):
+        """Dijkstra completo desde origin (con weights en vez de los pesos del grafo), como ShortestPathTree"""
+        dist, pred = self.dijkstra([origin], weights=weights)
+        return ShortestPathTree(self, origin, dist, pred.astype(np.int32))
+
+    @staticmethod
+    def path_from_pred(pred, goal):
+        """Camino hasta goal a partir de un array pred de dijkstra() (goal debe ser alcanzable)"""
+        path = []
+        current = int(goal)
+        while current != -1:
+            path.append(current)
+            current = int(pred[current])
+        path.reverse()
+        return path
+
+    @staticmethod
+    def reconstruct(came_from, goal):
+        path = []
+        current = goal
+        while current != -1:
+            path.append(current)
+            current = came_from[current]
+        path.reverse()
+        return path
+
+    def bfs(self, start):
+        """Índices de todos los nodos alcanzables desde start"""
+        offsets, targets, _ = self.lists()
+        visited = {start}
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            for k in range(offsets[current], offsets[current + 1]):
+                nxt = targets[k]
+                if nxt not in visited:
+                    visited.add(nxt)
+                    queue.append(nxt)
+        return visited
+
+    def save(self, directory):
+        """Guarda cada array como un fichero .npy dentro de directory"""
+        for name in self.ARRAYS:
+            np.save(f"{directory}/{name}.npy", getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """Carga los arrays guardados con save() mapeándolos en memoria"""
+        arrays = [np.load(f"{directory}/{name}.npy", mmap_mode=mmap_mode) for name in cls.ARRAYS]
+        return cls(*arrays)
+
+
+class ShortestPathTree:
+    """Árbol de caminos mínimos desde un origen: dist y pred de cada nodo.
+
+    Se calcula una vez (un Dijkstra completo) y después cada destino es un
+    recorrido de pred en O(longitud del camino).
+    """
+
+    def __init__(self, graph, origin, dist, pred):
+        self.graph = graph
+        self.origin = origin
+        self.dist = dist
+        self.pred = pred
+
+    def cost_to(self, goal):
+        """Coste mínimo hasta goal (índice), o None si no es alcanzable"""
+        cost = float(self.dist[goal])
+        return cost if cost != float("inf") else None
+
+    def path_to(self, goal):
+        """(lista de índices, coste) hasta goal, o ([], None) si no es alcanzable"""
+        cost = self.cost_to(goal)
+        if cost is None:
+            return [], None
+        return NavGraph.path_from_pred(self.pred, goal), cost
+
+    def route(self, goal):
+        """(lista de NavPoints, coste) hasta un NavPoint goal, o ([], None)"""
+        index = self.graph.index.get(goal.code)
+        if index is None:
+            return [], None
+        path, cost = self.path_to(index)
+        return [self.graph.points[i] for i in path], cost
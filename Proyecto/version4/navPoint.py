@@ -1,35 +1,64 @@
+import warnings
+
+
 class NavPoint:
+    # Sin __dict__: miles de puntos ocupan bastante menos memoria
+    __slots__ = ("code", "name", "latitude", "longitude", "_neighbors", "_graph", "_index")
+
     def __init__(self, code, name, latitude, longitude):
         self.latitude = latitude
         self.longitude = longitude
         self.name = name
         self.code = code
-        self.neighbors = []
+        self._neighbors = []
+        self._graph = None
+        self._index = None
+
+    @classmethod
+    def view(cls, graph, index, code, name, latitude, longitude):
+        """Crea un punto cuyos vecinos se leen del NavGraph solo cuando se piden"""
+        point = cls(code, name, latitude, longitude)
+        point._neighbors = None
+        point._graph = graph
+        point._index = index
+        return point
+
+    @property
+    def neighbors(self):
+        if self._neighbors is None:
+            targets, weights = self._graph.neighbors_of(self._index)
+            points = self._graph.points
+            self._neighbors = [(points[t], w) for t, w in zip(targets.tolist(), weights.tolist())]
+        return self._neighbors
+
+    @neighbors.setter
+    def neighbors(self, value):
+        self._neighbors = value
 
     def add_neighbor(self, neighbor_info):
-       
-        if isinstance(neighbor_info, tuple) and len(neighbor_info) == 2:
-            neighbor, distance = neighbor_info
-        else:
-            # Si se llama con dos parámetros separados
-            neighbor = neighbor_info
-            distance = None
+        """Obsoleto: añade o reemplaza la conexión (NavPoint, distancia) con ese vecino.
 
+        La conexión anterior con el mismo punto se sustituye en su sitio, sin
+        reconstruir la lista. No avisa al AirSpace, así que sus cachés y el
+        NavGraph quedan desfasados: para añadir segmentos hay que usar
+        AirSpace.add_segment o AirSpace.add_segments_bulk.
+        """
+        warnings.warn("NavPoint.add_neighbor está obsoleto: usa AirSpace.add_segment",
+                      DeprecationWarning, stacklevel=2)
+        if not (isinstance(neighbor_info, tuple) and len(neighbor_info) == 2):
+            raise ValueError("La distancia es requerida")
+        neighbor, distance = neighbor_info
         if distance is None:
             raise ValueError("La distancia es requerida")
-
-        # Verificar que neighbor sea un NavPoint
         if not hasattr(neighbor, 'code') or not hasattr(neighbor, 'name'):
             raise ValueError("El vecino debe ser un objeto NavPoint válido")
 
-        # Eliminar conexión existente si la hay
-        self.neighbors = [(n, d) for n, d in self.neighbors if n.code != neighbor.code]
-
-        # Añadir la nueva conexión
-        self.neighbors.append((neighbor, distance))
-
-        print(f"DEBUG add_neighbor: {self.name} -> {neighbor.name} ({distance:.2f} km)")
-
+        neighbors = self.neighbors
+        for i, (existing, _) in enumerate(neighbors):
+            if existing.code == neighbor.code:
+                neighbors[i] = (neighbor, distance)
+                return
+        neighbors.append((neighbor, distance))
 
     def get_neighbors(self):
         """Devuelve la lista de vecinos como tuplas (NavPoint, distancia)"""
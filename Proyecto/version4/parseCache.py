@@ -0,0 +1,108 @@
+import hashlib
+import os
+import shutil
+
+from airSpaceSnapshot import SNAPSHOT_VERSION, compile_snapshot, load_snapshot
+
+# Directorio de la caché compartida; si no está definido la caché no se usa
+CACHE_DIR_ENV = "AIRSPACE_CACHE_DIR"
+
+
+def hash_sources(paths):
+    """SHA-256 del contenido de los ficheros (y de la versión del formato)"""
+    digest = hashlib.sha256(f"snapshot-v{SNAPSHOT_VERSION}".encode())
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(b'\0')  # Separador entre ficheros
+    return digest.hexdigest()
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ParseCache:
+    """Caché en disco de espacios aéreos ya compilados, compartida entre procesos.
+
+    Cada entrada es una instantánea (ver airSpaceSnapshot) guardada en un
+    subdirectorio cuyo nombre es el SHA-256 de los tres ficheros de texto.
+    Cuando el total supera max_bytes se borran las entradas usadas hace más
+    tiempo.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_environment(cls):
+        """ParseCache configurada con la variable AIRSPACE_CACHE_DIR, o None"""
+        cache_dir = os.environ.get(CACHE_DIR_ENV)
+        return cls(cache_dir) if cache_dir else None
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, sources, key=None):
+        """Devuelve (NavGraph, airports, segmentos descartados) si los ficheros ya están en la caché, o None"""
+        key = key or hash_sources(sources)
+        entry_dir = self._entry_dir(key)
+        snapshot = load_snapshot(entry_dir, stamp=[{"sha256": key}])
+        if snapshot is not None:
+            try:
+                # La fecha de la cabecera marca el último uso (para el LRU)
+                os.utime(os.path.join(entry_dir, "header.json"))
+            except OSError:
+                pass
+        return snapshot
+
+    def store(self, airspace, sources, key=None):
+        """Guarda el espacio aéreo compilado y aplica el límite de tamaño"""
+        key = key or hash_sources(sources)
+        entry_dir = self._entry_dir(key)
+        if load_snapshot(entry_dir, stamp=[{"sha256": key}]) is not None:
+            return  # Otro proceso ya lo ha guardado
+        try:
+            compile_snapshot(airspace, entry_dir, sources, stamp=[{"sha256": key}])
+        except OSError:
+            # Otro proceso escribió la misma entrada a la vez; su copia es igual de válida
+            pass
+        self.evict()
+
+    def entries(self):
+        """Lista de (última vez usada, bytes, directorio) de cada entrada"""
+        result = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return result
+        for name in names:
+            if '.' in name:
+                continue  # Directorio temporal de una escritura en curso
+            entry_dir = os.path.join(self.cache_dir, name)
+            header = os.path.join(entry_dir, "header.json")
+            try:
+                last_used = os.path.getmtime(header)
+            except OSError:
+                continue  # Entrada a medio escribir o de otro programa
+            result.append((last_used, _dir_size(entry_dir), entry_dir))
+        return result
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta quedar por debajo de max_bytes"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries[:-1]:  # La más reciente nunca se borra
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
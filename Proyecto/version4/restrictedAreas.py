@@ -0,0 +1,163 @@
+import numpy as np
+
+
+class RestrictedZone:
+    """Zona restringida temporal: polígono de vértices (lat, lon) en grados"""
+
+    def __init__(self, name, vertices):
+        self.name = name
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        if len(self.vertices) < 3:
+            raise ValueError(f"La zona {name} necesita al menos 3 vértices")
+        self.min_lat, self.min_lon = self.vertices.min(axis=0)
+        self.max_lat, self.max_lon = self.vertices.max(axis=0)
+
+    def _planar(self, lat, lon):
+        # Coordenadas planas locales (la longitud se encoge con el coseno de la latitud)
+        scale = np.cos(np.radians((self.min_lat + self.max_lat) / 2))
+        return lon * scale, lat
+
+    def contains(self, lat, lon):
+        """Array de bool: qué puntos (arrays lat, lon) están dentro del polígono (par-impar)"""
+        x, y = self._planar(np.asarray(lat, dtype=np.float64)[:, None],
+                            np.asarray(lon, dtype=np.float64)[:, None])
+        vx, vy = self._planar(self.vertices[:, 0], self.vertices[:, 1])
+        nx, ny = np.roll(vx, -1), np.roll(vy, -1)
+        straddles = (vy > y) != (ny > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_x = vx + (y - vy) * (nx - vx) / (ny - vy)
+        return ((straddles & (x < crossing_x)).sum(axis=1) % 2) == 1
+
+    def crosses(self, lat1, lon1, lat2, lon2):
+        """Array de bool: qué segmentos (arrays de extremos) tocan el polígono.
+
+        Un segmento queda dentro si alguno de sus extremos está dentro o si
+        corta algún lado del polígono; se comprueban todos los pares
+        segmento-lado a la vez.
+        """
+        inside = self.contains(lat1, lon1) | self.contains(lat2, lon2)
+        ax, ay = self._planar(np.asarray(lat1)[:, None], np.asarray(lon1)[:, None])
+        bx, by = self._planar(np.asarray(lat2)[:, None], np.asarray(lon2)[:, None])
+        cx, cy = self._planar(self.vertices[:, 0], self.vertices[:, 1])
+        dx, dy = np.roll(cx, -1), np.roll(cy, -1)
+
+        def orientation(px, py, qx, qy, rx, ry):
+            return (qx - px) * (ry - py) - (qy - py) * (rx - px)
+        d1 = orientation(ax, ay, bx, by, cx, cy)
+        d2 = orientation(ax, ay, bx, by, dx, dy)
+        d3 = orientation(cx, cy, dx, dy, ax, ay)
+        d4 = orientation(cx, cy, dx, dy, bx, by)
+        return inside | ((d1 * d2 < 0) & (d3 * d4 < 0)).any(axis=1)
+
+
+class SegmentGrid:
+    """Índice espacial de los segmentos de un NavGraph en una rejilla de celdas
+    de cell grados: cada celda guarda los segmentos cuya caja la toca"""
+
+    def __init__(self, graph, cell=1.0):
+        self.cell = cell
+        origins = np.repeat(np.arange(graph.num_nodes), np.diff(graph.offsets))
+        self.lat1, self.lon1 = graph.lat[origins], graph.lon[origins]
+        self.lat2, self.lon2 = graph.lat[graph.targets], graph.lon[graph.targets]
+        self.min_lat = np.minimum(self.lat1, self.lat2)
+        self.max_lat = np.maximum(self.lat1, self.lat2)
+        self.min_lon = np.minimum(self.lon1, self.lon2)
+        self.max_lon = np.maximum(self.lon1, self.lon2)
+
+        num_edges = len(origins)
+        self.lat0 = float(self.min_lat.min()) if num_edges else 0.0
+        self.lon0 = float(self.min_lon.min()) if num_edges else 0.0
+        self.rows = int((self.max_lat.max() - self.lat0) // cell) + 1 if num_edges else 1
+        self.cols = int((self.max_lon.max() - self.lon0) // cell) + 1 if num_edges else 1
+        i0, i1 = self._row(self.min_lat), self._row(self.max_lat)
+        j0, j1 = self._col(self.min_lon), self._col(self.max_lon)
+
+        # Una entrada (celda, segmento) por cada celda que toca la caja de cada segmento
+        width = j1 - j0 + 1
+        counts = (i1 - i0 + 1) * width
+        edges = np.repeat(np.arange(num_edges), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = ((np.repeat(i0, counts) + local // np.repeat(width, counts)) * self.cols +
+                 np.repeat(j0, counts) + local % np.repeat(width, counts))
+        order = np.argsort(cells, kind="stable")
+        self.edges = edges[order]
+        self.offsets = np.zeros(self.rows * self.cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.rows * self.cols), out=self.offsets[1:])
+
+    def _row(self, lat):
+        return np.clip(((lat - self.lat0) // self.cell).astype(np.int64), 0, self.rows - 1)
+
+    def _col(self, lon):
+        return np.clip(((lon - self.lon0) // self.cell).astype(np.int64), 0, self.cols - 1)
+
+    def query(self, min_lat, max_lat, min_lon, max_lon):
+        """Segmentos cuya caja corta la caja dada (array de índices de segmento)"""
+        rows = range(int(self._row(np.float64(min_lat))), int(self._row(np.float64(max_lat))) + 1)
+        j0, j1 = int(self._col(np.float64(min_lon))), int(self._col(np.float64(max_lon)))
+        chunks = [self.edges[self.offsets[i * self.cols + j0]:self.offsets[i * self.cols + j1 + 1]]
+                  for i in rows]
+        candidates = np.unique(np.concatenate(chunks)) if chunks else np.zeros(0, dtype=np.int64)
+        overlap = ((self.min_lat[candidates] <= max_lat) & (self.max_lat[candidates] >= min_lat) &
+                   (self.min_lon[candidates] <= max_lon) & (self.max_lon[candidates] >= min_lon))
+        return candidates[overlap]
+
+    def blocked_by(self, zone):
+        """Segmentos que tocan la zona: prefiltro por caja y luego la prueba exacta"""
+        candidates = self.query(zone.min_lat, zone.max_lat, zone.min_lon, zone.max_lon)
+        hit = zone.crosses(self.lat1[candidates], self.lon1[candidates],
+                           self.lat2[candidates], self.lon2[candidates])
+        return candidates[hit]
+
+
+class RestrictedAreas:
+    """Segmentos bloqueados por un conjunto de zonas sobre un NavGraph.
+
+    Cada segmento cuenta cuántas zonas lo bloquean, así que añadir o quitar
+    una zona solo toca los segmentos de alrededor. weights(base) devuelve la
+    lista de pesos base con inf en los segmentos bloqueados; A* no pasa nunca
+    por ellos sin ninguna comprobación extra en el bucle.
+    """
+
+    def __init__(self, graph, cell=1.0):
+        self.graph = graph
+        self.index = SegmentGrid(graph, cell)
+        self.count = np.zeros(graph.num_edges, dtype=np.int64)
+        self.blocked = {}  # nombre de zona -> índices de los segmentos que bloquea
+        self._masked = {}  # id de la lista base -> (lista base, lista con los bloqueos)
+
+    @property
+    def mask(self):
+        """Array de bool con los segmentos bloqueados por alguna zona"""
+        return self.count > 0
+
+    def add(self, zone):
+        """Bloquea los segmentos de la zona; devuelve los que no estaban ya bloqueados"""
+        edges = self.index.blocked_by(zone)
+        self.blocked[zone.name] = edges
+        self.count[edges] += 1
+        newly = edges[self.count[edges] == 1]
+        for _, masked in self._masked.values():
+            for k in newly.tolist():
+                masked[k] = float("inf")
+        return newly
+
+    def remove(self, name):
+        """Quita una zona; devuelve los segmentos que han quedado libres"""
+        edges = self.blocked.pop(name)
+        self.count[edges] -= 1
+        freed = edges[self.count[edges] == 0]
+        for base, masked in self._masked.values():
+            for k in freed.tolist():
+                masked[k] = base[k]
+        return freed
+
+    def weights(self, base):
+        """Copia de la lista de pesos base (una por segmento) con inf en los bloqueados"""
+        entry = self._masked.get(id(base))
+        if entry is None:
+            masked = list(base)
+            for k in np.flatnonzero(self.count).tolist():
+                masked[k] = float("inf")
+            entry = (base, masked)
+            self._masked[id(base)] = entry
+        return entry[1]
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from navGraph import haversine_km
+
+
+class RouteCache:
+    """Caché LRU de rutas ya calculadas, clave (origen, destino, modelo de coste).
+
+    Guarda un índice inverso segmento -> rutas y punto -> rutas para que al
+    editar el grafo solo se borren las rutas afectadas:
+
+    - quitar un segmento o un punto solo invalida las rutas que lo usan
+      (quitar no puede acortar ningún otro camino);
+    - añadir un segmento invalida las rutas que lo usan (si cambia su
+      distancia) y las que podría acortar según la cota ortodrómica, además
+      de los resultados "sin camino".
+
+    version es la versión del grafo para la que las entradas son válidas. Si
+    el AirSpace cambia sin pasar por estos métodos (carga, merge...) las
+    versiones dejan de coincidir y se vacía entera.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        # clave -> (rutas [(path, cost)], cota, NavPoint origen, NavPoint destino)
+        self._entries = OrderedDict()
+        self._by_edge = {}  # (código origen, código destino) -> claves
+        self._by_point = {}  # código -> claves
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, start, goal, model="distance"):
+        """(path, cost) guardado para dos NavPoints, o None; path es una copia"""
+        routes = self.get_routes(start, goal, model)
+        return routes[0] if routes is not None else None
+
+    def get_routes(self, start, goal, model):
+        """Lista de (path, cost) guardada con put_routes, o None"""
+        key = (start.code, goal.code, model)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return [(list(path), cost) for path, cost in entry[0]]
+
+    def put(self, start, goal, model, path, cost):
+        self.put_routes(start, goal, model, [(path, cost)], cost if cost is not None else float("inf"))
+
+    def put_routes(self, start, goal, model, routes, bound):
+        """Guarda varias rutas bajo una clave (p. ej. las k más cortas).
+
+        bound es el coste a partir del cual un segmento nuevo ya no cambia el
+        resultado (el de la peor ruta guardada, o inf si podría haber más).
+        """
+        key = (start.code, goal.code, model)
+        if key in self._entries:
+            self._discard(key)
+        routes = [(list(path), cost) for path, cost in routes]
+        self._entries[key] = (routes, bound, start, goal)
+        for pair in self._edges(routes):
+            self._by_edge.setdefault(pair, set()).add(key)
+        for code in self._points(routes, start, goal):
+            self._by_point.setdefault(code, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+    @staticmethod
+    def _edges(routes):
+        return {(a.code, b.code) for path, _ in routes for a, b in zip(path, path[1:])}
+
+    @staticmethod
+    def _points(routes, start, goal):
+        return {start.code, goal.code} | {p.code for path, _ in routes for p in path}
+
+    def _discard(self, key):
+        routes, _, start, goal = self._entries.pop(key)
+        for pair in self._edges(routes):
+            keys = self._by_edge.get(pair)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_edge[pair]
+        for code in self._points(routes, start, goal):
+            keys = self._by_point.get(code)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_point[code]
+
+    def clear(self):
+        self._entries.clear()
+        self._by_edge.clear()
+        self._by_point.clear()
+
+    def evict_edges(self, pairs):
+        """Borra las rutas que usan alguno de los segmentos (código origen, código destino)"""
+        keys = set()
+        for pair in pairs:
+            keys |= self._by_edge.get(pair, set())
+        for key in keys:
+            self._discard(key)
+        return len(keys)
+
+    def evict_point(self, code):
+        """Borra las rutas que pasan por el punto code (o empiezan o acaban en él)"""
+        keys = set(self._by_point.get(code, ()))
+        for key in keys:
+            self._discard(key)
+        return len(keys)
+
+    def evict_models(self, models):
+        """Borra las rutas guardadas con alguno de los modelos de coste dados"""
+        keys = [key for key in self._entries if key[2] in models]
+        for key in keys:
+            self._discard(key)
+        return len(keys)
+
+    def evict_improvable(self, segments, scale):
+        """Borra las rutas que un segmento nuevo podría acortar y las que no tenían camino.
+
+        segments son (NavPoint origen, NavPoint destino, distancia) y scale el
+        factor de NavGraph.heuristic_scale del grafo ya editado. Una ruta
+        s -> t con cota c solo puede cambiar con el segmento a -> b si
+        scale * (ortodrómica(s, a) + ortodrómica(b, t)) + distancia < c.
+        """
+        keys = list(self._entries)
+        if not keys:
+            return 0
+        entries = [self._entries[key] for key in keys]
+        costs = np.array([bound for _, bound, _, _ in entries])
+        s_lat = np.array([start.latitude for _, _, start, _ in entries])
+        s_lon = np.array([start.longitude for _, _, start, _ in entries])
+        t_lat = np.array([goal.latitude for _, _, _, goal in entries])
+        t_lon = np.array([goal.longitude for _, _, _, goal in entries])
+        stale = ~np.isfinite(costs)  # Sin camino (o sin todas las rutas pedidas)
+        for origin, dest, distance in segments:
+            bound = scale * (haversine_km(s_lat, s_lon, origin.latitude, origin.longitude) +
+                             haversine_km(dest.latitude, dest.longitude, t_lat, t_lon)) + distance
+            stale |= bound < costs
+        for i in np.flatnonzero(stale).tolist():
+            self._discard(keys[i])
+        return int(stale.sum())
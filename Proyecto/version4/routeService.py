@@ -0,0 +1,265 @@
+"""Servicio HTTP/JSON local que mantiene cargados los espacios aéreos.
+
+Uso: python routeService.py [--host H] [--port N] [--workers N] [región ...]
+
+Peticiones GET (region se puede omitir si solo hay una cargada):
+
+    /route?region=Cat&from=IZA.D&to=GODOX
+    /neighbors?region=Cat&point=GODOX
+    /reachable?region=Cat&point=GODOX
+    /nearest?region=Cat&lat=41.3&lon=2.1&count=5
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from airSpaceCache import AirSpaceCache
+from batchSolver import SharedArrays, solve_pairs
+from navGraph import NavGraph
+
+# Como mucho se leen estas líneas de cabecera por petición
+MAX_HEADER_LINES = 100
+
+_worker_graphs = {}  # región -> (bloque compartido, NavGraph, factor de heurística)
+
+
+class ServiceError(Exception):
+    """Error de una petición: se responde con status y {"error": mensaje}"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _init_worker(descriptors):
+    for region, (descriptor, scale) in descriptors.items():
+        memory, arrays = SharedArrays.attach(descriptor)
+        _worker_graphs[region] = (memory, NavGraph(*[arrays[name] for name in NavGraph.ARRAYS]), scale)
+
+
+def _worker_ready():
+    return bool(_worker_graphs)
+
+
+def _worker_route(region, start, goal):
+    _, graph, scale = _worker_graphs[region]
+    _, cost, path_ids = solve_pairs(graph, [(0, start, goal)], scale)[0]
+    return cost, path_ids
+
+
+def point_json(point):
+    return {"id": point.code, "name": point.name, "lat": point.latitude, "lon": point.longitude}
+
+
+class RouteService:
+    """Servidor asyncio con uno o varios AirSpace ya cargados.
+
+    Las búsquedas de rutas se hacen en un grupo de procesos que ve los
+    arrays del grafo de cada región en memoria compartida (con workers=0, en
+    un hilo del propio proceso). Varias peticiones iguales mientras la
+    primera sigue calculándose esperan al mismo resultado. El grafo y los
+    pesos (modelo de coste y zonas restringidas) son los del momento de
+    start(): las ediciones posteriores de los AirSpace no se ven.
+    """
+
+    def __init__(self, airspaces, workers=None):
+        self.airspaces = dict(airspaces)  # región -> AirSpace
+        self.workers = workers
+        self.computations = 0  # Búsquedas de rutas realmente lanzadas
+        self.port = None
+        self._server = None
+        self._executor = None
+        self._shared = []
+        # región -> (NavGraph del AirSpace, copia con los pesos de búsqueda si workers=0, factor de heurística)
+        self._graphs = {}
+        self._inflight = {}  # (región, origen, destino) -> tarea de la búsqueda en curso
+        self._handlers = {"/route": self.route, "/neighbors": self.neighbors,
+                          "/reachable": self.reachable, "/nearest": self.nearest}
+
+    @classmethod
+    def from_regions(cls, regions, data_dir="data", snapshot_dir=None, workers=None):
+        cache = AirSpaceCache(data_dir, snapshot_dir=snapshot_dir)
+        return cls({region: cache.get(region) for region in regions}, workers)
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Publica los grafos, arranca los workers y empieza a escuchar (port=0: uno libre)"""
+        descriptors = {}
+        for region, airspace in self.airspaces.items():
+            graph = airspace.get_graph()
+            weights, scale = airspace.route_weights()
+            arrays = {name: getattr(graph, name) for name in NavGraph.ARRAYS}
+            arrays["weights"] = np.asarray(weights, dtype=np.float64)
+            search = NavGraph(*[arrays[name] for name in NavGraph.ARRAYS]) if self.workers == 0 else None
+            self._graphs[region] = (graph, search, scale)
+            if self.workers != 0:
+                shared = SharedArrays(arrays)
+                self._shared.append(shared)
+                descriptors[region] = (shared.descriptor, scale)
+        if self.workers != 0:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                 initargs=(descriptors,))
+            # Los procesos se crean ya, antes de escuchar: con fork heredarían las
+            # conexiones abiertas y el cliente no vería nunca el cierre de la suya
+            await asyncio.get_running_loop().run_in_executor(self._executor, _worker_ready)
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        for shared in self._shared:
+            shared.close()
+        self._shared = []
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                request_line = (await reader.readline()).decode("latin-1")
+                for _ in range(MAX_HEADER_LINES):
+                    if (await reader.readline()) in (b"\r\n", b"\n", b""):
+                        break
+                parts = request_line.split()
+                if len(parts) != 3:
+                    raise ServiceError(HTTPStatus.BAD_REQUEST, "Petición HTTP mal formada")
+                if parts[0] != "GET":
+                    raise ServiceError(HTTPStatus.METHOD_NOT_ALLOWED, "Solo se admite GET")
+                url = urlsplit(parts[1])
+                handler = self._handlers.get(url.path)
+                if handler is None:
+                    raise ServiceError(HTTPStatus.NOT_FOUND, f"Ruta desconocida: {url.path}")
+                status, body = HTTPStatus.OK, await handler(dict(parse_qsl(url.query)))
+            except ServiceError as e:
+                status, body = e.status, {"error": str(e)}
+            except Exception as e:
+                status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+            data = json.dumps(body).encode("utf-8")
+            writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                         f"Content-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+        except ConnectionError:
+            pass  # El cliente se ha ido
+        finally:
+            writer.close()
+
+    def _airspace(self, params):
+        region = params.get("region")
+        if region is None:
+            if len(self.airspaces) != 1:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Falta el parámetro region")
+            region = next(iter(self.airspaces))
+        if region not in self.airspaces:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Región no cargada: {region}")
+        return region, self.airspaces[region]
+
+    @staticmethod
+    def _param(params, name, kind=str):
+        if name not in params:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Falta el parámetro {name}")
+        try:
+            return kind(params[name])
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Valor no válido para {name}: {params[name]}")
+
+    def _point(self, airspace, params, name):
+        identifier = self._param(params, name)
+        point = airspace.get_navpoint_by_name_or_id(identifier)
+        if point is None and identifier.lstrip("-").isdigit():
+            point = airspace.get_navpoint_by_name_or_id(int(identifier))
+        if point is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Punto no encontrado: {identifier}")
+        return point
+
+    async def route(self, params):
+        region, airspace = self._airspace(params)
+        start = self._point(airspace, params, "from")
+        goal = self._point(airspace, params, "to")
+        result = {"origin": point_json(start), "destination": point_json(goal),
+                  "units": airspace.cost_model.units, "cost": None, "path": []}
+        if not airspace.is_reachable(start.code, goal.code):
+            return result
+
+        key = (region, start.code, goal.code)
+        task = self._inflight.get(key)
+        if task is None:
+            graph = self._graphs[region][0]
+            task = asyncio.ensure_future(self._search(region, graph.index[start.code], graph.index[goal.code]))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: si un cliente se va, la búsqueda sigue para los demás que la esperan
+        cost, path_ids = await asyncio.shield(task)
+        graph = self._graphs[region][0]
+        result["cost"] = cost
+        result["path"] = [point_json(graph.points[graph.index[code]]) for code in path_ids]
+        return result
+
+    async def _search(self, region, start, goal):
+        self.computations += 1
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            _, search, scale = self._graphs[region]
+            _, cost, path_ids = (await loop.run_in_executor(
+                None, solve_pairs, search, [(0, start, goal)], scale))[0]
+            return cost, path_ids
+        return await loop.run_in_executor(self._executor, _worker_route, region, start, goal)
+
+    async def neighbors(self, params):
+        _, airspace = self._airspace(params)
+        point = self._point(airspace, params, "point")
+        return {"point": point_json(point),
+                "neighbors": [dict(point_json(n), distance=d) for n, d in airspace.get_neighbors(point.code)]}
+
+    async def reachable(self, params):
+        _, airspace = self._airspace(params)
+        point = self._point(airspace, params, "point")
+        reachable = airspace.reachable_from(point.code)
+        return {"point": point_json(point), "count": len(reachable),
+                "ids": sorted(p.code for p in reachable)}
+
+    async def nearest(self, params):
+        _, airspace = self._airspace(params)
+        lat = self._param(params, "lat", float)
+        lon = self._param(params, "lon", float)
+        count = self._param(params, "count", int) if "count" in params else 1
+        if count < 1:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "count tiene que ser al menos 1")
+        return {"nearest": [dict(point_json(p), distance=d) for p, d in airspace.find_nearest(lat, lon, count)]}
+
+
+async def main(args):
+    service = RouteService.from_regions(args.regions, args.data_dir, args.snapshot_dir, args.workers)
+    await service.start(args.host, args.port)
+    print(f"Servicio de rutas en http://{args.host}:{service.port} ({', '.join(service.airspaces)})")
+    try:
+        await service.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de rutas")
+    parser.add_argument("regions", nargs="*", default=["Cat", "Spain", "Eur"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--snapshot-dir", default=None)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,48 @@
+"""Datos y utilidades comunes de los tests (test_*.py)"""
+import os
+
+import numpy as np
+
+from airSpace import AirSpace
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+REGIONS = ("Cat", "Spain", "Eur")
+
+
+def data_files(region):
+    """Rutas de los ficheros nav, seg y aer de una región de data/"""
+    return [os.path.join(DATA_DIR, f"{region}_{kind}.txt") for kind in ("nav", "seg", "aer")]
+
+
+def load(region, **kwargs):
+    """AirSpace de una región; kwargs pasa a load_airspace_data"""
+    airspace = AirSpace()
+    airspace.load_airspace_data(*data_files(region), **kwargs)
+    return airspace
+
+
+def load_for_search(region, **kwargs):
+    """AirSpace sin caché de rutas: cada consulta pasa por el motor de búsqueda"""
+    airspace = load(region, verbose=False, **kwargs)
+    airspace.route_cache = None
+    return airspace
+
+
+def load_graph(region):
+    """NavGraph de una región, parseando siempre los ficheros de texto"""
+    return load(region, verbose=False, use_cache=False).get_graph()
+
+
+def sample_pairs(graph, count, seed=0):
+    """count pares (origen, destino) de índices al azar, repetibles con seed"""
+    rng = np.random.default_rng(seed)
+    return [tuple(pair) for pair in rng.integers(0, graph.num_nodes, size=(count, 2)).tolist()]
+
+
+def path_cost(graph, path, weights=None):
+    """Coste de un camino de índices con weights (por defecto, los pesos del grafo)"""
+    offsets, targets, graph_weights = graph.lists()
+    if weights is None:
+        weights = graph_weights
+    return sum(min(weights[k] for k in range(offsets[u], offsets[u + 1]) if targets[k] == v)
+               for u, v in zip(path, path[1:]))
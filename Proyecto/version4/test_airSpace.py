@@ -0,0 +1,659 @@
+import io
+import os
+import tempfile
+import warnings
+from contextlib import redirect_stdout
+
+from airSpace import (AirSpace, parse_nav_file, parse_seg_file, iter_navpoints, iter_segments, iter_airports,
+                      filter_bbox, filter_segments)
+from components import ComponentIndex
+from navPoint import NavPoint
+from navSegment import NavSegment
+from testData import data_files, load
+
+
+def test_snapshot_roundtrip():
+    parsed = load("Cat")
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_dir = os.path.join(tmp, "Cat")
+        compiled = load("Cat", snapshot_dir=snapshot_dir)
+        assert os.path.exists(os.path.join(snapshot_dir, "header.json"))
+        warm = load("Cat", snapshot_dir=snapshot_dir)
+
+    for airspace in (compiled, warm):
+        assert len(airspace.NavPoints) == len(parsed.NavPoints)
+        assert len(airspace.NavSegments) == len(parsed.NavSegments)
+        assert [a.name for a in airspace.NavAirports] == [a.name for a in parsed.NavAirports]
+        point = airspace.get_navpoint_by_name_or_id(6063)
+        expected = parsed.get_navpoint_by_name_or_id(6063)
+        assert point.name == expected.name
+        assert [(n.code, d) for n, d in point.neighbors] == [(n.code, d) for n, d in expected.neighbors]
+
+    _, cost = warm.find_shortest_path("IZA.D", "GODOX")
+    _, expected_cost = parsed.find_shortest_path("IZA.D", "GODOX")
+    assert cost == expected_cost
+
+
+def test_snapshot_rebuilt_when_sources_change():
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for path in data_files("Cat"):
+            copy = os.path.join(tmp, os.path.basename(path))
+            with open(path, "rb") as src, open(copy, "wb") as dst:
+                dst.write(src.read())
+            files.append(copy)
+        snapshot_dir = os.path.join(tmp, "snapshot")
+
+        airspace = AirSpace()
+        airspace.load_airspace_data(*files, snapshot_dir=snapshot_dir)
+        count = len(airspace.NavPoints)
+
+        with open(files[0], "a") as f:
+            f.write("999999 NEWPT 41.0 2.0\n")
+
+        airspace = AirSpace()
+        airspace.load_airspace_data(*files, snapshot_dir=snapshot_dir)
+        assert len(airspace.NavPoints) == count + 1
+        assert airspace.get_navpoint_by_name_or_id("NEWPT") is not None
+
+
+def test_graph_core_matches_object_graph():
+    core = load("Cat")
+    legacy = load("Cat")
+    legacy.use_graph_core = False
+
+    pairs = [("IZA.D", "GODOX"), ("BCN.D", "GIR.A"), ("LEBL", "LEGE"), ("ADX", "ALT")]
+    for origin, dest in pairs:
+        path, cost = core.find_shortest_path(origin, dest)
+        expected_path, expected_cost = legacy.find_shortest_path(origin, dest)
+        if expected_cost is None:
+            assert cost is None
+        else:
+            assert abs(cost - expected_cost) < 1e-9
+            assert path[0].name == origin and path[-1].name == dest
+
+    assert [(n.code, d) for n, d in core.get_neighbors(6063)] == \
+        [(n.code, d) for n, d in legacy.get_neighbors(6063)]
+    assert {p.code for p in core.reachable_from("IZA.D")} == {p.code for p in legacy.reachable_from("IZA.D")}
+
+
+def test_graph_core_rebuilt_after_edit():
+    airspace = load("Cat")
+    graph = airspace.get_graph()
+    assert airspace.get_graph() is graph
+
+    airspace.add_navpoint("TEST1", "TEST1", 41.0, 2.0)
+    airspace.add_segment("IZA.D", "TEST1", 10.0, bidirectional=False)
+    assert airspace.get_graph() is not graph
+    path, cost = airspace.find_shortest_path("IZA.D", "TEST1")
+    assert [p.name for p in path] == ["IZA.D", "TEST1"] and cost == 10.0
+
+    airspace.remove_navpoint("TEST1")
+    assert airspace.find_shortest_path("IZA.D", "GODOX")[1] is not None
+
+
+def test_add_segments_bulk_deduplicates():
+    airspace = AirSpace()
+    for name, lat, lon in (("A", 41.0, 2.0), ("B", 41.1, 2.1), ("C", 41.2, 2.2)):
+        airspace.add_navpoint(name, name, lat, lon)
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        added = airspace.add_segments_bulk([
+            ("A", "B", 10.0), ("A", "C", 20.0), ("A", "B", 12.0), ("B", "C", 5.0), ("A", "X", 1.0),
+        ])
+    assert output.getvalue() == ""
+    assert added == 3
+
+    a = airspace.get_navpoint_by_name_or_id("A")
+    assert sorted((n.name, d) for n, d in a.neighbors) == [("B", 12.0), ("C", 20.0)]
+    assert len(airspace.NavSegments) == 3
+
+    # Un segmento existente se reemplaza en lugar de duplicarse
+    airspace.add_segment("A", "B", 15.0)
+    assert sorted((n.name, d) for n, d in a.neighbors) == [("B", 15.0), ("C", 20.0)]
+    pairs = sorted((s.origin, s.destination, s.distance) for s in airspace.NavSegments)
+    assert len(pairs) == 4 and len({(o, d) for o, d, _ in pairs}) == 4
+    assert airspace.find_shortest_path("A", "C")[1] == 20.0
+
+    # El método antiguo de NavPoint también reemplaza, sin salida por pantalla
+    c = airspace.get_navpoint_by_name_or_id("C")
+    with redirect_stdout(output), warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        a.add_neighbor((c, 25.0))
+    assert output.getvalue() == "" and caught[0].category is DeprecationWarning
+    assert sorted((n.name, d) for n, d in a.neighbors) == [("B", 15.0), ("C", 25.0)]
+
+
+def test_vectorized_parser_matches_line_parser():
+    for region in ("Cat", "Spain", "Eur"):
+        nav_file, seg_file, _ = data_files(region)
+        fast = AirSpace()
+        fast._load_nav_points(nav_file)
+        fast._load_segments(seg_file)
+        slow = AirSpace()
+        slow._load_nav_points_slow(nav_file)
+        slow._load_segments_slow(seg_file)
+
+        assert [(p.code, p.name, p.latitude, p.longitude) for p in fast.NavPoints] == \
+            [(p.code, p.name, p.latitude, p.longitude) for p in slow.NavPoints]
+        assert [(s.origin, s.destination, s.distance) for s in fast.NavSegments] == \
+            [(s.origin, s.destination, s.distance) for s in slow.NavSegments]
+
+
+def test_malformed_files_use_line_parser():
+    with tempfile.TemporaryDirectory() as tmp:
+        nav_file = os.path.join(tmp, "nav.txt")
+        seg_file = os.path.join(tmp, "seg.txt")
+        with open(nav_file, "w") as f:
+            f.write("1 AAA 41.0 2.0\n\n2 BBB 41.5 2.5 extra\n3 CCC\n")
+        with open(seg_file, "w") as f:
+            f.write("1 2 60.5\n2 1 60.5\n1 9 10.0\n")
+
+        try:
+            parse_nav_file(nav_file)
+            assert False, "el parser vectorizado debería rechazar el fichero"
+        except ValueError:
+            pass
+
+        airspace = AirSpace()
+        airspace._load_nav_points(nav_file)
+        airspace._load_segments(seg_file)
+        assert [p.name for p in airspace.NavPoints] == ["AAA", "BBB"]
+        assert [(s.origin, s.destination) for s in airspace.NavSegments] == [(1, 2), (2, 1)]
+
+        # Columnas de más y de menos que se compensan en el total del fichero
+        with open(seg_file, "w") as f:
+            f.write("1 2 10.0 5\n3 4\n")
+        try:
+            parse_seg_file(seg_file)
+            assert False, "el parser vectorizado debería rechazar el fichero"
+        except ValueError:
+            pass
+        airspace = AirSpace()
+        airspace._load_nav_points(nav_file)
+        airspace._load_segments(seg_file)
+        assert [(s.origin, s.destination, s.distance) for s in airspace.NavSegments] == [(1, 2, 10.0)]
+
+        # Las líneas en blanco (también la última) no obligan a usar el parser línea a línea
+        with open(seg_file, "w") as f:
+            f.write("1 2 60.5\n\n2 1 60.5\n   \n")
+        origins, dests, distances = parse_seg_file(seg_file)
+        assert origins.tolist() == [1, 2] and distances.tolist() == [60.5, 60.5]
+        airspace = AirSpace()
+        airspace._load_nav_points(nav_file)
+        airspace._load_segments_slow = None  # Si se llegara a usar, fallaría
+        airspace._load_segments(seg_file)
+        assert [(s.origin, s.destination) for s in airspace.NavSegments] == [(1, 2), (2, 1)]
+
+
+def test_prefix_index():
+    airspace = load("Spain")
+    names = sorted(p.name for p in airspace.NavPoints)
+
+    found = [p.name for p in airspace.find_navpoints_by_prefix("BC")]
+    assert found == [n for n in names if n.startswith("BC")]
+    assert len(airspace.find_navpoints_by_prefix("", limit=5)) == 5
+    assert airspace.find_navpoints_by_prefix("ZZZZZ") == []
+
+    airspace.add_navpoint("BCAAA", "BCAAA", 41.0, 2.0)
+    assert "BCAAA" in [p.name for p in airspace.find_navpoints_by_prefix("BC")]
+    airspace.remove_navpoint("BCAAA")
+    assert "BCAAA" not in [p.name for p in airspace.find_navpoints_by_prefix("BC")]
+
+    # Cada SID/STAR se resuelve al nombre exacto o al primero por orden alfabético
+    for airport in airspace.NavAirports:
+        for point in airport.SIDs + airport.STARs:
+            assert point in airspace.NavPoints
+
+
+def test_streaming_pipeline_with_bbox():
+    nav_file, seg_file, aer_file = data_files("Spain")
+    full = load("Spain")
+
+    bbox = (40.0, 43.0, 0.0, 4.0)
+    airspace = AirSpace().build_from(
+        filter_bbox(iter_navpoints(nav_file), *bbox), iter_segments(seg_file), iter_airports(aer_file)
+    )
+
+    inside = {p.code for p in full.NavPoints
+              if bbox[0] <= p.latitude <= bbox[1] and bbox[2] <= p.longitude <= bbox[3]}
+    assert {p.code for p in airspace.NavPoints} == inside
+    expected = {(s.origin, s.destination) for s in filter_segments(full.NavSegments, inside)}
+    assert {(s.origin, s.destination) for s in airspace.NavSegments} == expected
+    assert [a.name for a in airspace.NavAirports] == [a.name for a in full.NavAirports]
+
+    # Sin filtros, la tubería da lo mismo que load_airspace_data
+    streamed = AirSpace().build_from(iter_navpoints(nav_file), iter_segments(seg_file), iter_airports(aer_file))
+    assert len(streamed.NavSegments) == len(full.NavSegments)
+    assert [[p.code for p in a.SIDs] for a in streamed.NavAirports] == \
+        [[p.code for p in a.SIDs] for a in full.NavAirports]
+    assert streamed.find_shortest_path("BCN.D", "MAD.A")[1] == full.find_shortest_path("BCN.D", "MAD.A")[1]
+
+
+def test_merge_regions():
+    # Cat y Spain comparten la numeración de los puntos: se unen por ID
+    regions = [load(region) for region in ("Cat", "Spain")]
+    merged = AirSpace.load_regions([data_files(region) for region in ("Cat", "Spain")])
+    assert merged.merge_conflicts == []
+
+    ids = set()
+    pairs = set()
+    for airspace in regions:
+        ids.update(p.code for p in airspace.NavPoints)
+        pairs.update((s.origin, s.destination) for s in airspace.NavSegments)
+    assert len(merged.NavPoints) == len(ids)
+    assert {(s.origin, s.destination) for s in merged.NavSegments} == pairs
+    assert len({a.name for a in merged.NavAirports}) == len(merged.NavAirports)
+
+    lebl = merged.get_airport_by_name("LEBL")
+    assert len({p.code for p in lebl.SIDs}) == len(lebl.SIDs)
+    assert merged.find_shortest_path("IZA.D", "GODOX")[1] is not None
+
+    # Eur usa otra numeración: se une por nombre y se reasignan los IDs repetidos
+    merged = AirSpace.load_regions([data_files(region) for region in ("Cat", "Spain", "Eur")], key="name")
+    names = {p.name for region in ("Cat", "Spain", "Eur") for p in load(region).NavPoints}
+    assert len(merged.NavPoints) == len(names)
+    assert len({p.code for p in merged.NavPoints}) == len(names)
+    assert not [c for c in merged.merge_conflicts if c.kind == "coordinates"]
+
+
+def test_merge_reports_conflicts():
+    first = AirSpace()
+    first.add_navpoint("A", "A", 41.0, 2.0)
+    first.add_navpoint("B", "B", 41.5, 2.5)
+    first.add_segment("A", "B", 60.0, bidirectional=False)
+    second = AirSpace()
+    second.add_navpoint("A", "A", 41.0, 2.0)
+    second.add_navpoint("B", "B", 42.0, 2.5)  # Mismo ID, otras coordenadas
+    second.add_segment("A", "B", 70.0)
+
+    merged = AirSpace.merge(first, second)
+    assert len(merged.NavPoints) == 2
+    assert len(merged.NavSegments) == 2  # A->B (una vez) y B->A
+    kinds = sorted(c.kind for c in merged.merge_conflicts)
+    assert kinds == ["coordinates", "distance"]
+    assert merged.get_navpoint_by_name_or_id("B").latitude == 41.5
+
+
+def test_validation_report():
+    airspace = load("Spain", verbose=False)
+    report = airspace.validation_report
+    assert not report.has_errors
+    assert report.airports_without_sids == ["LEVX"]
+    assert len(report.isolated_points) > 0
+    isolated = airspace.get_navpoint_by_name_or_id(report.isolated_points[0])
+    assert not isolated.neighbors
+    assert all(isolated is not n for p in airspace.NavPoints for n, _ in p.neighbors)
+
+    airspace = AirSpace()
+    airspace.add_navpoint("A", "A", 41.0, 2.0)
+    airspace.add_navpoint("B", "B", 41.5, 2.5)
+    airspace.add_navpoint("C", "C", 42.0, 3.0)
+    airspace.add_segments_bulk([("A", "B", 0.0), ("A", "A", 5.0)])
+    airspace._add_airports([("LEXX", ["NOPE"], ["B"])])
+
+    report = airspace.validate()
+    assert report.has_errors
+    assert report.self_loops == [(1, 1)]
+    assert report.non_positive_distances == [(1, 2)]
+    assert report.asymmetric_segments == [(1, 2)]
+    assert report.isolated_points == [3]
+    assert report.unresolved_procedures == [("LEXX", "NOPE", "SID")]
+    assert report.airports_without_sids == ["LEXX"]
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        report.print_report()
+    assert "Warning: Airport LEXX has no SIDs" in output.getvalue()
+
+    # Líneas del fichero de segmentos que el cargador descarta: extremos desconocidos y repetidas
+    with tempfile.TemporaryDirectory() as tmp:
+        nav_file, seg_file, aer_file = (os.path.join(tmp, name) for name in ("nav.txt", "seg.txt", "aer.txt"))
+        with open(nav_file, "w") as f:
+            f.write("1 AAA 41.0 2.0\n2 BBB 41.5 2.5\n")
+        with open(aer_file, "w") as f:
+            f.write("")
+        for bad_line in ("", "2\n"):  # Parser vectorizado y parser línea a línea
+            with open(seg_file, "w") as f:
+                f.write("1 2 70.0\n2 1 75.0\n1 9 10.0\n" + bad_line + "1 2 80.0\n")
+            for snapshot_dir in (None, os.path.join(tmp, f"snapshot{len(bad_line)}")):
+                for _ in range(2 if snapshot_dir else 1):  # Compilar la instantánea y después leerla
+                    airspace = AirSpace()
+                    airspace.load_airspace_data(nav_file, seg_file, aer_file, snapshot_dir=snapshot_dir,
+                                                verbose=False, use_cache=False)
+                    report = airspace.validation_report
+                    assert report.unknown_endpoints == [(1, 9)]
+                    assert report.duplicate_segments == [(1, 2)]
+                    assert report.has_errors
+                    assert airspace.skipped_segments == [(1, 9, 10.0, "unknown"), (1, 2, 70.0, "duplicate")]
+                    assert sorted((s.origin, s.destination, s.distance) for s in airspace.NavSegments) == \
+                        [(1, 2, 80.0), (2, 1, 75.0)]
+
+
+def test_incoming_index_and_bidirectional_search():
+    airspace = load("Spain", verbose=False)
+    legacy = AirSpace(use_graph_core=False)
+    legacy.load_airspace_data(*data_files("Spain"), verbose=False)
+    for point in airspace.NavPoints[::50]:
+        incoming = sorted((p.code, d) for p, d in airspace.get_incoming(point.code))
+        assert incoming == sorted((p.code, d) for p, d in legacy.get_incoming(point.code))
+        # Coherente con los vecinos de salida
+        for origin, distance in airspace.get_incoming(point.code):
+            assert (point, distance) in origin.get_neighbors()
+
+    _, expected = airspace.find_shortest_path("BCN.D", "MAD.A")
+    airspace.route_cache = None
+    airspace.use_bidirectional = True
+    path, cost = airspace.find_shortest_path("BCN.D", "MAD.A")
+    assert abs(cost - expected) < 1e-6
+    assert path[0].name == "BCN.D" and path[-1].name == "MAD.A"
+
+    # remove_navpoint solo toca los puntos que apuntan al eliminado
+    target = path[1]
+    origins = [p for p, _ in airspace.get_incoming(target.code)]
+    airspace.remove_navpoint(target.code)
+    assert all(target not in [n for n, _ in p.neighbors] for p in origins)
+    assert all(target not in [n for n, _ in p.neighbors] for p in airspace.NavPoints)
+    assert airspace.get_incoming(target.code) == []
+
+
+def test_distance_matrix():
+    airspace = load("Spain", verbose=False)
+    points = airspace.NavPoints[:80]
+    matrix, predecessors = airspace.distance_matrix(points, workers=1, predecessors=True)
+    assert matrix.shape == (80, 80)
+    with redirect_stdout(io.StringIO()):
+        for i in range(0, 80, 9):
+            for j in range(0, 80, 7):
+                path, cost = airspace.find_shortest_path(points[i].code, points[j].code)
+                if cost is None:
+                    assert matrix[i, j] == float("inf") and predecessors.path(i, j) == []
+                else:
+                    assert abs(matrix[i, j] - cost) < 1e-6
+                    assert [p.code for p in predecessors.path(i, j)] == [p.code for p in path]
+
+    # En paralelo (varios procesos) el resultado es el mismo
+    parallel, parallel_predecessors = airspace.distance_matrix(points, workers=2, predecessors=True)
+    assert (parallel == matrix).all()
+    assert (parallel_predecessors.pred == predecessors.pred).all()
+
+    # Un aeropuerto sale por sus SIDs y llega por sus STARs
+    airports = [a for a in airspace.NavAirports if a.SIDs and a.STARs][:5]
+    by_airport, _ = airspace.distance_matrix(airports)
+    sids = [p.code for p in airports[0].SIDs]
+    stars = [p.code for p in airports[1].STARs]
+    by_point, _ = airspace.distance_matrix(sids, stars)
+    assert by_airport[0, 1] == by_point.min()
+    assert airspace.distance_matrix([airports[0].name], ["BCN.D"])[0].shape == (1, 1)
+
+
+def test_route_cache_evicts_only_affected_routes():
+    airspace = load("Spain", verbose=False)
+    fresh = load("Spain", verbose=False)
+    fresh.route_cache = None
+    cache = airspace.route_cache
+    with redirect_stdout(io.StringIO()):
+        path, cost = airspace.find_shortest_path("BCN.D", "MAD.A")
+        other_path, other_cost = airspace.find_shortest_path("IZA.D", "GODOX")
+        assert airspace.find_shortest_path("BCN.D", "MAD.A") == (path, cost)
+        assert cache.hits == 1 and len(cache) == 2
+
+        # Quitar un segmento de la primera ruta solo invalida esa ruta
+        airspace.remove_segment(path[1].code, path[2].code)
+        fresh.remove_segment(path[1].code, path[2].code)
+        assert ("BCN.D", "MAD.A") not in [(s.name, g.name) for _, _, s, g in cache._entries.values()]
+        assert len(cache) == 1
+        assert airspace.find_shortest_path("IZA.D", "GODOX") == (other_path, other_cost)
+        assert airspace.find_shortest_path("BCN.D", "MAD.A")[1] == fresh.find_shortest_path("BCN.D", "MAD.A")[1]
+
+        # Un segmento que no puede acortar nada no borra rutas; un atajo sí
+        far = airspace.NavPoints[-1]
+        before = len(cache)
+        airspace.add_segment(far.code, airspace.NavPoints[-2].code, 10000.0, bidirectional=False)
+        assert len(cache) == before
+        start, goal = path[0], path[-1]
+        airspace.add_segment(start.code, goal.code, 1.0, bidirectional=False)
+        assert airspace.find_shortest_path("BCN.D", "MAD.A") == ([start, goal], 1.0)
+
+        # Eliminar un punto invalida las rutas que pasan por él
+        airspace.remove_navpoint(other_path[1].code)
+        fresh.remove_navpoint(other_path[1].code)
+        assert all(other_path[1] not in path
+                   for routes, _, _, _ in cache._entries.values() for path, _ in routes)
+
+        # Tras las ediciones la caché sigue dando los mismos costes que una búsqueda nueva
+        fresh.add_segment(far.code, fresh.NavPoints[-2].code, 10000.0, bidirectional=False)
+        fresh.add_segment(start.code, goal.code, 1.0, bidirectional=False)
+        names = [p.name for p in airspace.NavPoints[::40]]
+        for origin in names:
+            for destination in names:
+                airspace.find_shortest_path(origin, destination)
+        airspace.add_segment(names[0], names[1], 5.0)
+        fresh.add_segment(names[0], names[1], 5.0)
+        for origin in names:
+            for destination in names:
+                _, cached_cost = airspace.find_shortest_path(origin, destination)
+                _, expected_cost = fresh.find_shortest_path(origin, destination)
+                assert cached_cost == expected_cost
+
+    # Cambios que no pasan por los métodos de edición vacían la caché entera
+    airspace._touch()
+    assert airspace._get_route_cache() is cache and len(cache) == 0
+
+
+def test_shortest_path_tree_reused_for_same_origin():
+    airspace = load("Spain", verbose=False)
+    airspace.route_cache = None
+    tree = airspace.shortest_path_tree("BCN.D")
+    assert airspace.shortest_path_tree(tree.graph.points[tree.origin]) is tree
+    with redirect_stdout(io.StringIO()):
+        for destination in airspace.NavPoints[::60]:
+            expected_path, expected_cost = airspace.find_shortest_path("BCN.D", destination.code)
+            path, cost = tree.route(destination)
+            assert (cost is None) == (expected_cost is None)
+            if cost is not None:
+                assert abs(cost - expected_cost) < 1e-6
+                assert path[0].name == "BCN.D" and path[-1] is destination
+                assert len(path) == len(expected_path)
+            else:
+                assert path == []
+
+    # Editar el grafo descarta los árboles guardados
+    goal = airspace.get_navpoint_by_name_or_id("MAD.A")
+    airspace.add_segment(tree.graph.points[tree.origin].code, goal.code, 1.0, bidirectional=False)
+    new_tree = airspace.shortest_path_tree("BCN.D")
+    assert new_tree is not tree and new_tree.route(goal)[1] == 1.0
+    assert airspace.shortest_path_tree("NO-EXISTE") is None
+
+
+def test_k_shortest_paths():
+    airspace = load("Spain", verbose=False)
+    with redirect_stdout(io.StringIO()):
+        best_path, best_cost = airspace.find_shortest_path("BCN.D", "MAD.A")
+    routes = airspace.k_shortest_paths("BCN.D", "MAD.A", k=5)
+    assert len(routes) == 5
+    assert abs(routes[0][1] - best_cost) < 1e-6 and len(routes[0][0]) == len(best_path)
+    costs = [cost for _, cost in routes]
+    assert costs == sorted(costs)
+    assert len({tuple(p.code for p in path) for path, _ in routes}) == 5
+    for path, cost in routes:
+        assert len(set(path)) == len(path)  # Caminos simples
+        assert abs(sum(dict((n, d) for n, d in a.get_neighbors())[b] for a, b in zip(path, path[1:])) - cost) < 1e-6
+
+    # Segunda llamada desde la caché; quitar un segmento de una alternativa la invalida
+    hits = airspace.route_cache.hits
+    assert airspace.k_shortest_paths("BCN.D", "MAD.A", k=5) == routes
+    assert airspace.route_cache.hits == hits + 1
+    used = {(a, b) for path, _ in routes[:2] for a, b in zip(path, path[1:])}
+    used |= {(b, a) for a, b in used}
+    origin, dest = next(pair for pair in zip(routes[2][0], routes[2][0][1:]) if pair not in used)
+    airspace.remove_segment(origin.code, dest.code)
+    again = airspace.k_shortest_paths("BCN.D", "MAD.A", k=5)
+    assert again[:2] == routes[:2] and again[2] != routes[2]
+
+    diverse = airspace.k_shortest_paths("BCN.D", "MAD.A", k=4, method="penalty")
+    assert 1 <= len(diverse) <= 4
+    assert abs(diverse[0][1] - again[0][1]) < 1e-6
+    assert len({tuple(p.code for p in path) for path, _ in diverse}) == len(diverse)
+
+
+def test_route_airports_through_sids_and_stars():
+    airspace = load("Spain", verbose=False)
+    airspace.route_cache = None
+    airports = [a for a in airspace.NavAirports if a.SIDs and a.STARs]
+    with redirect_stdout(io.StringIO()):
+        for departure in airports[:4]:
+            for arrival in airports[:4]:
+                path, cost = airspace.route_airports(departure.name, arrival.name)
+                # Igual que la mejor de todas las combinaciones SID x STAR
+                best = min((c for c in (airspace.find_shortest_path(sid.code, star.code)[1]
+                                        for sid in departure.SIDs for star in arrival.STARs)
+                            if c is not None), default=None)
+                assert (cost is None) == (best is None)
+                if cost is not None:
+                    assert abs(cost - best) < 1e-6
+                    assert path[0] in departure.SIDs and path[-1] in arrival.STARs
+        assert airspace.route_airports("LEVX", airports[0].name) == ([], None)  # Sin SIDs
+        assert airspace.route_airports("XXXX", airports[0].name) == ([], None)
+
+    table = airspace.precompute_airport_pairs(workers=1)
+    for departure in airports[:4]:
+        for arrival in airports[:4]:
+            path, cost = airspace.route_airports(departure.name, arrival.name)
+            assert cost == table.cost(departure.name, arrival.name)
+            if cost is not None:
+                assert path[0] in departure.SIDs and path[-1] in arrival.STARs
+    assert ("LEVX", airports[0].name) not in table
+
+    # Una edición descarta la tabla
+    airspace.remove_navpoint(airports[0].SIDs[0].code)
+    assert airspace._airport_table is None
+
+
+def test_component_index():
+    for region in ("Cat", "Spain", "Eur"):
+        airspace = load(region, verbose=False)
+        graph = airspace.get_graph()
+        components = airspace._get_components()
+        for point in airspace.NavPoints[::25]:
+            expected = {graph.points[i] for i in graph.bfs(graph.index[point.code])}
+            assert airspace.reachable_from(point.code) == expected
+            for other in airspace.NavPoints[::31]:
+                assert components.connected(point.code, other.code) == (other in expected)
+        main = airspace.main_component()
+        assert len(main) == max(len(c) for c in components.weak_components())
+
+    # Sin camino: se responde sin buscar
+    airspace = load("Spain", verbose=False)
+    airspace.route_cache = None
+    isolated = airspace.validation_report.isolated_points[0]
+    with redirect_stdout(io.StringIO()) as output:
+        assert airspace.find_shortest_path("BCN.D", isolated) == ([], None)
+    assert "no están conectados" in output.getvalue()
+    assert "Iniciando búsqueda" not in output.getvalue()
+
+    # Añadir puntos y segmentos actualiza el índice sin reconstruirlo
+    components = airspace._get_components()
+    airspace.add_navpoint("NUEVO", "NUEVO", 40.0, -3.0)
+    assert not airspace.is_reachable("BCN.D", "NUEVO")
+    airspace.add_segment("MAD.A", "NUEVO", 10.0, bidirectional=False)
+    assert airspace._get_components() is components
+    assert airspace.is_reachable("BCN.D", "NUEVO") and not airspace.is_reachable("NUEVO", "BCN.D")
+    airspace.add_segment(isolated, "MAD.A", 10.0, bidirectional=False)
+    assert airspace.is_reachable(isolated, "NUEVO")
+    fresh = ComponentIndex.build(airspace.get_graph())
+    for a in airspace.NavPoints[::20] + [airspace.get_navpoint_by_name_or_id("NUEVO")]:
+        for b in airspace.NavPoints[::23]:
+            assert components.connected(a.code, b.code) == fresh.connected(a.code, b.code)
+
+    # Quitar un segmento obliga a reconstruirlo
+    airspace.remove_segment("MAD.A", "NUEVO")
+    assert airspace._get_components() is not components
+    assert not airspace.is_reachable("BCN.D", "NUEVO")
+
+    # Una cadena larga: una componente fuerte por punto, sin guardar el cierre transitivo
+    n = 5000
+    chain = AirSpace().build_from([NavPoint(i, f"P{i}", 40.0 + i * 1e-4, 2.0) for i in range(n)],
+                                  [NavSegment(i, i + 1, 1.0) for i in range(n - 1)])
+    components = chain._get_components()
+    assert sum(len(successors) for successors in components.dag) == n - 1
+    assert components.connected(0, n - 1) and not components.connected(n - 1, 0)
+    assert len(chain.reachable_from(n // 2)) == n - n // 2
+    chain.add_segment(n - 1, 0, 1.0, bidirectional=False)  # Cierra el ciclo
+    assert chain._get_components() is components and components.connected(n - 1, n // 2)
+
+
+def test_replan_route_after_edits():
+    airspace = load("Eur", verbose=False)
+    airspace.route_cache = None
+
+    def fresh_cost(origin, destination):
+        graph = airspace.get_graph()
+        stats = {}
+        goal = graph.index[destination.code]
+        _, cost = graph.astar(graph.index[origin.code], goal, graph.heuristic_to(goal), stats=stats)
+        return cost, stats["expanded"]
+
+    with redirect_stdout(io.StringIO()):
+        origin = airspace.NavPoints[0]
+        tree = airspace.shortest_path_tree(origin)
+        destination = max(airspace.reachable_from(origin.code), key=lambda p: tree.route(p)[1])
+        path, cost = airspace.replan_route(origin, destination)
+        planner = airspace._planner
+        assert cost == fresh_cost(origin, destination)[0]
+
+        # Cierres sucesivos de segmentos de la ruta activa
+        repaired = full = 0
+        for _ in range(5):
+            middle = len(path) // 2
+            airspace.remove_segment(path[middle].code, path[middle + 1].code)
+            path, cost = airspace.replan_route(origin.code, destination.code)
+            expected, expanded = fresh_cost(origin, destination)
+            assert abs(cost - expected) < 1e-6
+            length = sum(dict(a.neighbors)[b] for a, b in zip(path, path[1:]))
+            assert abs(length - cost) < 1e-6
+            repaired += planner.last_expanded
+            full += expanded
+        assert airspace._planner is planner  # Se ha reparado, no se ha empezado de nuevo
+        assert repaired < full / 2
+
+        # Un punto nuevo con segmentos que acortan la ruta
+        airspace.add_navpoint("ATAJO", "ATAJO", path[1].latitude, path[1].longitude)
+        airspace.add_segment(origin.code, "ATAJO", 1.0, bidirectional=False)
+        airspace.add_segment("ATAJO", path[-2].code, 1.0, bidirectional=False)
+        path, cost = airspace.replan_route(origin.code, destination.code)
+        assert airspace._planner is planner
+        assert [p.name for p in path[:2]] == [origin.name, "ATAJO"]
+        assert abs(cost - fresh_cost(origin, destination)[0]) < 1e-6
+
+        # Quitar el punto devuelve la ruta anterior; quitar el destino la anula
+        airspace.remove_navpoint("ATAJO")
+        _, cost = airspace.replan_route(origin.code, destination.code)
+        assert abs(cost - fresh_cost(origin, destination)[0]) < 1e-6
+        airspace.remove_navpoint(destination.code)
+        assert airspace.replan_route(origin, destination) == ([], None)
+
+
+if __name__ == "__main__":
+    test_snapshot_roundtrip()
+    test_snapshot_rebuilt_when_sources_change()
+    test_graph_core_matches_object_graph()
+    test_graph_core_rebuilt_after_edit()
+    test_add_segments_bulk_deduplicates()
+    test_vectorized_parser_matches_line_parser()
+    test_malformed_files_use_line_parser()
+    test_prefix_index()
+    test_streaming_pipeline_with_bbox()
+    test_merge_regions()
+    test_merge_reports_conflicts()
+    test_validation_report()
+    test_incoming_index_and_bidirectional_search()
+    test_distance_matrix()
+    test_route_cache_evicts_only_affected_routes()
+    test_shortest_path_tree_reused_for_same_origin()
+    test_k_shortest_paths()
+    test_route_airports_through_sids_and_stars()
+    test_component_index()
+    test_replan_route_after_edits()
+    print("All tests passed!")
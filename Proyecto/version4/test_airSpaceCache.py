@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import threading
+
+import airSpaceCache
+from airSpaceCache import AirSpaceCache
+from testData import DATA_DIR
+
+
+def copy_region(region, target_dir):
+    for kind in ("nav", "seg", "aer"):
+        shutil.copy(os.path.join(DATA_DIR, f"{region}_{kind}.txt"), target_dir)
+
+
+def test_cache_reuses_loaded_region():
+    cache = AirSpaceCache(DATA_DIR)
+    cat = cache.get("Cat")
+    assert cache.get("Cat") is cat
+    assert cache.get("Spain") is not cat
+    assert "Cat" in cache and "Spain" in cache
+
+    cache.discard("Cat")
+    assert "Cat" not in cache
+    assert cache.get("Cat") is not cat
+
+
+def test_cache_reloads_when_files_change():
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_region("Cat", tmp)
+        cache = AirSpaceCache(tmp)
+        first = cache.get("Cat")
+
+        with open(os.path.join(tmp, "Cat_nav.txt"), "a") as f:
+            f.write("999999 NEWPT 41.0 2.0\n")
+        second = cache.get("Cat")
+        assert second is not first
+        assert len(second.NavPoints) == len(first.NavPoints) + 1
+
+
+def test_cache_respects_memory_budget():
+    cache = AirSpaceCache(DATA_DIR)
+    cat_size = airSpaceCache.estimate_size(cache.get("Cat"))
+    cache.max_bytes = cat_size
+    cache.get("Spain")
+    # La región más antigua sale para dejar sitio a la nueva
+    assert "Spain" in cache and "Cat" not in cache
+    assert cache.used_bytes > 0
+
+
+def test_background_preload_loads_each_region_once():
+    loads = []
+    original = airSpaceCache.AirSpace.load_airspace_data
+
+    def counting_load(self, *args, **kwargs):
+        loads.append(args[0])
+        return original(self, *args, **kwargs)
+
+    airSpaceCache.AirSpace.load_airspace_data = counting_load
+    try:
+        cache = AirSpaceCache(DATA_DIR)
+        thread = cache.preload(["Cat", "Spain", "Eur"])
+        results = []
+        readers = [threading.Thread(target=lambda: results.append(cache.get("Eur"))) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        thread.join()
+    finally:
+        airSpaceCache.AirSpace.load_airspace_data = original
+
+    assert len(loads) == 3
+    assert all(airspace is results[0] for airspace in results)
+    assert all(region in cache for region in ("Cat", "Spain", "Eur"))
+
+
+if __name__ == "__main__":
+    test_cache_reuses_loaded_region()
+    test_cache_reloads_when_files_change()
+    test_cache_respects_memory_budget()
+    test_background_preload_loads_each_region_once()
+    print("All tests passed!")
@@ -0,0 +1,91 @@
+import io
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from batchSolver import SharedArrays, solve_batch, solve_pairs
+from costModels import TimeModel
+from testData import load, load_graph, sample_pairs
+
+
+def test_shared_arrays_roundtrip():
+    graph = load_graph("Cat")
+    arrays = {"ids": graph.ids, "names": graph.names, "weights": graph.weights}
+    shared = SharedArrays(arrays)
+    try:
+        memory, views = SharedArrays.attach(shared.descriptor)
+        for name, array in arrays.items():
+            assert views[name].dtype == array.dtype and (views[name] == array).all()
+        del views
+        memory.close()
+    finally:
+        shared.close()
+
+
+def test_parallel_batch_matches_sequential_astar():
+    graph = load_graph("Eur")
+    pairs = [(k, start, goal) for k, (start, goal) in enumerate(sample_pairs(graph, 300, seed=7))]
+    results = list(solve_batch(graph, pairs, workers=2, chunk_size=40))
+    assert sorted(k for k, _, _ in results) == list(range(len(pairs)))
+    for k, cost, path_ids in results:
+        _, start, goal = pairs[k]
+        path, expected = graph.astar(start, goal, graph.heuristic_to(goal))
+        assert (cost is None) == (expected is None)
+        if cost is not None:
+            assert abs(cost - expected) < 1e-6
+            assert path_ids[0] == graph.ids[start] and path_ids[-1] == graph.ids[goal]
+            assert len(path_ids) == len(path)
+
+
+
+def test_solve_pairs_keeps_one_heuristic():
+    graph = load_graph("Cat")
+    goals = [3, 7, 3, 7, 3]
+    pairs = [(k, k + 20, goal) for k, goal in enumerate(goals)]
+    calls = []
+    heuristic_to = graph.heuristic_to
+    graph.heuristic_to = lambda goal, scale=None: calls.append(goal) or heuristic_to(goal, scale)
+    results = solve_pairs(graph, pairs, graph.heuristic_scale)
+    assert sorted(calls) == [3, 7]  # Una heurística por destino, aunque vengan mezclados
+    for k, cost, _ in results:
+        _, start, goal = pairs[k]
+        expected = graph.astar(start, goal, heuristic_to(goal))[1]
+        assert (cost is None and expected is None) or abs(cost - expected) < 1e-6
+
+
+def test_airspace_solve_batch():
+    airspace = load("Spain", verbose=False)
+    isolated = airspace.validation_report.isolated_points[0]
+    model = TimeModel(450)
+    pairs = [("BCN.D", "MAD.A"), ("IZA.D", "GODOX"), ("BCN.D", "NO EXISTE"), ("BCN.D", isolated)]
+    pairs += [(a.code, b.code) for a, b in zip(airspace.NavPoints[::7], airspace.NavPoints[3::11])]
+    with redirect_stdout(io.StringIO()):
+        results = {(o, d): (cost, ids) for o, d, cost, ids in airspace.solve_batch(pairs, workers=2, model=model,
+                                                                                  chunk_size=16)}
+        assert len(results) == len(set(pairs))
+        assert results[("BCN.D", "NO EXISTE")] == (None, [])
+        assert results[("BCN.D", isolated)] == (None, [])
+        for (origin, destination), (cost, ids) in results.items():
+            path, expected = airspace.find_shortest_path(origin, destination, model)
+            assert (cost is None) == (expected is None)
+            if cost is not None:
+                assert abs(cost - expected) < 1e-6
+                assert len(ids) == len(path) and ids[0] == path[0].code and ids[-1] == path[-1].code
+
+    # Las zonas restringidas también se respetan
+    point = airspace.get_navpoint_by_name_or_id("MAD.A")
+    lat, lon = point.latitude - 1.0, point.longitude + 1.0
+    airspace.add_restricted_area("R", [(lat - 0.5, lon - 0.5), (lat - 0.5, lon + 0.5),
+                                       (lat + 0.5, lon + 0.5), (lat + 0.5, lon - 0.5)])
+    with redirect_stdout(io.StringIO()):
+        expected = airspace.find_shortest_path("BCN.D", "MAD.A")[1]
+    [(_, _, cost, _)] = list(airspace.solve_batch([("BCN.D", "MAD.A")], workers=1))
+    assert np.isclose(cost, expected)
+
+
+if __name__ == "__main__":
+    test_shared_arrays_roundtrip()
+    test_parallel_batch_matches_sequential_astar()
+    test_solve_pairs_keeps_one_heuristic()
+    test_airspace_solve_batch()
+    print("All tests passed!")
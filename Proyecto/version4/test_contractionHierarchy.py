@@ -0,0 +1,66 @@
+import os
+import tempfile
+
+from contractionHierarchy import ContractionHierarchy
+from testData import REGIONS, load_for_search, load_graph, path_cost, sample_pairs
+
+
+def test_contraction_matches_astar_and_unpacks_to_real_segments():
+    for region in REGIONS:
+        graph = load_graph(region)
+        contraction = ContractionHierarchy.build(graph)
+        assert sorted(contraction.rank.tolist()) == list(range(graph.num_nodes))
+        for start, goal in sample_pairs(graph, 80, seed=3):
+            _, expected = graph.astar(start, goal, graph.heuristic_to(goal))
+            path, cost = contraction.query(start, goal)
+            assert (cost is None) == (expected is None)
+            if cost is None:
+                assert path == []
+                continue
+            assert abs(cost - expected) < 1e-6
+            assert path[0] == start and path[-1] == goal
+            # Sin atajos: cada paso es un segmento del grafo original
+            assert abs(path_cost(graph, path) - cost) < 1e-6
+        assert contraction.query(7, 7) == ([7], 0.0)
+
+
+def test_contraction_is_saved_and_checked_against_graph():
+    graph = load_graph("Cat")
+    contraction = ContractionHierarchy.build(graph)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "contraction")
+        contraction.save(directory)
+        loaded = ContractionHierarchy.load(directory, graph)
+        assert loaded is not None and loaded.num_shortcuts == contraction.num_shortcuts
+        for start, goal in sample_pairs(graph, 20, seed=4):
+            assert loaded.query(start, goal) == contraction.query(start, goal)
+        assert ContractionHierarchy.load(directory, load_graph("Spain")) is None
+
+
+def test_airspace_contraction_keeps_contract_and_follows_edits():
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_dir = os.path.join(tmp, "Cat")
+        airspace = load_for_search("Cat", snapshot_dir=snapshot_dir)
+        expected_path, expected_cost = airspace.find_shortest_path("IZA.D", "GODOX")
+
+        first = airspace.enable_contraction()
+        assert os.path.exists(os.path.join(snapshot_dir, "contraction", "header.json"))
+        path, cost = airspace.find_shortest_path("IZA.D", "GODOX")
+        assert abs(cost - expected_cost) < 1e-6
+        assert path[0].name == "IZA.D" and path[-1].name == "GODOX"
+        assert len(path) == len(expected_path)
+
+        start, goal = path[0], path[-1]
+        airspace.add_segment(start.code, goal.code, 1.0, bidirectional=False)
+        assert airspace._get_contraction() is not first
+        assert airspace.find_shortest_path("IZA.D", "GODOX") == ([start, goal], 1.0)
+
+        airspace.remove_navpoint(goal.code)
+        assert airspace.find_shortest_path("IZA.D", "GODOX") == ([], None)
+
+
+if __name__ == "__main__":
+    test_contraction_matches_astar_and_unpacks_to_real_segments()
+    test_contraction_is_saved_and_checked_against_graph()
+    test_airspace_contraction_keeps_contract_and_follows_edits()
+    print("All tests passed!")
@@ -0,0 +1,113 @@
+import io
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from airSpace import AirSpace
+from navPoint import NavPoint
+from navSegment import NavSegment
+from costModels import CostModel, DistanceModel, FuelModel, TimeModel, WindGrid, KM_PER_NM
+from testData import load, load_graph, path_cost, sample_pairs
+
+
+def synthetic_wind(graph, speed=80.0, seed=3):
+    return WindGrid.synthetic(graph.lat.min(), graph.lat.max(), graph.lon.min(), graph.lon.max(),
+                              speed=speed, seed=seed)
+
+
+def test_models_are_cached_per_parameters():
+    graph = load_graph("Spain")
+    distance, scale = graph.cost_weights(DistanceModel())
+    assert distance == graph.lists()[2] and scale == graph.heuristic_scale
+
+    wind = synthetic_wind(graph)
+    model = TimeModel(450, wind)
+    weights, _ = graph.cost_weights(model)
+    assert graph.cost_weights(TimeModel(450.0, wind))[0] is weights  # Misma clave: no se recalcula
+    assert graph.cost_weights(TimeModel(500, wind))[0] is not weights
+    assert graph.cost_weights(TimeModel(450))[0] is not weights
+
+    # Sin viento el tiempo es proporcional a la distancia
+    still = np.array(graph.cost_weights(TimeModel(450))[0])
+    assert np.allclose(still, graph.weights / (450 * KM_PER_NM) * 60)
+    calm = WindGrid([30, 50], [-20, 10], np.zeros((2, 2)), np.zeros((2, 2)))
+    assert np.allclose(graph.cost_weights(TimeModel(450, calm))[0], still)
+    fuel = np.array(graph.cost_weights(FuelModel(450, 3000, wind))[0])
+    assert np.allclose(fuel, np.array(weights) * 50)
+
+    # Un modelo sin weights() falla al crearlo, no a mitad de una búsqueda
+    class Incomplete(CostModel):
+        name = "incompleto"
+    try:
+        Incomplete()
+        assert False, "CostModel sin weights() no debería poder instanciarse"
+    except TypeError:
+        pass
+
+
+def test_wind_grid_interpolation_and_ground_speed():
+    lats, lons = [40.0, 42.0], [0.0, 2.0]
+    u = np.array([[10.0, 30.0], [10.0, 30.0]])
+    grid = WindGrid(lats, lons, u, np.zeros((2, 2)))
+    east, north = grid.at(np.array([41.0, 50.0]), np.array([1.0, 1.5]))
+    assert np.allclose(east, [20.0, 25.0]) and np.allclose(north, 0.0)
+    assert grid.key == WindGrid(lats, lons, u, np.zeros((2, 2))).key
+
+    # Con viento del oeste, volar hacia el este es más rápido que hacia el oeste
+    airspace = AirSpace()
+    airspace.build_from([NavPoint(1, "A", 41.0, 0.5), NavPoint(2, "B", 41.0, 1.5)],
+                        [NavSegment(1, 2, 84.0), NavSegment(2, 1, 84.0)])
+    graph = airspace.get_graph()
+    eastbound, westbound = graph.cost_weights(TimeModel(400, grid))[0]
+    assert eastbound < graph.cost_weights(TimeModel(400))[0][0] < westbound
+    assert abs(eastbound - 84.0 / (420 * KM_PER_NM) * 60) < 0.05
+
+
+def test_model_routes_are_optimal():
+    graph = load_graph("Eur")
+    model = TimeModel(450, synthetic_wind(graph))
+    weights, scale = graph.cost_weights(model)
+    assert scale > 0
+    for start, goal in sample_pairs(graph, 40, seed=5):
+        expected = graph.astar(start, goal, weights=weights)[1]
+        path, cost = graph.astar(start, goal, graph.heuristic_to(goal, scale), weights=weights)
+        assert (cost is None) == (expected is None)
+        if cost is not None:
+            assert abs(cost - expected) < 1e-6
+            assert abs(path_cost(graph, path, weights) - cost) < 1e-6
+
+
+def test_find_shortest_path_with_cost_model():
+    airspace = load("Spain", verbose=False)
+    graph = airspace.get_graph()
+    model = TimeModel(450, synthetic_wind(graph, speed=120))
+    key = (airspace.get_navpoint_by_name_or_id("BCN.D").code,
+           airspace.get_navpoint_by_name_or_id("MAD.A").code, model.key)
+    with redirect_stdout(io.StringIO()):
+        path, _ = airspace.find_shortest_path("BCN.D", "MAD.A")
+        timed_path, minutes = airspace.find_shortest_path("BCN.D", "MAD.A", model)
+        assert key in airspace.route_cache
+        assert airspace.find_shortest_path("BCN.D", "MAD.A", model) == (timed_path, minutes)
+
+        weights, _ = graph.cost_weights(model)
+        indices = [graph.index[p.code] for p in timed_path]
+        assert abs(path_cost(graph, indices, weights) - minutes) < 1e-6
+        assert path_cost(graph, [graph.index[p.code] for p in path], weights) >= minutes - 1e-6
+
+        # El modelo por defecto del AirSpace
+        airspace.cost_model = model
+        assert airspace.find_shortest_path("BCN.D", "MAD.A")[1] == minutes
+
+        # Añadir un segmento borra las rutas de otros modelos (su cota no está en km)
+        airspace.add_segment("BCN.D", "MAD.A", 1.0, bidirectional=False)
+        assert key not in airspace.route_cache
+        path, minutes = airspace.find_shortest_path("BCN.D", "MAD.A", model)
+        assert [p.name for p in path] == ["BCN.D", "MAD.A"]
+
+
+if __name__ == "__main__":
+    test_models_are_cached_per_parameters()
+    test_wind_grid_interpolation_and_ground_speed()
+    test_model_routes_are_optimal()
+    test_find_shortest_path_with_cost_model()
+    print("All tests passed!")
@@ -0,0 +1,82 @@
+import os
+import tempfile
+
+from landmarks import LandmarkIndex
+from testData import load_for_search, load_graph, sample_pairs
+
+
+def test_alt_keeps_optimal_cost_and_expands_fewer_nodes():
+    for region in ("Spain", "Eur"):
+        graph = load_graph(region)
+        landmarks = LandmarkIndex.build(graph)
+        assert len(set(landmarks.landmarks.tolist())) == 16
+        geometric = alt = 0
+        for start, goal in sample_pairs(graph, 60, seed=2):
+            dist, _ = graph.dijkstra([start])
+            geo_stats, alt_stats = {}, {}
+            _, expected = graph.astar(start, goal, graph.heuristic_to(goal), stats=geo_stats)
+            path, cost = graph.astar(start, goal, landmarks.heuristic_to(goal), stats=alt_stats)
+            assert (cost is None) == (expected is None)
+            if cost is None:
+                continue
+            assert abs(cost - expected) < 1e-6 and abs(cost - dist[goal]) < 1e-6
+            assert path[0] == start and path[-1] == goal
+            # La cota nunca sobreestima la distancia real
+            assert landmarks.heuristic_array(goal)[start] <= cost + 1e-6
+            geometric += geo_stats["expanded"]
+            alt += alt_stats["expanded"]
+        assert alt * 2.5 < geometric
+
+
+def test_landmarks_are_saved_and_checked_against_graph():
+    graph = load_graph("Cat")
+    landmarks = LandmarkIndex.build(graph, 4, method="farthest")
+    assert len(set(landmarks.landmarks.tolist())) == 4
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "landmarks")
+        landmarks.save(directory)
+        loaded = LandmarkIndex.load(directory, graph)
+        assert loaded is not None and loaded.landmarks.tolist() == landmarks.landmarks.tolist()
+        assert loaded.heuristic_to(5) == landmarks.heuristic_to(5)
+        # Un precálculo de otro grafo no se usa
+        assert LandmarkIndex.load(directory, load_graph("Spain")) is None
+        assert LandmarkIndex.load(os.path.join(tmp, "missing"), graph) is None
+
+
+def test_airspace_landmarks_are_reused_and_invalidated_by_edits():
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_dir = os.path.join(tmp, "Cat")
+        airspace = load_for_search("Cat", snapshot_dir=snapshot_dir)
+        first = airspace.enable_landmarks(4)
+        assert os.path.exists(os.path.join(snapshot_dir, "landmarks-4", "header.json"))
+        _, cost = airspace.find_shortest_path("IZA.D", "GODOX")
+        assert cost is not None
+
+        # Una nueva carga de la misma instantánea reutiliza el precálculo guardado
+        again = load_for_search("Cat", snapshot_dir=snapshot_dir)
+        assert again.enable_landmarks(4).from_landmarks.tolist() == first.from_landmarks.tolist()
+        assert again.find_shortest_path("IZA.D", "GODOX")[1] == cost
+
+        # Cualquier edición invalida las distancias precalculadas
+        start = airspace.get_navpoint_by_name_or_id("IZA.D")
+        goal = airspace.get_navpoint_by_name_or_id("GODOX")
+        airspace.add_segment(start.code, goal.code, 1.0, bidirectional=False)
+        assert airspace._get_landmarks() is not first
+        assert airspace.find_shortest_path("IZA.D", "GODOX")[1] == 1.0
+
+        rebuilt = airspace._get_landmarks()
+        airspace.remove_segment(start.code, goal.code)
+        assert airspace._get_landmarks() is not rebuilt
+        assert abs(airspace.find_shortest_path("IZA.D", "GODOX")[1] - cost) < 1e-6
+
+        rebuilt = airspace._get_landmarks()
+        airspace.remove_navpoint(goal.code)
+        assert airspace._get_landmarks() is not rebuilt
+        assert airspace.find_shortest_path("IZA.D", "GODOX") == ([], None)
+
+
+if __name__ == "__main__":
+    test_alt_keeps_optimal_cost_and_expands_fewer_nodes()
+    test_landmarks_are_saved_and_checked_against_graph()
+    test_airspace_landmarks_are_reused_and_invalidated_by_edits()
+    print("All tests passed!")
@@ -0,0 +1,64 @@
+import numpy as np
+
+from navGraph import haversine_km
+from testData import REGIONS, load_graph, sample_pairs
+
+
+def test_heuristic_is_admissible_on_every_segment():
+    for region in REGIONS:
+        graph = load_graph(region)
+        assert 0.99 < graph.heuristic_scale <= 1.0
+        origins = np.repeat(np.arange(graph.num_nodes), np.diff(graph.offsets))
+        straight = haversine_km(graph.lat[origins], graph.lon[origins],
+                                graph.lat[graph.targets], graph.lon[graph.targets])
+        # Consistencia en cada segmento: h(u) <= w(u, v) + h(v) para cualquier destino
+        assert np.all(straight * graph.heuristic_scale <= graph.weights + 1e-9)
+
+        # Y por tanto nunca sobreestima el coste real hasta el destino
+        for start, goal in sample_pairs(graph, 30):
+            _, cost = graph.astar(start, goal)
+            if cost is not None:
+                assert graph.heuristic_to(goal)[start] <= cost + 1e-9
+
+
+def test_heuristic_keeps_optimal_cost_and_expands_fewer_nodes():
+    for region in REGIONS:
+        graph = load_graph(region)
+        plain = guided = 0
+        for start, goal in sample_pairs(graph, 40, seed=1):
+            dijkstra_stats, astar_stats = {}, {}
+            _, expected = graph.astar(start, goal, stats=dijkstra_stats)
+            _, cost = graph.astar(start, goal, graph.heuristic_to(goal), stats=astar_stats)
+            assert (cost is None) == (expected is None)
+            if cost is not None:
+                assert abs(cost - expected) < 1e-6
+                plain += dijkstra_stats["expanded"]
+                guided += astar_stats["expanded"]
+        assert guided < plain / 2
+
+
+def test_bidirectional_search_matches_astar_with_smaller_search_space():
+    for region in REGIONS:
+        graph = load_graph(region)
+        one_way = both_ways = 0
+        for start, goal in sample_pairs(graph, 40, seed=5):
+            forward_stats, bidirectional_stats = {}, {}
+            _, expected = graph.astar(start, goal, stats=forward_stats)
+            path, cost = graph.bidirectional(start, goal, stats=bidirectional_stats)
+            _, guided = graph.bidirectional(start, goal, graph.bidirectional_potential(start, goal))
+            assert (cost is None) == (expected is None) == (guided is None)
+            if cost is None:
+                continue
+            assert abs(cost - expected) < 1e-6 and abs(guided - expected) < 1e-6
+            assert path[0] == start and path[-1] == goal
+            one_way += forward_stats["expanded"]
+            both_ways += bidirectional_stats["expanded"]
+        assert both_ways < one_way * 0.7
+        assert graph.bidirectional(3, 3) == ([3], 0.0)
+
+
+if __name__ == "__main__":
+    test_heuristic_is_admissible_on_every_segment()
+    test_heuristic_keeps_optimal_cost_and_expands_fewer_nodes()
+    test_bidirectional_search_matches_astar_with_smaller_search_space()
+    print("All tests passed!")
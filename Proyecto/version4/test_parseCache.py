@@ -0,0 +1,76 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from airSpace import AirSpace
+from parseCache import ParseCache, hash_sources
+from testData import data_files
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load(region, cache):
+    airspace = AirSpace()
+    airspace.parse_cache = cache
+    airspace.load_airspace_data(*data_files(region), verbose=False)
+    return airspace
+
+
+def test_second_load_comes_from_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ParseCache(tmp)
+        parsed = load("Spain", cache)
+        key = hash_sources(data_files("Spain"))
+        assert os.path.exists(os.path.join(tmp, key, "header.json"))
+
+        cached = load("Spain", cache)
+        # Los puntos cargados de la caché son vistas sobre los arrays del NavGraph
+        assert cached.NavPoints[0]._graph is not None
+        assert len(cached.NavPoints) == len(parsed.NavPoints)
+        assert len(cached.NavSegments) == len(parsed.NavSegments)
+        assert cached.find_shortest_path("BCN.D", "MAD.A")[1] == parsed.find_shortest_path("BCN.D", "MAD.A")[1]
+
+
+def test_cache_shared_between_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        load("Cat", ParseCache(tmp))
+        script = (
+            "import sys; from airSpace import AirSpace; a = AirSpace(); "
+            f"a.load_airspace_data(*{data_files('Cat')!r}, verbose=False); "
+            "print(a.NavPoints[0]._graph is not None, len(a.NavPoints))"
+        )
+        env = dict(os.environ, AIRSPACE_CACHE_DIR=tmp)
+        output = subprocess.run([sys.executable, "-c", script], cwd=HERE, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        assert output.split() == ["True", "286"]
+
+
+def test_cache_eviction_keeps_size_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ParseCache(tmp)
+        load("Cat", cache)
+        cat_entry = os.path.join(tmp, hash_sources(data_files("Cat")))
+        cache.max_bytes = sum(size for _, size, _ in cache.entries())
+
+        load("Eur", cache)
+        # Cat era la entrada menos usada: se ha borrado para dejar sitio a Eur
+        assert not os.path.exists(cat_entry)
+        assert len(cache.entries()) == 1
+
+        # Un fichero modificado tiene otra clave y se vuelve a parsear
+        files = []
+        for path in data_files("Cat"):
+            shutil.copy(path, tmp)
+            files.append(os.path.join(tmp, os.path.basename(path)))
+        with open(files[0], "a") as f:
+            f.write("999999 NEWPT 41.0 2.0\n")
+        assert hash_sources(files) != hash_sources(data_files("Cat"))
+
+
+if __name__ == "__main__":
+    test_second_load_comes_from_cache()
+    test_cache_shared_between_processes()
+    test_cache_eviction_keeps_size_bounded()
+    print("All tests passed!")
@@ -0,0 +1,152 @@
+import io
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from restrictedAreas import RestrictedAreas, RestrictedZone, SegmentGrid
+from testData import load, load_graph
+
+SQUARE = [(40.0, 0.0), (40.0, 2.0), (42.0, 2.0), (42.0, 0.0)]
+
+
+def random_zones(graph, count, seed=0):
+    rng = np.random.default_rng(seed)
+    zones = []
+    for n in range(count):
+        lat = rng.uniform(graph.lat.min(), graph.lat.max())
+        lon = rng.uniform(graph.lon.min(), graph.lon.max())
+        angles = np.sort(rng.uniform(0, 2 * np.pi, size=rng.integers(3, 9)))
+        radius = rng.uniform(0.2, 1.5, size=len(angles))
+        zones.append(RestrictedZone(f"Z{n}", np.column_stack((lat + radius * np.sin(angles),
+                                                              lon + radius * np.cos(angles)))))
+    return zones
+
+
+def test_zone_geometry():
+    zone = RestrictedZone("cuadrado", SQUARE)
+    assert zone.contains(np.array([41.0, 43.0, 41.0]), np.array([1.0, 1.0, -0.5])).tolist() == [True, False, False]
+    crosses = zone.crosses(np.array([39.0, 41.0, 39.0, 39.0]), np.array([0.5, 1.0, 3.0, -1.0]),
+                           np.array([43.0, 41.5, 39.5, 43.0]), np.array([1.5, 1.5, 3.0, -0.5]))
+    # Atraviesa, está dentro, pasa por debajo, pasa por el lado
+    assert crosses.tolist() == [True, True, False, False]
+    try:
+        RestrictedZone("línea", SQUARE[:2])
+        assert False, "Debería fallar con menos de 3 vértices"
+    except ValueError:
+        pass
+
+
+def test_grid_prefilter_matches_brute_force():
+    graph = load_graph("Eur")
+    grid = SegmentGrid(graph, cell=1.0)
+    for zone in random_zones(graph, 25):
+        everything = np.arange(graph.num_edges)
+        expected = everything[zone.crosses(grid.lat1, grid.lon1, grid.lat2, grid.lon2)]
+        assert grid.blocked_by(zone).tolist() == expected.tolist()
+
+    # Las zonas que se solapan solo liberan un segmento cuando ya no lo bloquea ninguna
+    areas = RestrictedAreas(graph)
+    base = graph.lists()[2]
+    masked = areas.weights(base)
+    zones = random_zones(graph, 6, seed=4)
+    for zone in zones:
+        areas.add(zone)
+    union = np.zeros(graph.num_edges, dtype=bool)
+    for zone in zones:
+        union[grid.blocked_by(zone)] = True
+    assert (areas.mask == union).all()
+    assert [w == float("inf") for w in masked] == union.tolist()
+    for zone in zones[:3]:
+        areas.remove(zone.name)
+    assert [w == float("inf") for w in masked] == areas.mask.tolist()
+    assert [w for w, m in zip(masked, areas.mask) if not m] == [w for w, m in zip(base, areas.mask) if not m]
+
+
+def test_routes_avoid_restricted_areas():
+    airspace = load("Spain", verbose=False)
+    with redirect_stdout(io.StringIO()):
+        path, cost = airspace.find_shortest_path("BCN.D", "MAD.A")
+        middle = path[len(path) // 2]
+        lat, lon = middle.latitude, middle.longitude
+        box = [(lat - 0.3, lon - 0.3), (lat - 0.3, lon + 0.3), (lat + 0.3, lon + 0.3), (lat + 0.3, lon - 0.3)]
+        assert airspace.add_restricted_area("R1", box) > 0
+        assert airspace.restricted_areas == ["R1"]
+        cache = airspace.route_cache
+        assert (path[0].code, path[-1].code, "distance") not in cache
+
+        detour, detour_cost = airspace.find_shortest_path("BCN.D", "MAD.A")
+        assert detour_cost > cost and middle not in detour
+        zone = RestrictedZone("R1", box)
+        for a, b in zip(detour, detour[1:]):
+            assert not zone.crosses(np.array([a.latitude]), np.array([a.longitude]),
+                                    np.array([b.latitude]), np.array([b.longitude]))[0]
+        # Igual que A* con los segmentos bloqueados quitados a mano
+        graph = airspace.get_graph()
+        weights = list(graph.lists()[2])
+        for k in SegmentGrid(graph).blocked_by(zone).tolist():
+            weights[k] = float("inf")
+        goal = graph.index[detour[-1].code]
+        assert abs(graph.astar(graph.index[detour[0].code], goal, weights=weights)[1] - detour_cost) < 1e-6
+
+        # Quitar la zona devuelve la ruta original
+        airspace.remove_restricted_area("R1")
+        assert (path[0].code, path[-1].code, "distance") not in cache
+        assert airspace.find_shortest_path("BCN.D", "MAD.A")[1] == cost
+
+        # Las zonas sobreviven a las ediciones del grafo
+        airspace.add_restricted_area("R1", box)
+        airspace.add_navpoint("LEJOS", "LEJOS", 28.0, -16.0)
+        assert airspace.find_shortest_path("BCN.D", "MAD.A")[1] == detour_cost
+
+
+
+def test_every_route_api_avoids_restricted_areas():
+    airspace = load("Cat", verbose=False)
+    goal = airspace.get_navpoint_by_name_or_id("GODOX")
+    with redirect_stdout(io.StringIO()):
+        _, cost = airspace.find_shortest_path("IZA.D", "GODOX")
+        airport_path, airport_cost = airspace.route_airports("LEGE", "LEZG")
+        # Árbol, tabla de aeropuertos, planificador y k rutas calculados antes de la zona
+        airspace.shortest_path_tree("IZA.D")
+        airspace.precompute_airport_pairs(workers=1)
+        airspace.replan_route("IZA.D", "GODOX")
+        airspace.k_shortest_paths("IZA.D", "GODOX", 3)
+
+        point = airspace.get_navpoint_by_name_or_id("OKITI")
+        lat, lon = point.latitude, point.longitude
+        airspace.add_restricted_area("OKITI", [(lat - 0.05, lon - 0.05), (lat - 0.05, lon + 0.05),
+                                               (lat + 0.05, lon + 0.05), (lat + 0.05, lon - 0.05)])
+        path, detour = airspace.find_shortest_path("IZA.D", "GODOX")
+        assert detour > cost and point not in path
+        assert abs(airspace.k_shortest_paths("IZA.D", "GODOX", 3)[0][1] - detour) < 1e-6
+        assert abs(airspace.shortest_path_tree("IZA.D").route(goal)[1] - detour) < 1e-6
+        assert abs(airspace.replan_route("IZA.D", "GODOX")[1] - detour) < 1e-6
+        assert abs(airspace.distance_matrix(["IZA.D"], ["GODOX"], workers=1)[0][0, 0] - detour) < 1e-6
+
+        # Aeropuertos: con una zona en mitad de la ruta, con y sin tabla precalculada
+        middle = airport_path[len(airport_path) // 2]
+        lat, lon = middle.latitude, middle.longitude
+        airspace.add_restricted_area("MEDIO", [(lat - 0.05, lon - 0.05), (lat - 0.05, lon + 0.05),
+                                               (lat + 0.05, lon + 0.05), (lat + 0.05, lon - 0.05)])
+        path, rerouted = airspace.route_airports("LEGE", "LEZG")
+        assert middle not in path and (rerouted is None or rerouted > airport_cost)
+        airspace.precompute_airport_pairs(workers=1)
+        assert airspace.route_airports("LEGE", "LEZG")[1] == rerouted
+
+        # Un segmento nuevo con zonas activas: el planificador vuelve a buscar desde cero
+        airspace.add_segment("IZA.D", "GODOX", 500.0, bidirectional=False)
+        assert abs(airspace.replan_route("IZA.D", "GODOX")[1] - airspace.find_shortest_path("IZA.D", "GODOX")[1]) < 1e-6
+
+        airspace.remove_restricted_area("OKITI")
+        airspace.remove_restricted_area("MEDIO")
+        assert abs(airspace.shortest_path_tree("IZA.D").route(goal)[1] - cost) < 1e-6
+        assert abs(airspace.replan_route("IZA.D", "GODOX")[1] - cost) < 1e-6
+        assert abs(airspace.route_airports("LEGE", "LEZG")[1] - airport_cost) < 1e-6
+
+
+if __name__ == "__main__":
+    test_zone_geometry()
+    test_grid_prefilter_matches_brute_force()
+    test_routes_avoid_restricted_areas()
+    test_every_route_api_avoids_restricted_areas()
+    print("All tests passed!")
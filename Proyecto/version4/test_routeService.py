@@ -0,0 +1,102 @@
+import asyncio
+import io
+import json
+from contextlib import redirect_stdout
+
+from routeService import RouteService
+from testData import load
+
+
+async def fetch(port, target, method="GET"):
+    """(status, JSON) de una petición al servicio"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), json.loads(body)
+
+
+def run_service(airspaces, client, workers=1):
+    async def main():
+        service = await RouteService(airspaces, workers=workers).start(port=0)
+        try:
+            return await client(service)
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+
+def test_endpoints():
+    cat, spain = load("Cat", verbose=False), load("Spain", verbose=False)
+
+    async def client(service):
+        assert service.port > 0
+        status, body = await fetch(service.port, "/route?region=Cat&from=IZA.D&to=GODOX")
+        assert status == 200
+        with redirect_stdout(io.StringIO()):
+            path, cost = cat.find_shortest_path("IZA.D", "GODOX")
+        assert abs(body["cost"] - cost) < 1e-6 and body["units"] == "km"
+        assert [p["id"] for p in body["path"]] == [p.code for p in path]
+        assert body["path"][0]["name"] == "IZA.D"
+
+        # IDs numéricos y otra región
+        start, goal = spain.get_navpoint_by_name_or_id("BCN.D"), spain.get_navpoint_by_name_or_id("MAD.A")
+        status, body = await fetch(service.port, f"/route?region=Spain&from={start.code}&to={goal.code}")
+        with redirect_stdout(io.StringIO()):
+            assert abs(body["cost"] - spain.find_shortest_path("BCN.D", "MAD.A")[1]) < 1e-6
+
+        isolated = spain.validation_report.isolated_points[0]
+        status, body = await fetch(service.port, f"/route?region=Spain&from=BCN.D&to={isolated}")
+        assert status == 200 and body["cost"] is None and body["path"] == []
+
+        status, body = await fetch(service.port, "/neighbors?region=Cat&point=GODOX")
+        assert status == 200
+        assert sorted(n["id"] for n in body["neighbors"]) == sorted(n.code for n, _ in cat.get_neighbors("GODOX"))
+
+        status, body = await fetch(service.port, "/reachable?region=Cat&point=GODOX")
+        assert body["count"] == len(cat.reachable_from("GODOX")) == len(body["ids"])
+
+        point = cat.get_navpoint_by_name_or_id("GODOX")
+        status, body = await fetch(service.port, f"/nearest?region=Cat&lat={point.latitude}&lon={point.longitude}&count=3")
+        assert [p["name"] for p in body["nearest"]][0] == "GODOX" and len(body["nearest"]) == 3
+        assert body["nearest"][0]["distance"] <= body["nearest"][1]["distance"] <= body["nearest"][2]["distance"]
+
+        # Errores
+        assert (await fetch(service.port, "/route?from=IZA.D&to=GODOX"))[0] == 400  # Dos regiones cargadas
+        assert (await fetch(service.port, "/route?region=Eur&from=IZA.D&to=GODOX"))[0] == 404
+        assert (await fetch(service.port, "/route?region=Cat&from=NO&to=GODOX"))[0] == 404
+        assert (await fetch(service.port, "/nearest?region=Cat&lat=abc&lon=2"))[0] == 400
+        assert (await fetch(service.port, "/desconocido"))[0] == 404
+        assert (await fetch(service.port, "/route", method="POST"))[0] == 405
+
+    run_service({"Cat": cat, "Spain": spain}, client)
+
+
+def test_identical_queries_are_coalesced():
+    cat = load("Cat", verbose=False)
+
+    async def client(service):
+        params = {"from": "IZA.D", "to": "GODOX"}
+        results = await asyncio.gather(*[service.route(dict(params)) for _ in range(10)])
+        assert service.computations == 1
+        assert all(result == results[0] for result in results)
+        goal = next(p for p in cat.reachable_from("IZA.D") if p.name not in ("IZA.D", "GODOX"))
+        other = await service.route({"from": "IZA.D", "to": str(goal.code)})
+        assert service.computations == 2 and other["cost"] is not None
+        # Terminada la búsqueda, una petición nueva vuelve a calcular
+        await service.route(dict(params))
+        assert service.computations == 3
+        # También por HTTP, en paralelo
+        answers = await asyncio.gather(*[fetch(service.port, "/route?from=IZA.D&to=GODOX") for _ in range(5)])
+        assert {body["cost"] for _, body in answers} == {results[0]["cost"]}
+
+    for workers in (1, 0):  # Procesos con memoria compartida, o un hilo del propio proceso
+        run_service({"Cat": cat}, client, workers)
+
+
+if __name__ == "__main__":
+    test_endpoints()
+    test_identical_queries_are_coalesced()
+    print("All tests passed!")